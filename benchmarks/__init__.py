@@ -0,0 +1,3 @@
+"""
+Нагрузочные тесты бота (без Telegram и внешних API)
+"""
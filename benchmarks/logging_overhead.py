@@ -0,0 +1,95 @@
+"""
+Стоимость записи в лог для вызывающего потока (event loop)
+
+Сравниваются прежняя схема (basicConfig: форматирование и запись в поток
+прямо в месте вызова, f-строки) и очередь из utils.logger (запись в очереди,
+форматирование в отдельном потоке, ленивые %-аргументы, прореживание).
+
+Записи идут пачками, как при обработке обновления, а между пачками поток
+ждёт ввода-вывода (--gap), как event loop в ожидании сети, — в это время
+поток записи успевает разобрать очередь. Вывод — во временный файл,
+замеряется только время самих вызовов логгера.
+
+Запуск:
+    python -m benchmarks.logging_overhead --updates 5000 --per-update 10
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+os.environ.setdefault('TELEGRAM_TOKEN', '1:bench')
+os.environ.setdefault('GEMINI_API_KEY', 'bench')
+os.environ.setdefault('DATABASE_URL', 'postgresql://bench')
+
+from utils.logger import setup_logging, stop_logging, TEXT_FORMAT
+
+def _reset_root():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+def _emit(logger, updates: int, per_update: int, gap: float, lazy: bool) -> float:
+    """Время в вызовах логгера (паузы между пачками не учитываются)"""
+    source = 'artstation'
+    spent = 0.0
+
+    for update in range(updates):
+        start = time.perf_counter()
+        for i in range(per_update):
+            if lazy:
+                logger.info("✅ %s: получено %d элементов (обновление %d)", source, i, update)
+            else:
+                logger.info(f"✅ {source}: получено {i} элементов (обновление {update})")
+        spent += time.perf_counter() - start
+        time.sleep(gap)
+
+    return spent
+
+def run(updates: int, per_update: int, gap: float) -> dict:
+    output = tempfile.TemporaryFile('w', encoding='utf-8')
+    logger = logging.getLogger('services.parsers.crawler')
+    results = {}
+
+    # Прежняя схема
+    _reset_root()
+    logging.basicConfig(format=TEXT_FORMAT, level=logging.INFO, stream=output, force=True)
+    results['basicConfig, f-строки'] = _emit(logger, updates, per_update, gap, lazy=False)
+
+    # Очередь без прореживания: только перенос форматирования и записи в поток
+    _reset_root()
+    setup_logging(level='INFO', fmt='json', stream=output, sample_per_minute=0)
+    results['очередь, %-аргументы'] = _emit(logger, updates, per_update, gap, lazy=True)
+    stop_logging()
+
+    # Очередь с прореживанием (60 записей в минуту на место вызова)
+    _reset_root()
+    setup_logging(level='INFO', fmt='json', stream=output, sample_per_minute=60)
+    results['очередь + прореживание'] = _emit(logger, updates, per_update, gap, lazy=True)
+    stop_logging()
+
+    _reset_root()
+    output.close()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Стоимость записи в лог для event loop")
+    parser.add_argument('--updates', type=int, default=2000, help="Сколько пачек записей")
+    parser.add_argument('--per-update', type=int, default=10, help="Записей в пачке")
+    parser.add_argument('--gap', type=float, default=1.0, help="Пауза между пачками (мс)")
+    args = parser.parse_args(argv)
+
+    records = args.updates * args.per_update
+    results = run(args.updates, args.per_update, args.gap / 1000)
+    baseline = results['basicConfig, f-строки']
+
+    print(f"{'схема':<26} {'мкс/запись':>11} {'ускорение':>10}")
+    for name, elapsed in results.items():
+        per_record = elapsed / records * 1e6
+        print(f"{name:<26} {per_record:>11.2f} {baseline / elapsed:>9.1f}x")
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,404 @@
+"""
+Воспроизведение синтетических обновлений Telegram через обработчики бота
+
+Application собирается с теми же обработчиками, что и в bot.py, но запросы
+к Bot API отвечает фейковый транспорт, Gemini, переводчик и источники трендов
+заменены заглушками с настраиваемой задержкой. БД — настоящий PostgreSQL
+(BENCH_DATABASE_URL или DATABASE_URL): в ней создаются временные пользователи
+с заметками и задачами, которые удаляются после прогона вместе с записями
+кэша трендов из заглушек. Лучше использовать отдельную базу.
+
+Обновления подаются с заданной частотой (открытая модель нагрузки): задержка
+считается от запланированного момента отправки, поэтому очередь из-за
+перегрузки видна в p95/p99. При --rate 0 обновления идут без пауз
+в --concurrency потоков.
+
+Во время прогона работает контроль event loop (utils.loop_monitor): в отчёт
+попадают перцентили его задержки и число блокировок, а с --strict прогон
+завершается с кодом 1, если какой-либо обработчик заблокировал loop.
+
+Запуск:
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.replay \\
+        --updates 2000 --rate 200 --mix notes=4,tasks=4,stats=2,trends=1,menu=4 \\
+        --json bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import subprocess
+from collections import defaultdict
+
+DATABASE_URL = os.getenv('BENCH_DATABASE_URL') or os.getenv('DATABASE_URL')
+if not DATABASE_URL:
+    sys.exit("❌ Укажите BENCH_DATABASE_URL (PostgreSQL для прогона)")
+
+# Конфигурация бота проверяет переменные окружения при импорте
+os.environ['DATABASE_URL'] = DATABASE_URL
+os.environ.setdefault('TELEGRAM_TOKEN', '1:bench')
+os.environ.setdefault('GEMINI_API_KEY', 'bench')
+for name in ('TWITTER_API_KEY', 'TWITTER_ACCESS_TOKEN', 'TELEGRAM_CHANNEL_ID'):
+    os.environ[name] = ''
+
+from telegram import Update
+from telegram.ext import Application
+from telegram.request import BaseRequest
+
+import bot as bot_app
+from database.db import init_db, close_db, get_db_pool
+from services import gemini_ai, translator
+from services.parsers import get_source
+from utils.http import close_http_session
+from utils.keyboards import get_main_keyboard, keyboard_labels
+from utils.loop_monitor import LoopMonitor
+from config.settings import LOOP_BLOCK_THRESHOLD_MS
+
+logger = logging.getLogger(__name__)
+
+# Временные пользователи прогона (ID вне диапазона реальных)
+BENCH_USER_BASE = 9_000_000_000_000
+
+DEFAULT_MIX = 'notes=4,tasks=4,stats=2,trends=1,menu=4'
+
+# ========================================
+# ЗАГЛУШКИ
+# ========================================
+
+class FakeRequest(BaseRequest):
+    """Транспорт Bot API: отвечает как Telegram, без сети"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = defaultdict(int)
+        self._message_id = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        endpoint = url.rsplit('/', 1)[-1]
+        self.calls[endpoint] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        params = request_data.json_parameters if request_data else {}
+
+        if endpoint == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Bench', 'username': 'bench_bot'}
+        elif endpoint.startswith(('send', 'edit')):
+            self._message_id += 1
+            result = {
+                'message_id': self._message_id,
+                'date': int(time.time()),
+                'chat': {'id': int(params.get('chat_id', 0)), 'type': 'private'},
+                'text': params.get('text', ''),
+            }
+        else:
+            result = True
+
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+class FakeGeminiModel:
+    """Модель Gemini: блокирующий вызов с задержкой, как у настоящего клиента"""
+
+    class _Response:
+        text = "Смоделируй уютную мастерскую в стиле low-poly с тёплым светом 🎨"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, prompt):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._Response()
+
+def _fake_fetch(factory, latency: float):
+    async def fetch(session, limit):
+        if latency:
+            await asyncio.sleep(latency)
+        return [factory(i) for i in range(limit)]
+    return fetch
+
+# Источники трендов, заменённые заглушками
+STUBBED_SOURCES = ['artstation', 'music']
+
+def install_stubs(gemini_latency: float, source_latency: float):
+    """Подмена внешних сервисов на заглушки"""
+    gemini_ai.model = FakeGeminiModel(gemini_latency)
+    # Переводчик создаётся на каждый запрос — подменяем метод класса
+    translator.GoogleTranslator.translate = lambda self, text, **kwargs: text
+
+    get_source('artstation').fetch = _fake_fetch(lambda i: {
+        'title': f'Artwork {i}', 'artist': f'Artist {i}', 'likes': 1000 - i, 'views': 10000 - i,
+        'url': f'https://www.artstation.com/artwork/{i}',
+    }, source_latency)
+    get_source('music').fetch = _fake_fetch(lambda i: {
+        'title': f'Track {i}', 'artist': f'Artist {i}', 'source': 'bench',
+    }, source_latency)
+
+# ========================================
+# ОБНОВЛЕНИЯ
+# ========================================
+
+MENU_LABELS = keyboard_labels(get_main_keyboard())
+
+KINDS = {
+    'notes': lambda rnd: '/notes',
+    'tasks': lambda rnd: '/tasks',
+    'stats': lambda rnd: '/stats',
+    'trends': lambda rnd: '/trends',
+    'menu': lambda rnd: rnd.choice(MENU_LABELS),
+    'note': lambda rnd: f'/note Заметка бенчмарка {rnd.randint(1, 10**6)}',
+    'task': lambda rnd: f'/task Задача бенчмарка {rnd.randint(1, 10**6)}',
+    'help': lambda rnd: '/help',
+}
+
+def parse_mix(mix: str) -> dict:
+    """'notes=4,tasks=2' -> {'notes': 4, 'tasks': 2}"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in KINDS:
+            raise SystemExit(f"❌ Неизвестный тип обновления: {name} (доступны: {', '.join(KINDS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+def make_update(update_id: int, user_id: int, text: str, bot) -> Update:
+    entities = []
+    if text.startswith('/'):
+        entities.append({'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])})
+
+    return Update.de_json({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Bench', 'username': f'bench{user_id}'},
+            'text': text,
+            'entities': entities,
+        },
+    }, bot)
+
+# ========================================
+# ДАННЫЕ
+# ========================================
+
+async def seed(users: int, notes: int, tasks: int):
+    """Временные пользователи с заметками и задачами (и время начала по часам БД)"""
+    user_ids = [BENCH_USER_BASE + i for i in range(users)]
+    await cleanup(users)
+
+    async with get_db_pool().acquire() as conn:
+        started_at = await conn.fetchval('SELECT LOCALTIMESTAMP')
+        await conn.execute('''
+            INSERT INTO user_stats (user_id, username, first_name)
+            SELECT id, 'bench' || id, 'Bench' FROM unnest($1::bigint[]) AS id
+        ''', user_ids)
+        await conn.execute('''
+            INSERT INTO notes (user_id, text)
+            SELECT id, 'Заметка ' || n || ': референсы, освещение, ретопология'
+            FROM unnest($1::bigint[]) AS id, generate_series(1, $2) AS n
+        ''', user_ids, notes)
+        await conn.execute('''
+            INSERT INTO tasks (user_id, text, priority, completed)
+            SELECT id, 'Задача ' || n, (ARRAY['low', 'medium', 'high'])[1 + n % 3], n % 4 = 0
+            FROM unnest($1::bigint[]) AS id, generate_series(1, $2) AS n
+        ''', user_ids, tasks)
+
+    return user_ids, started_at
+
+async def cleanup(users: int, since=None):
+    """Удаление данных временных пользователей (и кэша трендов с момента since)"""
+    async with get_db_pool().acquire() as conn:
+        for table in ('notes', 'tasks', 'user_stats', 'notification_settings'):
+            await conn.execute(
+                f'DELETE FROM {table} WHERE user_id >= $1 AND user_id < $2',
+                BENCH_USER_BASE, BENCH_USER_BASE + users
+            )
+        if since is not None:
+            await conn.execute(
+                'DELETE FROM trends_cache WHERE trend_type = ANY($1::text[]) AND cached_at >= $2',
+                STUBBED_SOURCES, since
+            )
+
+# ========================================
+# ПРОГОН
+# ========================================
+
+def percentile(values: list, q: float) -> float:
+    """Перцентиль по ближайшему рангу (values отсортирован)"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(q / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'errors': errors,
+        'per_second': round(len(values) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+async def replay(args) -> dict:
+    request = FakeRequest(args.telegram_latency / 1000)
+    app = Application.builder().token(os.environ['TELEGRAM_TOKEN']).request(request).build()
+    bot_app.register_handlers(app)
+
+    # Ошибки обработчиков считаем по типу обновления
+    errors = defaultdict(int)
+    current_kind = {}
+
+    async def count_error(update, context):
+        errors[current_kind.get(id(update), 'unknown')] += 1
+        logger.debug(f"Ошибка в обработчике: {context.error}")
+
+    app.add_error_handler(count_error)
+
+    await init_db()
+    install_stubs(args.gemini_latency / 1000, args.source_latency / 1000)
+    user_ids, seeded_at = await seed(args.users, args.notes, args.tasks)
+    await app.initialize()
+
+    rnd = random.Random(args.seed)
+    weights = parse_mix(args.mix)
+    kinds = rnd.choices(list(weights), weights=list(weights.values()), k=args.updates)
+    updates = [
+        (kind, make_update(i + 1, rnd.choice(user_ids), KINDS[kind](rnd), app.bot))
+        for i, kind in enumerate(kinds)
+    ]
+
+    # Прогрев: кэши трендов, подготовленные запросы в соединениях пула
+    for kind in weights:
+        await app.process_update(make_update(0, user_ids[0], KINDS[kind](rnd), app.bot))
+
+    latencies = defaultdict(list)
+    loop = asyncio.get_running_loop()
+
+    monitor = LoopMonitor(interval=min(0.05, args.block_threshold / 2000), block_threshold=args.block_threshold / 1000, strict=True)
+    monitor.start()
+
+    async def run_one(kind, update, scheduled_at):
+        current_kind[id(update)] = kind
+        await app.process_update(update)
+        latencies[kind].append(loop.time() - scheduled_at)
+        current_kind.pop(id(update), None)
+
+    started = loop.time()
+
+    if args.rate > 0:
+        tasks = []
+        for i, (kind, update) in enumerate(updates):
+            scheduled_at = started + i / args.rate
+            delay = scheduled_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run_one(kind, update, scheduled_at)))
+        await asyncio.gather(*tasks)
+    else:
+        queue = iter(updates)
+
+        async def worker():
+            for kind, update in queue:
+                await run_one(kind, update, loop.time())
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+    elapsed = loop.time() - started
+    await monitor.stop()
+
+    await app.shutdown()
+    await cleanup(args.users, since=seeded_at)
+    await close_http_session()
+    await close_db()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        'commit': _git_commit(),
+        'timestamp': int(time.time()),
+        'config': {key: value for key, value in vars(args).items() if key != 'json'},
+        'elapsed_s': round(elapsed, 3),
+        'total': summarize(all_latencies, sum(errors.values()), elapsed),
+        'handlers': {kind: summarize(values, errors[kind], elapsed) for kind, values in sorted(latencies.items())},
+        'bot_api_calls': dict(request.calls),
+        'event_loop': {
+            'lag_ms': {f'p{int(q * 100)}': round(lag * 1000, 3) for q, lag in monitor.percentiles().items()},
+            'blocks': monitor.blocks,
+        },
+    }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return ''
+
+def print_report(report: dict):
+    header = f"{'тип':<10} {'кол-во':>7} {'ошибки':>7} {'в сек':>9} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9} {'max мс':>9}"
+    print(f"\nКоммит {report['commit'] or '?'}, {report['elapsed_s']} сек")
+    print(header)
+    print('-' * len(header))
+
+    rows = list(report['handlers'].items()) + [('ВСЕГО', report['total'])]
+    for kind, s in rows:
+        print(f"{kind:<10} {s['count']:>7} {s['errors']:>7} {s['per_second']:>9} "
+              f"{s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9} {s['max_ms']:>9}")
+
+    loop_report = report['event_loop']
+    lags = ', '.join(f"{name} {value} мс" for name, value in loop_report['lag_ms'].items())
+    print(f"\nЗадержка event loop: {lags or 'нет замеров'}; блокировок: {len(loop_report['blocks'])}")
+    for block in loop_report['blocks']:
+        print(f"\n🧱 Блокировка {block['duration'] * 1000:.0f}+ мс:\n{block['stack']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Прогон синтетических обновлений через обработчики бота")
+    parser.add_argument('--updates', type=int, default=1000, help="Сколько обновлений отправить")
+    parser.add_argument('--rate', type=float, default=100, help="Обновлений в секунду (0 — без пауз)")
+    parser.add_argument('--concurrency', type=int, default=16, help="Параллельных отправителей при --rate 0")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Веса типов обновлений ({', '.join(KINDS)})")
+    parser.add_argument('--users', type=int, default=50, help="Временных пользователей")
+    parser.add_argument('--notes', type=int, default=20, help="Заметок на пользователя")
+    parser.add_argument('--tasks', type=int, default=20, help="Задач на пользователя")
+    parser.add_argument('--telegram-latency', type=float, default=0, help="Задержка ответа Bot API (мс)")
+    parser.add_argument('--gemini-latency', type=float, default=50, help="Задержка ответа Gemini (мс)")
+    parser.add_argument('--source-latency', type=float, default=100, help="Задержка источников трендов (мс)")
+    parser.add_argument('--seed', type=int, default=1, help="Seed генератора обновлений")
+    parser.add_argument('--block-threshold', type=float, default=LOOP_BLOCK_THRESHOLD_MS,
+                        help="Блокировка event loop дольше порога (мс) считается ошибкой")
+    parser.add_argument('--strict', action='store_true', help="Код выхода 1, если обработчик заблокировал event loop")
+    parser.add_argument('--json', help="Сохранить отчёт в JSON-файл")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = asyncio.run(replay(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Отчёт: {args.json}")
+
+    if args.strict and report['event_loop']['blocks']:
+        sys.exit(f"❌ Event loop блокировался {len(report['event_loop']['blocks'])} раз")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Стоимость выбора обработчика для текстового сообщения
+
+Сравниваются прежняя цепочка if/elif по подписям кнопок (свободный текст
+проходит её целиком) и ButtonRouter из handlers.messages (словарь + префиксное
+дерево текстовых команд). Замеряется только выбор обработчика, без вызова,
+отдельно для нажатий кнопок, обычного текста и текстовых команд (прежняя
+схема их не различала и отправляла в AI).
+
+Запуск:
+    python -m benchmarks.routing --messages 200000
+"""
+
+import os
+import sys
+import argparse
+import timeit
+
+os.environ.setdefault('TELEGRAM_TOKEN', '1:bench')
+os.environ.setdefault('GEMINI_API_KEY', 'bench')
+os.environ.setdefault('DATABASE_URL', 'postgresql://bench')
+
+from handlers.messages import BUTTON_ROUTER
+from utils.keyboards import (
+    MAIN_MENU, BTN_ASK_AI, BTN_NOTE, BTN_TASKS, BTN_ART_IDEA, BTN_TRENDS,
+    BTN_CONTENT_PLAN, BTN_NOTIFICATIONS, BTN_STATS, BTN_HELP,
+)
+
+LABELS = [label for row in MAIN_MENU for label in row]
+
+FREE_TEXT = [
+    "Как улучшить топологию модели персонажа?",
+    "Посоветуй референсы для хард-сёрфейса",
+    "Что лучше для ретопологии: Blender или ZBrush?",
+    "Заметил странный артефакт на рендере, что делать?",
+]
+
+TEXT_COMMANDS = [
+    "заметка: купить новые кисти",
+    "Задача: дорендерить сцену к пятнице",
+]
+
+GROUPS = {
+    'кнопки': LABELS,
+    'текст': FREE_TEXT,
+    'команды': TEXT_COMMANDS,
+}
+
+def _chain(text: str):
+    """Прежняя схема: сравнение с каждой подписью по очереди"""
+    if text == BTN_ASK_AI:
+        return 1
+    elif text == BTN_NOTE:
+        return 2
+    elif text == BTN_TASKS:
+        return 3
+    elif text == BTN_ART_IDEA:
+        return 4
+    elif text == BTN_TRENDS:
+        return 5
+    elif text == BTN_CONTENT_PLAN:
+        return 6
+    elif text == BTN_NOTIFICATIONS:
+        return 7
+    elif text == BTN_STATS:
+        return 8
+    elif text == BTN_HELP:
+        return 9
+    return None
+
+def run(samples: list, count: int, repeat: int = 5) -> dict:
+    messages = [samples[i % len(samples)] for i in range(count)]
+    resolve = BUTTON_ROUTER.resolve
+
+    def chain():
+        for text in messages:
+            _chain(text)
+
+    def router():
+        for text in messages:
+            resolve(text)
+
+    return {
+        'if/elif': min(timeit.repeat(chain, number=1, repeat=repeat)) / count,
+        'ButtonRouter': min(timeit.repeat(router, number=1, repeat=repeat)) / count,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Стоимость маршрутизации текстовых сообщений")
+    parser.add_argument('--messages', type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    print(f"{'сообщения':<10} {'схема':<14} {'нс/сообщение':>13}")
+    for group, samples in GROUPS.items():
+        for name, per_message in run(samples, args.messages).items():
+            print(f"{group:<10} {name:<14} {per_message * 1e9:>13.0f}")
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,11 +9,9 @@ from aiohttp import web
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
 
-# Логирование
-logging.basicConfig(
-    format='%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
-    level=logging.INFO
-)
+# Логирование (через очередь и отдельный поток записи)
+from utils.logger import setup_logging
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Переменные окружения
@@ -30,10 +28,23 @@ if not DATABASE_URL:
     raise ValueError("DATABASE_URL не установлен!")
 
 # Импорты
-from database.db import init_db
+from database.db import init_db, close_db
+from utils.http import close_http_session
+from services.schedulers import setup_scheduler
+from services.slots import load_reservations
+from services.media_store import clear_partial_downloads
+from services.response_cache import start_cache_listener, stop_cache_listener
+# Индекс уведомлений загружается по подключению слушателя кэша (хук при импорте)
+import services.notification_index
+from integrations.telegram_channel import set_channel_bot, start_channel_sender, stop_channel_sender
+from services.tokens import token_manager
+from services.image_pipeline import shutdown_image_pool
+from utils.metrics import instrument_handlers, render as render_metrics
+from utils.tracing import trace_handlers
+from utils.loop_monitor import start_loop_monitor, stop_loop_monitor
 from handlers.basic import start, help_command
-from handlers.notes import add_note, show_notes, delete_note
-from handlers.tasks import add_task, show_tasks, complete_task, delete_task
+from handlers.notes import add_note, show_notes, delete_note, find_notes
+from handlers.tasks import add_task, show_tasks, complete_task, delete_task, find_tasks
 from handlers.ai import ask_ai
 from handlers.stats import show_stats
 from handlers.trends import show_trends, toggle_trends_notifications
@@ -42,20 +53,34 @@ from handlers.content_plan import (
     schedule_post,
     view_scheduled_posts,
     edit_scheduled_post,
-    delete_scheduled_post
+    delete_scheduled_post,
+    plan_week,
+    suggest_post_time
 )
 from handlers.notifications import notification_settings, toggle_notification
+from handlers.transfer import export_data, import_data
+from handlers.publish import publish_now
+from handlers.media import save_media, attach_media, show_media
+from handlers.admin import show_traces
 from handlers.messages import handle_message
 
 # Health check
 async def health_check(request):
     return web.Response(text="OK", status=200)
 
+async def metrics_endpoint(request):
+    """Метрики в формате Prometheus"""
+    return web.Response(
+        body=render_metrics().encode('utf-8'),
+        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    )
+
 async def run_webserver():
     """Веб-сервер для Render"""
     app = web.Application()
     app.router.add_get('/', health_check)
     app.router.add_get('/health', health_check)
+    app.router.add_get('/metrics', metrics_endpoint)
     
     runner = web.AppRunner(app)
     await runner.setup()
@@ -69,53 +94,100 @@ async def error_handler(update, context):
 async def on_startup(app: Application):
     """При запуске бота"""
     logger.info("🔧 Инициализация...")
+    start_loop_monitor()
+    
+    # Недокачанные .part-файлы остаются только после аварийной остановки
+    clear_partial_downloads()
+    
     try:
         await init_db()
         logger.info("✅ БД подключена!")
+        await load_reservations()
+        # Индекс уведомлений загружается, когда слушатель подключится к LISTEN
+        start_cache_listener()
     except Exception as e:
         logger.error(f"❌ Ошибка БД: {e}")
-
-def main():
-    """Главная функция"""
-    
-    # Создаём event loop
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
     
-    # Запускаем веб-сервер
-    loop.run_until_complete(run_webserver())
+    # Публикации в канал идут через бот приложения и общую очередь
+    set_channel_bot(app.bot)
+    start_channel_sender()
     
-    # Создаём бота
-    app = (
-        Application.builder()
-        .token(TELEGRAM_TOKEN)
-        .post_init(on_startup)
-        .build()
-    )
+    # Токены платформ обновляются заранее, в фоне
+    token_manager.start()
     
-    # Команды
+    await setup_scheduler(app)
+
+async def on_shutdown(app: Application):
+    """При остановке бота"""
+    await stop_channel_sender()
+    await token_manager.stop()
+    shutdown_image_pool()
+    await close_http_session()
+    await stop_cache_listener()
+    await close_db()
+    await stop_loop_monitor()
+
+def register_handlers(app: Application):
+    """Регистрация обработчиков команд и сообщений"""
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("help", help_command))
     app.add_handler(CommandHandler("note", add_note))
     app.add_handler(CommandHandler("notes", show_notes))
     app.add_handler(CommandHandler("delnote", delete_note))
+    app.add_handler(CommandHandler("findnote", find_notes))
     app.add_handler(CommandHandler("task", add_task))
     app.add_handler(CommandHandler("tasks", show_tasks))
     app.add_handler(CommandHandler("complete", complete_task))
     app.add_handler(CommandHandler("deltask", delete_task))
+    app.add_handler(CommandHandler("findtask", find_tasks))
     app.add_handler(CommandHandler("ask", ask_ai))
     app.add_handler(CommandHandler("stats", show_stats))
     app.add_handler(CommandHandler("trends", show_trends))
     app.add_handler(CommandHandler("trendsnotify", toggle_trends_notifications))
     app.add_handler(CommandHandler("contentplan", create_content_plan))
+    app.add_handler(CommandHandler("weekplan", plan_week))
     app.add_handler(CommandHandler("schedule", schedule_post))
     app.add_handler(CommandHandler("scheduled", view_scheduled_posts))
+    app.add_handler(CommandHandler("nextslot", suggest_post_time))
     app.add_handler(CommandHandler("editpost", edit_scheduled_post))
     app.add_handler(CommandHandler("delpost", delete_scheduled_post))
+    app.add_handler(CommandHandler("publish", publish_now))
+    app.add_handler(CommandHandler("attach", attach_media))
+    app.add_handler(CommandHandler("media", show_media))
     app.add_handler(CommandHandler("notifications", notification_settings))
     app.add_handler(CommandHandler("togglenotif", toggle_notification))
+    app.add_handler(CommandHandler("export", export_data))
+    app.add_handler(CommandHandler("import", import_data))
+    app.add_handler(CommandHandler("traces", show_traces))
+    app.add_handler(MessageHandler(filters.Document.ALL & filters.CaptionRegex(r'^/import\b'), import_data))
+    app.add_handler(MessageHandler(filters.PHOTO | filters.VIDEO | filters.Document.IMAGE | filters.Document.VIDEO, save_media))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     app.add_error_handler(error_handler)
+
+def main():
+    """Главная функция"""
+    
+    # Создаём event loop
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    
+    # Запускаем веб-сервер
+    loop.run_until_complete(run_webserver())
+    
+    # Создаём бота
+    app = (
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
+    
+    register_handlers(app)
+    
+    # Трасса на каждое обновление (/traces) и замер времени обработчиков (/metrics)
+    trace_handlers(app)
+    instrument_handlers(app)
     
     # Запуск
     logger.info("🤖 Запуск бота...")
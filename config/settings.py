@@ -46,6 +46,7 @@ LINKEDIN_ACCESS_TOKEN = os.getenv('LINKEDIN_ACCESS_TOKEN', '')
 
 # Pinterest
 PINTEREST_ACCESS_TOKEN = os.getenv('PINTEREST_ACCESS_TOKEN', '')
+PINTEREST_BOARD_ID = os.getenv('PINTEREST_BOARD_ID', '')
 
 # Instagram/Threads
 INSTAGRAM_USERNAME = os.getenv('INSTAGRAM_USERNAME', '')
@@ -55,6 +56,7 @@ INSTAGRAM_PASSWORD = os.getenv('INSTAGRAM_PASSWORD', '')
 TIKTOK_CLIENT_KEY = os.getenv('TIKTOK_CLIENT_KEY', '')
 TIKTOK_CLIENT_SECRET = os.getenv('TIKTOK_CLIENT_SECRET', '')
 TIKTOK_ACCESS_TOKEN = os.getenv('TIKTOK_ACCESS_TOKEN', '')
+TIKTOK_USERNAME = os.getenv('TIKTOK_USERNAME', '')
 
 # ========================================
 # НАСТРОЙКИ ПАРСИНГА
@@ -66,6 +68,17 @@ CHROME_DRIVER_PATH = os.getenv('CHROME_DRIVER_PATH', '/usr/bin/chromedriver')
 # User-Agent для парсинга
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 
+# RSS-ленты вакансий (через запятую)
+JOBS_FEED_URLS = [
+    url.strip() for url in os.getenv(
+        'JOBS_FEED_URLS',
+        'https://weworkremotely.com/categories/remote-design-jobs.rss'
+    ).split(',') if url.strip()
+]
+
+# Каталог с локальными лентами (jobs_*.json, assets_*.jsonl) для тестов
+FEED_FIXTURES_DIR = os.getenv('FEED_FIXTURES_DIR', '')
+
 # ========================================
 # НАСТРОЙКИ УВЕДОМЛЕНИЙ
 # ========================================
@@ -82,6 +95,86 @@ NOTIFICATION_TIMES = {
 # Интервал напоминаний "пей воду" (в часах)
 REMINDER_INTERVAL_HOURS = 2
 
+# ========================================
+# НАСТРОЙКИ АВТОПОСТИНГА
+# ========================================
+
+# Сколько постов одной платформы можно запланировать на одну минуту
+SLOT_CAPACITY_PER_MINUTE = int(os.getenv('SLOT_CAPACITY_PER_MINUTE', 1))
+
+# Лимит сообщений в один канал/группу в минуту (ограничение Telegram — 20)
+CHANNEL_MESSAGES_PER_MINUTE = int(os.getenv('CHANNEL_MESSAGES_PER_MINUTE', 20))
+
+# Лимит рассылки личных сообщений в секунду на бота (ограничение Telegram — 30)
+BROADCAST_MESSAGES_PER_SECOND = int(os.getenv('BROADCAST_MESSAGES_PER_SECOND', 30))
+
+# ========================================
+# МЕДИА
+# ========================================
+
+# Каталог для медиафайлов и их версий под платформы
+MEDIA_DIR = os.getenv('MEDIA_DIR', 'media')
+
+# Максимальный размер хранилища загруженных медиа (МБ)
+MEDIA_STORE_MAX_MB = int(os.getenv('MEDIA_STORE_MAX_MB', 2048))
+
+# Максимальный размер кэша версий изображений (МБ)
+MEDIA_RENDITIONS_MAX_MB = int(os.getenv('MEDIA_RENDITIONS_MAX_MB', 512))
+
+# Процессов для обработки изображений
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+# ========================================
+# КЭШ ЧТЕНИЙ
+# ========================================
+
+# Сколько результатов (/notes, /tasks, /scheduled, ...) держать в памяти
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 2000))
+
+# Время жизни результата (сек) — на случай изменений в обход обработчиков
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+
+# ========================================
+# МОНИТОРИНГ
+# ========================================
+
+# Telegram ID администраторов через запятую (служебные команды)
+ADMIN_IDS = {int(x) for x in os.getenv('ADMIN_IDS', '').split(',') if x.strip()}
+
+# Обновления дольше этого порога (мс) сохраняются как медленные трассы
+TRACE_SLOW_MS = int(os.getenv('TRACE_SLOW_MS', 2000))
+
+# Сколько последних медленных трасс хранить в памяти
+TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', 200))
+
+# JSONL-файл для медленных трасс (по умолчанию — в лог)
+TRACE_LOG_FILE = os.getenv('TRACE_LOG_FILE', '')
+
+# Интервал замера задержки event loop (мс)
+LOOP_LAG_INTERVAL_MS = int(os.getenv('LOOP_LAG_INTERVAL_MS', 100))
+
+# Блокировка event loop дольше порога (мс) записывается в лог со стеком
+LOOP_BLOCK_THRESHOLD_MS = int(os.getenv('LOOP_BLOCK_THRESHOLD_MS', 250))
+
+# ========================================
+# ЛОГИРОВАНИЕ
+# ========================================
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+# Формат вывода: json или text
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+
+# Не больше N записей ниже WARNING в минуту с одного места вызова
+# для всех модулей (0 — без ограничения)
+LOG_SAMPLE_PER_MINUTE = int(os.getenv('LOG_SAMPLE_PER_MINUTE', 0))
+
+# Лимиты для модулей с частыми сообщениями: "services.parsers=20,database=10"
+LOG_SAMPLING = {
+    name.strip(): int(limit)
+    for name, _, limit in (item.partition('=') for item in os.getenv('LOG_SAMPLING', '').split(',') if '=' in item)
+}
+
 # ========================================
 # КОНСТАНТЫ
 # ========================================
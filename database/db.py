@@ -3,8 +3,11 @@
 """
 
 import os
+import time
 import asyncpg
 import logging
+from utils.metrics import DB_QUERY_SECONDS, DB_QUERY_ERRORS, DB_ACQUIRE_SECONDS, DB_POOL_SIZE, on_collect
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +16,102 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 # Глобальный пул соединений
 db_pool = None
 
+# ========================================
+# ЗАМЕР ЗАПРОСОВ
+# ========================================
+
+def _timed(operation: str):
+    series = DB_QUERY_SECONDS.labels(operation)
+    errors = DB_QUERY_ERRORS.labels(operation)
+
+    def decorator(method):
+        async def wrapper(self, *args, **kwargs):
+            if self._resetting:
+                return await method(self, *args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                with span('db', operation):
+                    return await method(self, *args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                series.observe(time.perf_counter() - start)
+
+        wrapper.__name__ = method.__name__
+        return wrapper
+
+    return decorator
+
+class TimedConnection(asyncpg.Connection):
+    """Соединение, замеряющее время запросов"""
+
+    _resetting = False
+
+    execute = _timed('execute')(asyncpg.Connection.execute)
+    executemany = _timed('executemany')(asyncpg.Connection.executemany)
+    fetch = _timed('fetch')(asyncpg.Connection.fetch)
+    fetchrow = _timed('fetchrow')(asyncpg.Connection.fetchrow)
+    fetchval = _timed('fetchval')(asyncpg.Connection.fetchval)
+
+    async def reset(self, *, timeout=None):
+        # Сброс при возврате в пул — служебный запрос, в метрики и трассы не попадает
+        self._resetting = True
+        try:
+            await super().reset(timeout=timeout)
+        finally:
+            self._resetting = False
+
+class _TimedAcquire:
+    """Получение соединения из пула с замером ожидания"""
+
+    __slots__ = ('_context',)
+
+    def __init__(self, context):
+        self._context = context
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        with span('db_pool', 'acquire'):
+            connection = await self._context.__aenter__()
+        DB_ACQUIRE_SECONDS.observe(time.perf_counter() - start)
+        return connection
+
+    async def __aexit__(self, *exc):
+        return await self._context.__aexit__(*exc)
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def _acquire(self):
+        start = time.perf_counter()
+        with span('db_pool', 'acquire'):
+            connection = await self._context
+        DB_ACQUIRE_SECONDS.observe(time.perf_counter() - start)
+        return connection
+
+class TimedPool:
+    """Пул соединений с замером ожидания acquire (остальное — как у asyncpg.Pool)"""
+
+    def __init__(self, pool: asyncpg.Pool):
+        self._pool = pool
+
+    def acquire(self, *, timeout: float = None) -> _TimedAcquire:
+        return _TimedAcquire(self._pool.acquire(timeout=timeout))
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+@on_collect
+def _collect_pool_metrics():
+    if db_pool is None:
+        return
+    size = db_pool.get_size()
+    idle = db_pool.get_idle_size()
+    DB_POOL_SIZE.labels('idle').set(idle)
+    DB_POOL_SIZE.labels('busy').set(size - idle)
+
 async def init_db():
     """Инициализация базы данных"""
     global db_pool
@@ -25,13 +124,14 @@ async def init_db():
         logger.info(f"🔄 Подключение к БД...")
         
         # Создание пула соединений
-        db_pool = await asyncpg.create_pool(
+        db_pool = TimedPool(await asyncpg.create_pool(
             DATABASE_URL,
             min_size=1,
             max_size=5,
             command_timeout=60,
-            timeout=30
-        )
+            timeout=30,
+            connection_class=TimedConnection
+        ))
         
         logger.info("✅ Пул соединений создан!")
         
@@ -163,10 +263,93 @@ async def _create_tables(conn):
         )
     ''')
     
+    # Лента вакансий и ассетов (дедупликация по хэшу содержимого)
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS feed_items (
+            id BIGSERIAL PRIMARY KEY,
+            feed_type TEXT NOT NULL,
+            source TEXT NOT NULL,
+            content_hash TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            url TEXT,
+            data JSONB,
+            ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Последняя доставленная запись ленты для пользователя
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS feed_deliveries (
+            user_id BIGINT NOT NULL,
+            feed_type TEXT NOT NULL,
+            last_item_id BIGINT NOT NULL DEFAULT 0,
+            delivered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, feed_type)
+        )
+    ''')
+    
+    # Журнал лимитов API платформ (общий для всех процессов бота)
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS rate_limit_ledger (
+            platform TEXT NOT NULL,
+            account TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            quota INTEGER,
+            remaining INTEGER,
+            reset_at TIMESTAMPTZ,
+            window_seconds DOUBLE PRECISION,
+            sent_at TIMESTAMPTZ[],
+            updated_at TIMESTAMPTZ DEFAULT now(),
+            PRIMARY KEY (platform, account, endpoint)
+        )
+    ''')
+    # Времена списаний в скользящем окне (для лимитов с window_seconds)
+    await conn.execute('ALTER TABLE rate_limit_ledger ADD COLUMN IF NOT EXISTS sent_at TIMESTAMPTZ[]')
+    
+    # Медиафайлы пользователей (файл на диске общий для одинакового содержимого)
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS media_files (
+            id BIGSERIAL PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            sha256 TEXT NOT NULL,
+            file_unique_id TEXT,
+            kind TEXT NOT NULL,
+            mime_type TEXT,
+            file_name TEXT,
+            size BIGINT NOT NULL,
+            path TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(user_id, sha256)
+        )
+    ''')
+    await conn.execute('CREATE INDEX IF NOT EXISTS idx_media_files_unique_id ON media_files(file_unique_id)')
+    await conn.execute('CREATE INDEX IF NOT EXISTS idx_media_files_sha ON media_files(sha256)')
+    await conn.execute('''
+        ALTER TABLE scheduled_posts
+        ADD COLUMN IF NOT EXISTS media_id BIGINT REFERENCES media_files(id) ON DELETE SET NULL
+    ''')
+    
+    # Несколько аккаунтов одной платформы у пользователя
+    await conn.execute("ALTER TABLE platform_tokens ADD COLUMN IF NOT EXISTS account TEXT NOT NULL DEFAULT 'default'")
+    await conn.execute('ALTER TABLE platform_tokens DROP CONSTRAINT IF EXISTS platform_tokens_user_id_platform_key')
+    await conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_platform_tokens_account ON platform_tokens(user_id, platform, account)')
+    
     # Индексы
     await conn.execute('CREATE INDEX IF NOT EXISTS idx_notes_user ON notes(user_id)')
     await conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_user ON tasks(user_id)')
     await conn.execute('CREATE INDEX IF NOT EXISTS idx_scheduled_user ON scheduled_posts(user_id)')
+    await conn.execute('CREATE INDEX IF NOT EXISTS idx_feed_items_type ON feed_items(feed_type, id)')
+    
+    # Полнотекстовый поиск по заметкам и задачам (русский + английский)
+    for table in ('notes', 'tasks'):
+        await conn.execute(f'''
+            ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                to_tsvector('russian', text) || to_tsvector('english', text)
+            ) STORED
+        ''')
+        await conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_search ON {table} USING GIN (search_vector)')
 
 async def update_user_stats(user_id: int, username: str = None, first_name: str = None):
     """Обновление статистики пользователя"""
@@ -187,4 +370,4 @@ async def update_user_stats(user_id: int, username: str = None, first_name: str
                     first_name = COALESCE($3, user_stats.first_name)
             ''', user_id, username, first_name)
     except Exception as e:
-        logger.error(f"Ошибка обновления статистики: {e}")
+        logger.error("Ошибка обновления статистики: %s", e)
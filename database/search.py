@@ -0,0 +1,50 @@
+"""
+Полнотекстовый поиск по заметкам и задачам
+"""
+
+from .db import get_db_pool
+
+SEARCH_PAGE_SIZE = 10
+
+# Колонки, которые возвращаются для каждой таблицы
+SEARCH_COLUMNS = {
+    'notes': 'id, text, created_at',
+    'tasks': 'id, text, completed, created_at',
+}
+
+async def full_text_search(table: str, user_id: int, query: str, page: int = 1, page_size: int = SEARCH_PAGE_SIZE) -> tuple:
+    """
+    Поиск по tsvector-колонке с ранжированием
+
+    Args:
+        table: 'notes' или 'tasks'
+        user_id: ID пользователя
+        query: Поисковый запрос (синтаксис websearch: "фраза", -слово, OR)
+        page: Номер страницы (с 1)
+
+    Returns:
+        tuple: (список записей, общее количество найденных)
+    """
+    if table not in SEARCH_COLUMNS:
+        raise ValueError(f"Поиск по таблице {table} не поддерживается")
+
+    db_pool = get_db_pool()
+    if not db_pool:
+        raise RuntimeError("БД не инициализирована")
+
+    async with db_pool.acquire() as conn:
+        rows = await conn.fetch(f'''
+            WITH q AS (
+                SELECT websearch_to_tsquery('russian', $2) || websearch_to_tsquery('english', $2) AS query
+            )
+            SELECT {SEARCH_COLUMNS[table]},
+                   ts_rank(search_vector, q.query) AS rank,
+                   COUNT(*) OVER() AS total
+            FROM {table}, q
+            WHERE user_id = $1 AND search_vector @@ q.query
+            ORDER BY rank DESC, created_at DESC
+            LIMIT $3 OFFSET $4
+        ''', user_id, query, page_size, (page - 1) * page_size)
+
+    total = rows[0]['total'] if rows else 0
+    return rows, total
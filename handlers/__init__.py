@@ -3,13 +3,17 @@
 """
 
 from .basic import start, help_command
-from .notes import add_note, show_notes, delete_note
-from .tasks import add_task, show_tasks, complete_task, delete_task
+from .notes import add_note, show_notes, delete_note, find_notes
+from .tasks import add_task, show_tasks, complete_task, delete_task, find_tasks
 from .ai import ask_ai
 from .stats import show_stats
 from .trends import show_trends, toggle_trends_notifications
-from .content_plan import create_content_plan, schedule_post, view_scheduled_posts, edit_scheduled_post, delete_scheduled_post
+from .content_plan import create_content_plan, schedule_post, view_scheduled_posts, edit_scheduled_post, delete_scheduled_post, plan_week, suggest_post_time
 from .notifications import notification_settings, toggle_notification
+from .transfer import export_data, import_data
+from .publish import publish_now
+from .media import save_media, attach_media, show_media
+from .admin import show_traces
 from .messages import handle_message
 
 __all__ = [
@@ -18,10 +22,12 @@ __all__ = [
     'add_note',
     'show_notes',
     'delete_note',
+    'find_notes',
     'add_task',
     'show_tasks',
     'complete_task',
     'delete_task',
+    'find_tasks',
     'ask_ai',
     'show_stats',
     'show_trends',
@@ -31,7 +37,16 @@ __all__ = [
     'view_scheduled_posts',
     'edit_scheduled_post',
     'delete_scheduled_post',
+    'plan_week',
+    'suggest_post_time',
     'notification_settings',
     'toggle_notification',
+    'export_data',
+    'import_data',
+    'publish_now',
+    'save_media',
+    'attach_media',
+    'show_media',
+    'show_traces',
     'handle_message',
 ]
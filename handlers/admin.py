@@ -0,0 +1,54 @@
+"""
+Служебные команды администраторов
+"""
+
+import logging
+from datetime import datetime
+from telegram import Update
+from telegram.ext import ContextTypes
+from config.settings import ADMIN_IDS, TRACE_SLOW_MS
+from utils.tracing import get_slow_traces
+from utils.message_builder import MessageBuilder
+
+logger = logging.getLogger(__name__)
+
+def is_admin(user_id: int) -> bool:
+    """Пользователь в списке ADMIN_IDS"""
+    return user_id in ADMIN_IDS
+
+async def show_traces(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Самые медленные недавние обновления по этапам: /traces [количество]"""
+    user = update.effective_user
+    if not is_admin(user.id):
+        await update.message.reply_text("❌ Команда доступна только администраторам")
+        return
+
+    try:
+        limit = min(int(context.args[0]), 20) if context.args else 5
+    except ValueError:
+        limit = 5
+
+    traces = get_slow_traces(limit)
+    if not traces:
+        await update.message.reply_text(f"🐢 Медленных обновлений (дольше {TRACE_SLOW_MS} мс) пока не было")
+        return
+
+    message = MessageBuilder(markdown=False).add(f"🐢 Самые медленные обновления ({len(traces)}):\n\n")
+    for i, trace in enumerate(traces, 1):
+        time_str = datetime.fromtimestamp(trace.started_at).strftime('%d.%m %H:%M:%S')
+        status = f" ❌ {trace.error}" if trace.error else ''
+        lines = [f"{i}. {trace.name} — {trace.duration:.2f} сек ({time_str}, user {trace.user_id}){status}\n"]
+
+        accounted = 0.0
+        for stage, (total, count) in trace.breakdown().items():
+            lines.append(f"   • {stage}: {total:.2f} сек ×{count}\n")
+            accounted += total
+
+        # Время вне отмеченных этапов: ответы Telegram, код обработчика
+        other = trace.duration - accounted
+        if other > 0.01:
+            lines.append(f"   • прочее: {other:.2f} сек\n")
+        lines.append("\n")
+        message.add(''.join(lines))
+
+    await message.reply(update.message)
@@ -7,6 +7,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from database.db import update_user_stats
 from services.gemini_ai import ask_gemini, generate_art_idea
+from utils.message_builder import MessageBuilder
 
 logger = logging.getLogger(__name__)
 
@@ -29,12 +30,8 @@ async def ask_ai(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         response = await ask_gemini(question)
         
-        # Разбиваем длинные ответы
-        if len(response) > 4096:
-            for i in range(0, len(response), 4096):
-                await update.message.reply_text(response[i:i+4096])
-        else:
-            await update.message.reply_text(f"🤖 {response}")
+        # Длинные ответы разбиваются по строкам
+        await MessageBuilder(markdown=False).add(f"🤖 {response}").reply(update.message)
             
     except Exception as e:
         logger.error(f"Ошибка Gemini API: {e}")
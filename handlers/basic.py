@@ -10,14 +10,8 @@ from utils.keyboards import get_main_keyboard
 
 logger = logging.getLogger(__name__)
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Команда /start"""
-    user = update.effective_user
-    await update_user_stats(user.id, user.username, user.first_name)
-    
-    welcome_message = f"""
-🎨 **Привет, {user.first_name}!**
-
+# Неизменная часть приветствия (собирается один раз, к ней добавляется только имя)
+WELCOME_BODY = """
 Я твой AI-помощник для 3D-артистов и креаторов нового поколения!
 
 ✨ **Новые возможности 2025:**
@@ -36,30 +30,23 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 Жми кнопки ниже или используй команды! 🚀
 Справка: /help
     """
-    
-    await update.message.reply_text(
-        welcome_message,
-        reply_markup=get_main_keyboard(),
-        parse_mode='Markdown'
-    )
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Команда /help"""
-    user = update.effective_user
-    await update_user_stats(user.id, user.username, user.first_name)
-    
-    help_text = """
+HELP_TEXT = """
 🔧 **Все команды бота:**
 
 **📝 Заметки и задачи:**
 `/note <текст>` — Сохранить заметку
 `/notes` — Показать все заметки
 `/delnote <номер>` — Удалить заметку
+`/findnote <запрос>` — Найти заметки
 
 `/task <описание>` — Добавить задачу
 `/tasks` — Показать все задачи
 `/complete <номер>` — Отметить выполненной
 `/deltask <номер>` — Удалить задачу
+`/findtask <запрос>` — Найти задачи
+
+`заметка: <текст>`, `задача: <описание>` — то же без команды
 
 **🤖 AI и генерация:**
 `/ask <вопрос>` — Спросить AI
@@ -71,10 +58,15 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 **📅 Контент-план:**
 `/contentplan` — Сгенерировать идею поста
+`/weekplan <платформы>` — План и расписание на неделю
 `/schedule` — Запланировать публикацию
 `/scheduled` — Посмотреть календарь
+`/nextslot <платформа>` — Ближайшее свободное время
 `/editpost <id>` — Редактировать пост
 `/delpost <id>` — Удалить запланированный пост
+`/publish [media:<id> |] <текст>` — Опубликовать на все платформы
+`/attach <id поста> <id файла>` — Прикрепить фото/видео к посту
+`/media` — Сохранённые файлы (пришли фото или видео, чтобы сохранить)
 
 **⏰ Уведомления:**
 `/notifications` — Настройки уведомлений
@@ -83,9 +75,31 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 **📊 Статистика:**
 `/stats` — Моя статистика
 
+**📦 Данные:**
+`/export <notes|tasks|posts> [csv|jsonl]` — Выгрузить в файл
+`/import <notes|tasks|posts>` — Загрузить (подпись к файлу)
+
 💡 **Или просто используй кнопки меню!**
 
 💾 Все данные в PostgreSQL — ничего не потеряется!
     """
+
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /start"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+    
+    welcome_message = f"\n🎨 **Привет, {user.first_name}!**\n" + WELCOME_BODY
+    
+    await update.message.reply_text(
+        welcome_message,
+        reply_markup=get_main_keyboard(),
+        parse_mode='Markdown'
+    )
+
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /help"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
     
-    await update.message.reply_text(help_text, parse_mode='Markdown')
+    await update.message.reply_text(HELP_TEXT, parse_mode='Markdown')
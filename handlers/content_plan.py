@@ -6,13 +6,20 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 from database.db import get_db_pool, update_user_stats
-from services.post_generator import generate_post_idea, generate_full_post
-from services.translator import translate_to_russian
-from config.platforms import SUPPORTED_PLATFORMS, get_platform_config
+from services.post_generator import generate_post_idea, generate_full_post, generate_week_posts
+from services.translator import translate_to_russian, translate_to_english, translate_batch
+from services.slots import reserve_slot, allocate_slot, suggest_slot, release_slot
+from config.platforms import SUPPORTED_PLATFORMS, get_platform_config, get_best_times
+from utils.helpers import is_weekend
+from utils.message_builder import MessageBuilder, escape_markdown
+from services.response_cache import cached, invalidate, POSTS
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Максимум постов в одном недельном плане
+WEEKPLAN_MAX_POSTS = 21
+
 async def create_content_plan(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Создать идею для поста: /contentplan [платформа]"""
     user = update.effective_user
@@ -43,17 +50,20 @@ async def create_content_plan(update: Update, context: ContextTypes.DEFAULT_TYPE
         
         platform_info = get_platform_config(platform) if platform else {}
         
-        message = f"💡 **Идея для поста**\n\n"
+        message = MessageBuilder().add("💡 **Идея для поста**\n\n")
         
         if platform:
-            message += f"📱 **Платформа:** {platform_info.get('emoji', '📱')} {platform}\n\n"
+            message.add(f"📱 **Платформа:** {platform_info.get('emoji', '📱')} {platform}\n\n")
         
-        message += f"🇬🇧 **English version:**\n{post_en}\n\n"
-        message += f"🇷🇺 **Русская версия:**\n{post_ru}\n\n"
-        message += f"💡 **Запланировать:** `/schedule {platform or 'Instagram'} <дата> <время>`\n"
-        message += f"Пример: `/schedule Instagram 25.12.2024 15:00`"
+        # Тексты от AI экранируются: случайные * и _ ломают Markdown
+        message.add(f"🇬🇧 **English version:**\n{escape_markdown(post_en)}\n\n")
+        message.add(f"🇷🇺 **Русская версия:**\n{escape_markdown(post_ru)}\n\n")
+        message.add(
+            f"💡 **Запланировать:** `/schedule {platform or 'Instagram'} <дата> <время>`\n"
+            f"Пример: `/schedule Instagram 25.12.2024 15:00`"
+        )
         
-        await update.message.reply_text(message, parse_mode='Markdown')
+        await message.reply(update.message)
         
     except Exception as e:
         logger.error(f"Ошибка генерации контент-плана: {e}")
@@ -93,21 +103,38 @@ async def schedule_post(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("❌ Дата должна быть в будущем!")
             return
         
+        # Бронируем слот (при перегрузке минуты пост сдвигается)
+        requested_datetime = scheduled_datetime
+        scheduled_datetime = reserve_slot(platform, requested_datetime)
+        if not scheduled_datetime:
+            await update.message.reply_text("❌ Нет свободного времени для публикации. Выберите другую дату.")
+            return
+        
         # Переводим на английский
-        content_en = await translate_to_russian(content_ru, to_russian=False)
+        content_en = await translate_to_english(content_ru)
         
         db_pool = get_db_pool()
-        async with db_pool.acquire() as conn:
-            post_id = await conn.fetchval('''
-                INSERT INTO scheduled_posts (user_id, platform, content_ru, content_en, scheduled_time)
-                VALUES ($1, $2, $3, $4, $5)
-                RETURNING id
-            ''', user.id, platform, content_ru, content_en, scheduled_datetime)
+        try:
+            async with db_pool.acquire() as conn:
+                post_id = await conn.fetchval('''
+                    INSERT INTO scheduled_posts (user_id, platform, content_ru, content_en, scheduled_time)
+                    VALUES ($1, $2, $3, $4, $5)
+                    RETURNING id
+                ''', user.id, platform, content_ru, content_en, scheduled_datetime)
+        except Exception:
+            release_slot(platform, scheduled_datetime)
+            raise
+        await invalidate(user.id, POSTS)
+        
+        shifted_note = ""
+        if scheduled_datetime != requested_datetime.replace(second=0, microsecond=0):
+            shifted_note = f"⏱ Время {requested_datetime.strftime('%H:%M')} занято — пост сдвинут\n"
         
         await update.message.reply_text(
             f"✅ **Пост #{post_id} запланирован!**\n\n"
             f"📱 Платформа: {platform}\n"
-            f"📅 Дата: {scheduled_datetime.strftime('%d.%m.%Y %H:%M')}\n\n"
+            f"📅 Дата: {scheduled_datetime.strftime('%d.%m.%Y %H:%M')}\n"
+            f"{shifted_note}\n"
             f"📝 Текст:\n{content_ru}\n\n"
             f"Посмотреть все: /scheduled",
             parse_mode='Markdown'
@@ -134,13 +161,16 @@ async def view_scheduled_posts(update: Update, context: ContextTypes.DEFAULT_TYP
         return
     
     try:
-        async with db_pool.acquire() as conn:
-            posts = await conn.fetch('''
-                SELECT id, platform, content_ru, scheduled_time, status
-                FROM scheduled_posts
-                WHERE user_id = $1 AND status = 'pending'
-                ORDER BY scheduled_time ASC
-            ''', user.id)
+        async def load():
+            async with db_pool.acquire() as conn:
+                return await conn.fetch('''
+                    SELECT id, platform, content_ru, scheduled_time, status, media_id
+                    FROM scheduled_posts
+                    WHERE user_id = $1 AND status = 'pending'
+                    ORDER BY scheduled_time ASC
+                ''', user.id)
+        
+        posts = await cached(user.id, POSTS, load)
         
         if not posts:
             await update.message.reply_text(
@@ -151,21 +181,28 @@ async def view_scheduled_posts(update: Update, context: ContextTypes.DEFAULT_TYP
             )
             return
         
-        message = f"📅 **Ваши запланированные посты ({len(posts)}):**\n\n"
+        message = MessageBuilder().add(f"📅 **Ваши запланированные посты ({len(posts)}):**\n\n")
         
         for post in posts:
             content_preview = post['content_ru'][:60] + '...' if len(post['content_ru']) > 60 else post['content_ru']
             time_str = post['scheduled_time'].strftime("%d.%m.%Y %H:%M")
+            media = f"📎 Файл #{post['media_id']}\n" if post['media_id'] else ''
             
-            message += f"**#{post['id']}** {post['platform']}\n"
-            message += f"📅 {time_str}\n"
-            message += f"📝 {content_preview}\n\n"
+            message.add(
+                f"**#{post['id']}** {post['platform']}\n"
+                f"📅 {time_str}\n"
+                f"📝 {escape_markdown(content_preview)}\n"
+                f"{media}\n"
+            )
         
-        message += "💡 **Команды:**\n"
-        message += "`/editpost <id>` — редактировать\n"
-        message += "`/delpost <id>` — удалить"
+        message.add(
+            "💡 **Команды:**\n"
+            "`/editpost <id>` — редактировать\n"
+            "`/delpost <id>` — удалить"
+        )
         
-        await update.message.reply_text(message, parse_mode='Markdown')
+        # Длинный календарь режется между постами
+        await message.reply(update.message)
         
     except Exception as e:
         logger.error(f"Ошибка получения постов: {e}")
@@ -197,6 +234,7 @@ async def edit_scheduled_post(update: Update, context: ContextTypes.DEFAULT_TYPE
             ''', new_content, post_id, user.id)
         
         if result == "UPDATE 1":
+            await invalidate(user.id, POSTS)
             await update.message.reply_text(f"✅ Пост **#{post_id}** обновлён!", parse_mode='Markdown')
         else:
             await update.message.reply_text(f"❌ Пост **#{post_id}** не найден", parse_mode='Markdown')
@@ -224,12 +262,15 @@ async def delete_scheduled_post(update: Update, context: ContextTypes.DEFAULT_TY
         
         db_pool = get_db_pool()
         async with db_pool.acquire() as conn:
-            result = await conn.execute('''
+            deleted = await conn.fetchrow('''
                 DELETE FROM scheduled_posts
                 WHERE id = $1 AND user_id = $2 AND status = 'pending'
+                RETURNING platform, scheduled_time
             ''', post_id, user.id)
         
-        if result == "DELETE 1":
+        if deleted:
+            release_slot(deleted['platform'], deleted['scheduled_time'])
+            await invalidate(user.id, POSTS)
             await update.message.reply_text(f"✅ Пост **#{post_id}** удалён!", parse_mode='Markdown')
         else:
             await update.message.reply_text(f"❌ Пост **#{post_id}** не найден", parse_mode='Markdown')
@@ -239,3 +280,138 @@ async def delete_scheduled_post(update: Update, context: ContextTypes.DEFAULT_TY
     except Exception as e:
         logger.error(f"Ошибка удаления поста: {e}")
         await update.message.reply_text("❌ Ошибка удаления")
+
+async def plan_week(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Контент-план на неделю: /weekplan [кол-во] <платформа>, <платформа>, ..."""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+    
+    args = list(context.args)
+    per_platform = 7
+    if args and args[0].isdigit():
+        per_platform = max(1, min(int(args.pop(0)), 7))
+    
+    platforms = [p.strip() for p in ' '.join(args).split(',') if p.strip()]
+    
+    if not platforms:
+        await update.message.reply_text(
+            "❌ Использование:\n"
+            "`/weekplan [постов на платформу] <платформа>, <платформа>`\n\n"
+            "Пример: `/weekplan 3 Instagram, X (Twitter)`",
+            parse_mode='Markdown'
+        )
+        return
+    
+    unknown = [p for p in platforms if p not in SUPPORTED_PLATFORMS]
+    if unknown:
+        await update.message.reply_text(
+            f"❌ Неизвестные платформы: {', '.join(unknown)}\n\n"
+            f"Доступные платформы:\n" + "\n".join([f"• {p}" for p in SUPPORTED_PLATFORMS])
+        )
+        return
+    
+    per_platform = min(per_platform, WEEKPLAN_MAX_POSTS // len(platforms) or 1)
+    
+    db_pool = get_db_pool()
+    if not db_pool:
+        await update.message.reply_text("❌ База данных недоступна.")
+        return
+    
+    await update.message.reply_text(f"🧠 Генерирую план на неделю ({per_platform} × {len(platforms)})...")
+    
+    try:
+        # Один запрос к AI на все посты
+        posts = await generate_week_posts(platforms, per_platform)
+        
+        # Раскладываем посты по свободным слотам в лучшее время платформ
+        slots = {platform: _week_slots(platform, per_platform) for platform in platforms}
+        rows = []
+        for post in posts:
+            if slots[post['platform']]:
+                rows.append((post, slots[post['platform']].pop(0)))
+        
+        # Неиспользованные слоты освобождаем
+        for platform, unused in slots.items():
+            for slot in unused:
+                release_slot(platform, slot)
+        
+        if not rows:
+            await update.message.reply_text("❌ AI не вернул ни одного поста. Попробуйте ещё раз.")
+            return
+        
+        # Переводы выполняются параллельно
+        texts_ru = await translate_batch([post['post'] for post, _ in rows])
+        
+        # Все посты — одним executemany
+        try:
+            async with db_pool.acquire() as conn:
+                await conn.executemany('''
+                    INSERT INTO scheduled_posts (user_id, platform, content_ru, content_en, scheduled_time)
+                    VALUES ($1, $2, $3, $4, $5)
+                ''', [
+                    (user.id, post['platform'], text_ru, post['post'], slot)
+                    for (post, slot), text_ru in zip(rows, texts_ru)
+                ])
+        except Exception:
+            for post, slot in rows:
+                release_slot(post['platform'], slot)
+            raise
+        await invalidate(user.id, POSTS)
+        
+        message = MessageBuilder(markdown=False).add(f"✅ Запланировано постов: {len(rows)}\n\n")
+        for post, slot in sorted(rows, key=lambda r: r[1]):
+            idea = post['idea'][:60] + '...' if len(post['idea']) > 60 else post['idea']
+            message.add(f"📅 {slot.strftime('%d.%m %H:%M')} — {post['platform']}\n💡 {idea}\n\n")
+        
+        message.add("Посмотреть все: /scheduled")
+        
+        await message.reply(update.message)
+        
+    except Exception as e:
+        logger.error(f"Ошибка недельного плана: {e}")
+        await update.message.reply_text("❌ Ошибка генерации плана. Попробуйте позже.")
+
+def _week_slots(platform: str, count: int) -> list:
+    """Забронировать слоты на ближайшие 7 дней (не больше одного поста платформы в день)"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    days = [today + timedelta(days=day) for day in range(1, 8)]
+    
+    # Если дней больше, чем постов — распределяем посты равномерно
+    if len(days) > count:
+        step = len(days) / count
+        days = [days[int(i * step)] for i in range(count)]
+    
+    slots = []
+    for day in days:
+        slot = allocate_slot(platform, after=day, until=day + timedelta(days=1, seconds=-1))
+        if slot:
+            slots.append(slot)
+    
+    return slots
+
+async def suggest_post_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ближайшее свободное время для публикации: /nextslot <платформа>"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+    
+    platform = ' '.join(context.args) if context.args else None
+    
+    if platform not in SUPPORTED_PLATFORMS:
+        await update.message.reply_text(
+            "❌ Использование: `/nextslot <платформа>`\n\n"
+            "Доступные платформы:\n" + "\n".join([f"• {p}" for p in SUPPORTED_PLATFORMS]),
+            parse_mode='Markdown'
+        )
+        return
+    
+    slot = suggest_slot(platform)
+    if not slot:
+        await update.message.reply_text(f"❌ Нет свободных слотов для {platform} на ближайшие 2 недели")
+        return
+    
+    await update.message.reply_text(
+        f"⏰ **Ближайшее свободное время для {platform}:**\n"
+        f"📅 {slot.strftime('%d.%m.%Y %H:%M')}\n\n"
+        f"Запланировать:\n`/schedule {platform} {slot.strftime('%d.%m.%Y %H:%M')} <текст>`",
+        parse_mode='Markdown'
+    )
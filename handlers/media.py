@@ -0,0 +1,109 @@
+"""
+Обработчики медиафайлов: сохранение вложений и привязка к запланированным постам
+"""
+
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+from database.db import get_db_pool, update_user_stats
+from services.media_store import store_telegram_file, get_media, list_media
+from utils.message_builder import MessageBuilder
+from services.response_cache import invalidate, POSTS
+
+logger = logging.getLogger(__name__)
+
+async def save_media(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Сохранение присланного фото, видео или файла-изображения"""
+    user = update.effective_user
+    message = update.message
+    await update_user_stats(user.id, user.username, user.first_name)
+
+    if message.photo:
+        # Самый большой размер фото
+        attachment, kind, mime_type, file_name = message.photo[-1], 'photo', 'image/jpeg', None
+    elif message.video:
+        attachment, kind = message.video, 'video'
+        mime_type, file_name = message.video.mime_type, message.video.file_name
+    else:
+        attachment = message.document
+        kind = 'video' if (attachment.mime_type or '').startswith('video/') else 'photo'
+        mime_type, file_name = attachment.mime_type, attachment.file_name
+
+    try:
+        record = await store_telegram_file(context.bot, user.id, attachment, kind, mime_type, file_name)
+
+        await message.reply_text(
+            f"📎 Файл сохранён: **#{record['id']}** ({record['size'] // 1024} КБ)\n\n"
+            f"Прикрепить к посту: `/attach <id поста> {record['id']}`",
+            parse_mode='Markdown'
+        )
+
+    except Exception as e:
+        logger.error(f"Ошибка сохранения медиа: {e}")
+        await message.reply_text("❌ Не удалось сохранить файл")
+
+async def attach_media(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Прикрепить файл к запланированному посту: /attach <id поста> <id файла>"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+
+    if len(context.args) != 2:
+        await update.message.reply_text(
+            "❌ Использование:\n"
+            "`/attach <id поста> <id файла>`\n\n"
+            "ID файла бот пришлёт, когда вы отправите фото или видео",
+            parse_mode='Markdown'
+        )
+        return
+
+    try:
+        post_id, media_id = int(context.args[0]), int(context.args[1])
+
+        media = await get_media(media_id, user.id)
+        if not media:
+            await update.message.reply_text(f"❌ Файл **#{media_id}** не найден", parse_mode='Markdown')
+            return
+
+        db_pool = get_db_pool()
+        async with db_pool.acquire() as conn:
+            result = await conn.execute('''
+                UPDATE scheduled_posts
+                SET media_id = $1
+                WHERE id = $2 AND user_id = $3 AND status = 'pending'
+            ''', media_id, post_id, user.id)
+
+        if result == "UPDATE 1":
+            await invalidate(user.id, POSTS)
+            await update.message.reply_text(f"✅ Файл **#{media_id}** прикреплён к посту **#{post_id}**", parse_mode='Markdown')
+        else:
+            await update.message.reply_text(f"❌ Пост **#{post_id}** не найден", parse_mode='Markdown')
+
+    except ValueError:
+        await update.message.reply_text("❌ Неверный ID")
+    except Exception as e:
+        logger.error(f"Ошибка прикрепления медиа: {e}")
+        await update.message.reply_text("❌ Ошибка прикрепления")
+
+async def show_media(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Список сохранённых файлов: /media"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+
+    try:
+        files = await list_media(user.id)
+
+        if not files:
+            await update.message.reply_text("📎 Нет сохранённых файлов\n\nОтправьте боту фото или видео")
+            return
+
+        message = MessageBuilder(markdown=False).add(f"📎 Ваши файлы ({len(files)}):\n\n")
+        for f in files:
+            emoji = '🎬' if f['kind'] == 'video' else '🖼'
+            name = f" {f['file_name']}" if f['file_name'] else ''
+            message.add(f"{emoji} #{f['id']}{name} — {f['size'] // 1024} КБ, {f['created_at'].strftime('%d.%m.%Y')}\n")
+
+        await message.reply(update.message)
+
+    except Exception as e:
+        logger.error(f"Ошибка получения файлов: {e}")
+        await update.message.reply_text("❌ Ошибка получения файлов")
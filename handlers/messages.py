@@ -1,5 +1,10 @@
 """
 Обработчик текстовых сообщений и кнопок меню
+
+Кнопка выбирается по таблице BUTTON_ROUTER (подпись → обработчик), которая
+сверяется с get_main_keyboard() при импорте. Текстовые команды
+«заметка: ...» и «задача: ...» идут через префиксное дерево, остальной
+текст — вопрос к AI.
 """
 
 import logging
@@ -7,90 +12,122 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from database.db import update_user_stats
 from services.gemini_ai import ask_gemini, generate_art_idea
+from handlers.basic import help_command
+from handlers.notes import add_note
+from handlers.tasks import add_task
 from handlers.stats import show_stats
 from handlers.trends import show_trends
+from handlers.notifications import notification_settings
+from utils.keyboards import (
+    get_main_keyboard, BTN_ASK_AI, BTN_NOTE, BTN_TASKS, BTN_ART_IDEA, BTN_TRENDS,
+    BTN_CONTENT_PLAN, BTN_NOTIFICATIONS, BTN_STATS, BTN_HELP,
+)
+from utils.router import ButtonRouter
+from utils.message_builder import MessageBuilder
 
 logger = logging.getLogger(__name__)
 
+# ========================================
+# КНОПКИ МЕНЮ
+# ========================================
+
+async def _ask_ai_hint(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text(
+        "Задайте вопрос AI:\n"
+        "`/ask <ваш вопрос>`\n\n"
+        "Или просто напишите свой вопрос без команды!",
+        parse_mode='Markdown'
+    )
+
+async def _notes_hint(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text(
+        "📝 **Заметки:**\n\n"
+        "`/note <текст>` — добавить\n"
+        "`/notes` — показать все\n"
+        "`/delnote <номер>` — удалить\n\n"
+        "Или просто напишите `заметка: <текст>`",
+        parse_mode='Markdown'
+    )
+
+async def _tasks_hint(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text(
+        "✅ **Задачи:**\n\n"
+        "`/task <описание>` — добавить\n"
+        "`/tasks` — показать все\n"
+        "`/complete <номер>` — выполнить\n"
+        "`/deltask <номер>` — удалить\n\n"
+        "Или просто напишите `задача: <описание>`",
+        parse_mode='Markdown'
+    )
+
+async def _art_idea(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text("🎨 Генерирую креативную идею...")
+    try:
+        idea = await generate_art_idea()
+        await update.message.reply_text(f"💡 **Идея для арта:**\n\n{idea}", parse_mode='Markdown')
+    except Exception as e:
+        logger.error(f"Ошибка генерации идеи: {e}")
+        await update.message.reply_text("❌ Ошибка генерации. Попробуйте позже.")
+
+async def _content_plan_hint(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text(
+        "📅 **Контент-план:**\n\n"
+        "`/contentplan` — сгенерировать идею\n"
+        "`/schedule` — запланировать пост\n"
+        "`/scheduled` — календарь постов",
+        parse_mode='Markdown'
+    )
+
+BUTTON_ROUTER = ButtonRouter(
+    {
+        BTN_ASK_AI: _ask_ai_hint,
+        BTN_NOTE: _notes_hint,
+        BTN_TASKS: _tasks_hint,
+        BTN_ART_IDEA: _art_idea,
+        BTN_TRENDS: show_trends,
+        BTN_CONTENT_PLAN: _content_plan_hint,
+        BTN_NOTIFICATIONS: notification_settings,
+        BTN_STATS: show_stats,
+        BTN_HELP: help_command,
+    },
+    keyboard=get_main_keyboard(),
+    prefixes={
+        'заметка:': add_note,
+        'задача:': add_task,
+    },
+)
+
+# ========================================
+# ТЕКСТ
+# ========================================
+
+async def _ask_free_text(update: Update, text: str):
+    """Любой другой текст отправляем в AI"""
+    await update.message.reply_text("🤔 Обрабатываю...")
+    try:
+        response = await ask_gemini(text)
+
+        # Длинные ответы разбиваются по строкам
+        await MessageBuilder(markdown=False).add(f"🤖 {response}").reply(update.message)
+    except Exception as e:
+        logger.error(f"Ошибка AI: {e}")
+        await update.message.reply_text("❌ Ошибка AI. Попробуйте переформулировать вопрос.")
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработка текстовых сообщений"""
+    text = update.message.text
+    handler, args = BUTTON_ROUTER.resolve(text)
+
+    # Текстовая команда: обработчик сам учитывает статистику, как при /note
+    if args is not None:
+        context.args = args
+        await handler(update, context)
+        return
+
     user = update.effective_user
     await update_user_stats(user.id, user.username, user.first_name)
-    
-    text = update.message.text
-    
-    # Обработка кнопок меню
-    if text == "💬 Спросить AI":
-        await update.message.reply_text(
-            "Задайте вопрос AI:\n"
-            "`/ask <ваш вопрос>`\n\n"
-            "Или просто напишите свой вопрос без команды!",
-            parse_mode='Markdown'
-        )
-    
-    elif text == "📝 Заметка":
-        await update.message.reply_text(
-            "📝 **Заметки:**\n\n"
-            "`/note <текст>` — добавить\n"
-            "`/notes` — показать все\n"
-            "`/delnote <номер>` — удалить",
-            parse_mode='Markdown'
-        )
-    
-    elif text == "✅ Задачи":
-        await update.message.reply_text(
-            "✅ **Задачи:**\n\n"
-            "`/task <описание>` — добавить\n"
-            "`/tasks` — показать все\n"
-            "`/complete <номер>` — выполнить\n"
-            "`/deltask <номер>` — удалить",
-            parse_mode='Markdown'
-        )
-    
-    elif text == "🎨 Идея для арта":
-        await update.message.reply_text("🎨 Генерирую креативную идею...")
-        try:
-            idea = await generate_art_idea()
-            await update.message.reply_text(f"💡 **Идея для арта:**\n\n{idea}", parse_mode='Markdown')
-        except Exception as e:
-            logger.error(f"Ошибка генерации идеи: {e}")
-            await update.message.reply_text("❌ Ошибка генерации. Попробуйте позже.")
-    
-    elif text == "🔥 Тренды":
-        await show_trends(update, context)
-    
-    elif text == "📅 Контент-план":
-        await update.message.reply_text(
-            "📅 **Контент-план:**\n\n"
-            "`/contentplan` — сгенерировать идею\n"
-            "`/schedule` — запланировать пост\n"
-            "`/scheduled` — календарь постов",
-            parse_mode='Markdown'
-        )
-    
-    elif text == "⏰ Уведомления":
-        from handlers.notifications import notification_settings
-        await notification_settings(update, context)
-    
-    elif text == "📊 Статистика":
-        await show_stats(update, context)
-    
-    elif text == "ℹ️ Помощь":
-        from handlers.basic import help_command
-        await help_command(update, context)
-    
+
+    if handler is not None:
+        await handler(update, context)
     else:
-        # Любой другой текст отправляем в AI
-        await update.message.reply_text("🤔 Обрабатываю...")
-        try:
-            response = await ask_gemini(text)
-            
-            # Разбиваем длинные ответы
-            if len(response) > 4096:
-                for i in range(0, len(response), 4096):
-                    await update.message.reply_text(response[i:i+4096])
-            else:
-                await update.message.reply_text(f"🤖 {response}")
-        except Exception as e:
-            logger.error(f"Ошибка AI: {e}")
-            await update.message.reply_text("❌ Ошибка AI. Попробуйте переформулировать вопрос.")
+        await _ask_free_text(update, text)
@@ -6,6 +6,10 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 from database.db import get_db_pool, update_user_stats
+from database.search import full_text_search, SEARCH_PAGE_SIZE
+from utils.helpers import parse_search_args
+from utils.message_builder import MessageBuilder, escape_markdown
+from services.response_cache import cached, invalidate, NOTES
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +39,7 @@ async def add_note(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 'INSERT INTO notes (user_id, text) VALUES ($1, $2) RETURNING id',
                 user.id, note_text
             )
+        await invalidate(user.id, NOTES)
         
         await update.message.reply_text(
             f"✅ **Заметка #{note_id} сохранена!**\n\n"
@@ -57,11 +62,15 @@ async def show_notes(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
-        async with db_pool.acquire() as conn:
-            notes = await conn.fetch(
-                'SELECT id, text, created_at FROM notes WHERE user_id = $1 ORDER BY created_at DESC',
-                user.id
-            )
+        async def load():
+            async with db_pool.acquire() as conn:
+                return await conn.fetch(
+                    'SELECT id, text, created_at FROM notes WHERE user_id = $1 ORDER BY created_at DESC',
+                    user.id
+                )
+        
+        # Повторный /notes без изменений отдаётся из памяти
+        notes = await cached(user.id, NOTES, load)
         
         if not notes:
             await update.message.reply_text(
@@ -71,22 +80,18 @@ async def show_notes(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
         
-        notes_text = f"📝 **Ваши заметки ({len(notes)}):**\n\n"
+        message = MessageBuilder().add(f"📝 **Ваши заметки ({len(notes)}):**\n\n")
         
         for note in notes:
             date_str = note['created_at'].strftime("%d.%m.%Y %H:%M")
             # Обрезаем длинные заметки
             text_preview = note['text'][:100] + '...' if len(note['text']) > 100 else note['text']
-            notes_text += f"**#{note['id']}** {text_preview}\n📅 {date_str}\n\n"
+            message.add(f"**#{note['id']}** {escape_markdown(text_preview)}\n📅 {date_str}\n\n")
         
-        notes_text += "💡 Удалить: `/delnote <номер>`"
+        message.add("💡 Удалить: `/delnote <номер>`")
         
-        # Если текст слишком длинный, разбиваем на части
-        if len(notes_text) > 4096:
-            for i in range(0, len(notes_text), 4096):
-                await update.message.reply_text(notes_text[i:i+4096], parse_mode='Markdown')
-        else:
-            await update.message.reply_text(notes_text, parse_mode='Markdown')
+        # Длинный список режется между заметками
+        await message.reply(update.message)
             
     except Exception as e:
         logger.error(f"Ошибка получения заметок: {e}")
@@ -120,6 +125,7 @@ async def delete_note(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         
         if result == "DELETE 1":
+            await invalidate(user.id, NOTES)
             await update.message.reply_text(f"✅ Заметка **#{note_id}** удалена!", parse_mode='Markdown')
         else:
             await update.message.reply_text(f"❌ Заметка **#{note_id}** не найдена", parse_mode='Markdown')
@@ -129,3 +135,48 @@ async def delete_note(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         logger.error(f"Ошибка удаления заметки: {e}")
         await update.message.reply_text("❌ Ошибка удаления заметки")
+
+async def find_notes(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Поиск по заметкам: /findnote <запрос> [pN]"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+    
+    if not context.args:
+        await update.message.reply_text(
+            "❌ Использование: `/findnote <запрос> [p<страница>]`\n\n"
+            "Пример: `/findnote текстуры` или `/findnote текстуры p2`",
+            parse_mode='Markdown'
+        )
+        return
+    
+    if not get_db_pool():
+        await update.message.reply_text("❌ База данных недоступна.")
+        return
+    
+    query, page = parse_search_args(context.args)
+    
+    try:
+        notes, total = await full_text_search('notes', user.id, query, page)
+        
+        if not notes:
+            await update.message.reply_text(
+                f"🔍 По запросу «{query}» ничего не найдено" + (f" (страница {page})" if page > 1 else "")
+            )
+            return
+        
+        pages = (total + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE
+        message = MessageBuilder().add(f"🔍 **Найдено заметок: {total}** (стр. {page}/{pages})\n\n")
+        
+        for note in notes:
+            date_str = note['created_at'].strftime("%d.%m.%Y")
+            text_preview = note['text'][:100] + '...' if len(note['text']) > 100 else note['text']
+            message.add(f"**#{note['id']}** {escape_markdown(text_preview)}\n📅 {date_str}\n\n")
+        
+        if page < pages:
+            message.add(f"➡️ Дальше: `/findnote {query.replace('`', '')} p{page + 1}`")
+        
+        await message.reply(update.message)
+        
+    except Exception as e:
+        logger.error(f"Ошибка поиска заметок: {e}")
+        await update.message.reply_text("❌ Ошибка поиска заметок")
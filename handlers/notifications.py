@@ -6,9 +6,40 @@ import logging
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 from database.db import get_db_pool, update_user_stats
+from services.response_cache import cached, invalidate, NOTIFICATIONS
+from services.notification_index import notification_index
 
 logger = logging.getLogger(__name__)
 
+# Строки экрана настроек: (колонка notification_settings, расписание и описание)
+NOTIFICATION_ROWS = (
+    ('motivation', "**08:00** — Мотивация дня + арт"),
+    ('idea', "**09:00** — Идея для проекта"),
+    ('trends', "**10:00** — Тренды + музыка"),
+    ('jobs', "**11:00** — Вакансии и фриланс"),
+    ('assets', "**12:00** — Топ ассетов"),
+    ('reminders', "**Каждые 2 часа** — Напоминания"),
+)
+
+NOTIFICATION_NAMES = {
+    'motivation': 'Мотивация дня',
+    'idea': 'Идеи для проектов',
+    'trends': 'Тренды',
+    'jobs': 'Вакансии',
+    'assets': 'Топ ассетов',
+    'reminders': 'Напоминания',
+}
+
+TOGGLE_HINT = (
+    "💡 **Переключить:**\n"
+    "`/togglenotif motivation` — мотивация\n"
+    "`/togglenotif idea` — идеи\n"
+    "`/togglenotif trends` — тренды\n"
+    "`/togglenotif jobs` — вакансии\n"
+    "`/togglenotif assets` — ассеты\n"
+    "`/togglenotif reminders` — напоминания"
+)
+
 async def notification_settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показать настройки уведомлений: /notifications"""
     user = update.effective_user
@@ -20,41 +51,32 @@ async def notification_settings(update: Update, context: ContextTypes.DEFAULT_TY
         return
     
     try:
-        async with db_pool.acquire() as conn:
-            # Получаем или создаем настройки
-            settings = await conn.fetchrow(
-                'SELECT * FROM notification_settings WHERE user_id = $1',
-                user.id
-            )
-            
-            if not settings:
-                await conn.execute(
-                    'INSERT INTO notification_settings (user_id) VALUES ($1)',
-                    user.id
-                )
+        async def load():
+            async with db_pool.acquire() as conn:
+                # Получаем или создаем настройки
                 settings = await conn.fetchrow(
                     'SELECT * FROM notification_settings WHERE user_id = $1',
                     user.id
                 )
+                
+                if not settings:
+                    await conn.execute(
+                        'INSERT INTO notification_settings (user_id) VALUES ($1)',
+                        user.id
+                    )
+                    notification_index.add_user(user.id)
+                    settings = await conn.fetchrow(
+                        'SELECT * FROM notification_settings WHERE user_id = $1',
+                        user.id
+                    )
+                return settings
         
-        def status_emoji(enabled):
-            return "✅" if enabled else "❌"
-        
-        message = "⏰ **Настройки уведомлений**\n\n"
-        message += f"{status_emoji(settings['motivation'])} **08:00** — Мотивация дня + арт\n"
-        message += f"{status_emoji(settings['idea'])} **09:00** — Идея для проекта\n"
-        message += f"{status_emoji(settings['trends'])} **10:00** — Тренды + музыка\n"
-        message += f"{status_emoji(settings['jobs'])} **11:00** — Вакансии и фриланс\n"
-        message += f"{status_emoji(settings['assets'])} **12:00** — Топ ассетов\n"
-        message += f"{status_emoji(settings['reminders'])} **Каждые 2 часа** — Напоминания\n\n"
+        settings = await cached(user.id, NOTIFICATIONS, load)
         
-        message += "💡 **Переключить:**\n"
-        message += "`/togglenotif motivation` — мотивация\n"
-        message += "`/togglenotif idea` — идеи\n"
-        message += "`/togglenotif trends` — тренды\n"
-        message += "`/togglenotif jobs` — вакансии\n"
-        message += "`/togglenotif assets` — ассеты\n"
-        message += "`/togglenotif reminders` — напоминания"
+        rows = ''.join(
+            f"{'✅' if settings[column] else '❌'} {label}\n" for column, label in NOTIFICATION_ROWS
+        )
+        message = "⏰ **Настройки уведомлений**\n\n" + rows + "\n" + TOGGLE_HINT
         
         await update.message.reply_text(message, parse_mode='Markdown')
         
@@ -76,12 +98,11 @@ async def toggle_notification(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     notif_type = context.args[0].lower()
-    valid_types = ['motivation', 'idea', 'trends', 'jobs', 'assets', 'reminders']
     
-    if notif_type not in valid_types:
+    if notif_type not in NOTIFICATION_NAMES:
         await update.message.reply_text(
             f"❌ Неверный тип уведомления: {notif_type}\n\n"
-            f"Доступные: {', '.join(valid_types)}",
+            f"Доступные: {', '.join(NOTIFICATION_NAMES)}",
             parse_mode='Markdown'
         )
         return
@@ -96,20 +117,14 @@ async def toggle_notification(update: Update, context: ContextTypes.DEFAULT_TYPE
             # Переключаем состояние
             query = f"UPDATE notification_settings SET {notif_type} = NOT {notif_type} WHERE user_id = $1 RETURNING {notif_type}"
             new_state = await conn.fetchval(query, user.id)
+        if new_state is not None:
+            notification_index.set(user.id, notif_type, new_state)
+        await invalidate(user.id, NOTIFICATIONS)
         
         status = "включены ✅" if new_state else "выключены ❌"
         
-        notif_names = {
-            'motivation': 'Мотивация дня',
-            'idea': 'Идеи для проектов',
-            'trends': 'Тренды',
-            'jobs': 'Вакансии',
-            'assets': 'Топ ассетов',
-            'reminders': 'Напоминания',
-        }
-        
         await update.message.reply_text(
-            f"✅ **{notif_names[notif_type]}** {status}\n\n"
+            f"✅ **{NOTIFICATION_NAMES[notif_type]}** {status}\n\n"
             f"Все настройки: /notifications",
             parse_mode='Markdown'
         )
@@ -0,0 +1,110 @@
+"""
+Обработчик публикации поста сразу на несколько платформ
+"""
+
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+from database.db import update_user_stats
+from services.publishing import publish_post, get_publishers, get_publisher
+from services.media_store import get_media
+from config.platforms import get_platform_config
+from handlers.admin import is_admin
+
+logger = logging.getLogger(__name__)
+
+MEDIA_PREFIX = 'media:'
+
+def parse_publish_args(raw: str) -> tuple:
+    """
+    Разбор аргументов /publish: [платформы |] [media:<id> |] <текст>
+
+    Returns:
+        tuple: (платформы или None, id файла или None, текст)
+
+    Raises:
+        ValueError: Неверный id файла
+    """
+    platforms = media_id = None
+
+    # Не больше двух заголовков: дальше «|» может быть частью текста
+    for _ in range(2):
+        head, separator, rest = raw.partition('|')
+        if not separator:
+            break
+        head = head.strip()
+        if media_id is None and head.lower().startswith(MEDIA_PREFIX):
+            media_id = int(head[len(MEDIA_PREFIX):].strip().lstrip('#'))
+        elif platforms is None and media_id is None:
+            platforms = [p.strip() for p in head.split(',') if p.strip()]
+        else:
+            break
+        raw = rest.strip()
+
+    return platforms, media_id, raw
+
+async def publish_now(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Публикация: /publish [платформа, платформа |] [media:<id> |] <текст>"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+
+    # Публикация идёт через аккаунты владельца бота из окружения
+    if not is_admin(user.id):
+        await update.message.reply_text("❌ Команда доступна только администраторам")
+        return
+
+    try:
+        platforms, media_id, raw = parse_publish_args(update.message.text.partition(' ')[2].strip())
+    except ValueError:
+        await update.message.reply_text("❌ Неверный ID файла")
+        return
+
+    configured = [p.platform for p in await get_publishers()]
+
+    if not raw:
+        await update.message.reply_text(
+            "❌ Использование:\n"
+            "`/publish <текст>` — на все подключённые платформы\n"
+            "`/publish Telegram, X (Twitter) | <текст>` — на выбранные\n"
+            "`/publish media:<id> | <текст>` — с сохранённым фото или видео\n\n"
+            f"Подключены: {', '.join(configured) or 'нет'}",
+            parse_mode='Markdown'
+        )
+        return
+
+    unknown = [p for p in platforms or [] if get_publisher(p) is None]
+    if unknown:
+        await update.message.reply_text(f"❌ Публикация не поддерживается: {', '.join(unknown)}")
+        return
+
+    if platforms is None and not configured:
+        await update.message.reply_text("❌ Нет подключённых платформ для публикации")
+        return
+
+    post = {'text': raw}
+    if media_id is not None:
+        media = await get_media(media_id, user.id)
+        if not media:
+            await update.message.reply_text(f"❌ Файл **#{media_id}** не найден", parse_mode='Markdown')
+            return
+        post['media_id'] = media_id
+        post['video_path' if media['kind'] == 'video' else 'image_path'] = media['path']
+
+    await update.message.reply_text("📤 Публикую...")
+
+    try:
+        results = await publish_post(user.id, post, platforms, bot=context.bot, chat_id=update.effective_chat.id)
+
+        message = "📤 Результаты публикации:\n\n"
+        for platform, result in results.items():
+            emoji = get_platform_config(platform).get('emoji', '•')
+            if result.get('success'):
+                message += f"{emoji} {platform}: ✅ {result.get('url', '')}\n"
+            else:
+                message += f"{emoji} {platform}: ❌ {result.get('error', 'ошибка')}\n"
+
+        await update.message.reply_text(message, disable_web_page_preview=True)
+
+    except Exception as e:
+        logger.error(f"Ошибка публикации: {e}")
+        await update.message.reply_text("❌ Ошибка публикации. Попробуйте позже.")
@@ -6,6 +6,7 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 from database.db import get_db_pool, update_user_stats
+from services.response_cache import cached, NOTES, TASKS, POSTS, HISTORY
 
 logger = logging.getLogger(__name__)
 
@@ -20,43 +21,50 @@ async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
+        async def load_counts():
+            async with db_pool.acquire() as conn:
+                # Количество заметок
+                notes_count = await conn.fetchval(
+                    'SELECT COUNT(*) FROM notes WHERE user_id = $1',
+                    user.id
+                )
+                
+                # Количество задач
+                tasks_total = await conn.fetchval(
+                    'SELECT COUNT(*) FROM tasks WHERE user_id = $1',
+                    user.id
+                )
+                
+                tasks_completed = await conn.fetchval(
+                    'SELECT COUNT(*) FROM tasks WHERE user_id = $1 AND completed = TRUE',
+                    user.id
+                )
+                
+                # Запланированные посты
+                scheduled_posts = await conn.fetchval(
+                    'SELECT COUNT(*) FROM scheduled_posts WHERE user_id = $1 AND status = $2',
+                    user.id, 'pending'
+                )
+                
+                # Опубликованные посты
+                posted_count = await conn.fetchval(
+                    'SELECT COUNT(*) FROM post_history WHERE user_id = $1',
+                    user.id
+                )
+            return notes_count, tasks_total, tasks_completed, scheduled_posts, posted_count
+        
+        # Счётчики меняются только при записи — кэшируются до изменения заметок, задач или постов
+        notes_count, tasks_total, tasks_completed, scheduled_posts, posted_count = await cached(
+            user.id, 'stats', load_counts, depends=(NOTES, TASKS, POSTS, HISTORY)
+        )
+        tasks_active = tasks_total - tasks_completed
+        
+        # Статистика пользователя меняется с каждым сообщением — читается всегда
         async with db_pool.acquire() as conn:
-            # Статистика пользователя
             stats = await conn.fetchrow(
                 'SELECT total_messages, last_active, created_at FROM user_stats WHERE user_id = $1',
                 user.id
             )
-            
-            # Количество заметок
-            notes_count = await conn.fetchval(
-                'SELECT COUNT(*) FROM notes WHERE user_id = $1',
-                user.id
-            )
-            
-            # Количество задач
-            tasks_total = await conn.fetchval(
-                'SELECT COUNT(*) FROM tasks WHERE user_id = $1',
-                user.id
-            )
-            
-            tasks_completed = await conn.fetchval(
-                'SELECT COUNT(*) FROM tasks WHERE user_id = $1 AND completed = TRUE',
-                user.id
-            )
-            
-            tasks_active = tasks_total - tasks_completed
-            
-            # Запланированные посты
-            scheduled_posts = await conn.fetchval(
-                'SELECT COUNT(*) FROM scheduled_posts WHERE user_id = $1 AND status = $2',
-                user.id, 'pending'
-            )
-            
-            # Опубликованные посты
-            posted_count = await conn.fetchval(
-                'SELECT COUNT(*) FROM post_history WHERE user_id = $1',
-                user.id
-            )
         
         if not stats:
             await update.message.reply_text("📊 Статистика пока не собрана. Используйте бота активнее!")
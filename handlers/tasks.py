@@ -6,6 +6,10 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 from database.db import get_db_pool, update_user_stats
+from database.search import full_text_search, SEARCH_PAGE_SIZE
+from utils.helpers import parse_search_args
+from utils.message_builder import MessageBuilder, escape_markdown
+from services.response_cache import cached, invalidate, TASKS
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -36,6 +40,7 @@ async def add_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 'INSERT INTO tasks (user_id, text) VALUES ($1, $2) RETURNING id',
                 user.id, task_text
             )
+        await invalidate(user.id, TASKS)
         
         await update.message.reply_text(
             f"✅ **Задача #{task_id} добавлена!**\n\n"
@@ -58,11 +63,14 @@ async def show_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
-        async with db_pool.acquire() as conn:
-            tasks = await conn.fetch(
-                'SELECT id, text, completed, created_at FROM tasks WHERE user_id = $1 ORDER BY completed, created_at DESC',
-                user.id
-            )
+        async def load():
+            async with db_pool.acquire() as conn:
+                return await conn.fetch(
+                    'SELECT id, text, completed, created_at FROM tasks WHERE user_id = $1 ORDER BY completed, created_at DESC',
+                    user.id
+                )
+        
+        tasks = await cached(user.id, TASKS, load)
         
         if not tasks:
             await update.message.reply_text(
@@ -75,26 +83,29 @@ async def show_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
         active_tasks = [t for t in tasks if not t['completed']]
         completed_tasks = [t for t in tasks if t['completed']]
         
-        tasks_text = f"📋 **Ваши задачи:**\n\n"
+        message = MessageBuilder().add("📋 **Ваши задачи:**\n\n")
         
         if active_tasks:
-            tasks_text += "⏳ **Активные:**\n"
+            message.add("⏳ **Активные:**\n")
             for task in active_tasks:
                 date_str = task['created_at'].strftime("%d.%m.%Y")
                 text_preview = task['text'][:80] + '...' if len(task['text']) > 80 else task['text']
-                tasks_text += f"**#{task['id']}** {text_preview}\n📅 {date_str}\n\n"
+                message.add(f"**#{task['id']}** {escape_markdown(text_preview)}\n📅 {date_str}\n\n")
         
         if completed_tasks:
-            tasks_text += "✅ **Выполненные:**\n"
+            message.add("✅ **Выполненные:**\n")
             for task in completed_tasks[:5]:  # Показываем только последние 5
                 text_preview = task['text'][:60] + '...' if len(task['text']) > 60 else task['text']
-                tasks_text += f"~~#{task['id']} {text_preview}~~\n\n"
+                message.add(f"~~#{task['id']} {escape_markdown(text_preview)}~~\n\n")
         
-        tasks_text += "\n💡 **Команды:**\n"
-        tasks_text += "`/complete <номер>` — отметить выполненной\n"
-        tasks_text += "`/deltask <номер>` — удалить"
+        message.add(
+            "\n💡 **Команды:**\n"
+            "`/complete <номер>` — отметить выполненной\n"
+            "`/deltask <номер>` — удалить"
+        )
         
-        await update.message.reply_text(tasks_text, parse_mode='Markdown')
+        # Длинный список режется между задачами
+        await message.reply(update.message)
         
     except Exception as e:
         logger.error(f"Ошибка получения задач: {e}")
@@ -128,6 +139,7 @@ async def complete_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         
         if result == "UPDATE 1":
+            await invalidate(user.id, TASKS)
             await update.message.reply_text(
                 f"✅ **Задача #{task_id} выполнена!**\n\n"
                 f"Отличная работа! 🎉",
@@ -170,6 +182,7 @@ async def delete_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         
         if result == "DELETE 1":
+            await invalidate(user.id, TASKS)
             await update.message.reply_text(f"✅ Задача **#{task_id}** удалена!", parse_mode='Markdown')
         else:
             await update.message.reply_text(f"❌ Задача **#{task_id}** не найдена", parse_mode='Markdown')
@@ -179,3 +192,48 @@ async def delete_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         logger.error(f"Ошибка удаления задачи: {e}")
         await update.message.reply_text("❌ Ошибка удаления задачи")
+
+async def find_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Поиск по задачам: /findtask <запрос> [pN]"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+    
+    if not context.args:
+        await update.message.reply_text(
+            "❌ Использование: `/findtask <запрос> [p<страница>]`\n\n"
+            "Пример: `/findtask рендер` или `/findtask рендер p2`",
+            parse_mode='Markdown'
+        )
+        return
+    
+    if not get_db_pool():
+        await update.message.reply_text("❌ База данных недоступна.")
+        return
+    
+    query, page = parse_search_args(context.args)
+    
+    try:
+        tasks, total = await full_text_search('tasks', user.id, query, page)
+        
+        if not tasks:
+            await update.message.reply_text(
+                f"🔍 По запросу «{query}» ничего не найдено" + (f" (страница {page})" if page > 1 else "")
+            )
+            return
+        
+        pages = (total + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE
+        message = MessageBuilder().add(f"🔍 **Найдено задач: {total}** (стр. {page}/{pages})\n\n")
+        
+        for task in tasks:
+            status = "✅" if task['completed'] else "⏳"
+            text_preview = task['text'][:80] + '...' if len(task['text']) > 80 else task['text']
+            message.add(f"{status} **#{task['id']}** {escape_markdown(text_preview)}\n\n")
+        
+        if page < pages:
+            message.add(f"➡️ Дальше: `/findtask {query.replace('`', '')} p{page + 1}`")
+        
+        await message.reply(update.message)
+        
+    except Exception as e:
+        logger.error(f"Ошибка поиска задач: {e}")
+        await update.message.reply_text("❌ Ошибка поиска задач")
@@ -0,0 +1,237 @@
+"""
+Импорт/экспорт заметок, задач и запланированных постов (CSV, JSONL)
+"""
+
+import os
+import csv
+import json
+import logging
+import tempfile
+from datetime import datetime
+from telegram import Update
+from telegram.ext import ContextTypes
+from database.db import get_db_pool, update_user_stats
+from database.models import POST_STATUSES
+from services.response_cache import invalidate, NOTES, TASKS, POSTS
+from services.slots import book_slot
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+def _parse_text(value):
+    return str(value) if value not in (None, '') else None
+
+def _parse_datetime(value):
+    if value in (None, ''):
+        return None
+    return datetime.fromisoformat(str(value))
+
+def _parse_choice(*allowed):
+    def parse(value):
+        value = _parse_text(value)
+        if value is not None and value not in allowed:
+            raise ValueError(value)
+        return value
+    return parse
+
+def _parse_bool(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    return str(value).strip().lower() in ('t', 'true', '1', 'yes', 'да')
+
+# Таблицы для переноса: колонки (без user_id), парсер и значение по умолчанию.
+# book_slots — будущие посты в статусе pending бронируются в календаре слотов
+TRANSFER_TABLES = {
+    'notes': {
+        'table': 'notes',
+        'cache_scope': NOTES,
+        'order_by': 'created_at',
+        'columns': [
+            ('text', _parse_text, None),
+            ('created_at', _parse_datetime, datetime.now),
+        ],
+    },
+    'tasks': {
+        'table': 'tasks',
+        'cache_scope': TASKS,
+        'order_by': 'created_at',
+        'columns': [
+            ('text', _parse_text, None),
+            ('priority', _parse_text, lambda: 'medium'),
+            ('deadline', _parse_datetime, lambda: None),
+            ('completed', _parse_bool, lambda: False),
+            ('created_at', _parse_datetime, datetime.now),
+        ],
+    },
+    'posts': {
+        'table': 'scheduled_posts',
+        'cache_scope': POSTS,
+        'order_by': 'scheduled_time',
+        'book_slots': True,
+        'columns': [
+            ('platform', _parse_text, None),
+            ('content_ru', _parse_text, None),
+            ('content_en', _parse_text, lambda: None),
+            ('scheduled_time', _parse_datetime, None),
+            ('status', _parse_choice(*POST_STATUSES.values()), lambda: POST_STATUSES['PENDING']),
+        ],
+    },
+}
+
+async def export_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Экспорт данных: /export <notes|tasks|posts> [csv|jsonl]"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+
+    kind = context.args[0].lower() if context.args else None
+    fmt = context.args[1].lower() if len(context.args) > 1 else 'csv'
+
+    if kind not in TRANSFER_TABLES or fmt not in EXPORT_FORMATS:
+        await update.message.reply_text(
+            "❌ Использование: `/export <notes|tasks|posts> [csv|jsonl]`\n\n"
+            "Пример: `/export notes jsonl`",
+            parse_mode='Markdown'
+        )
+        return
+
+    db_pool = get_db_pool()
+    if not db_pool:
+        await update.message.reply_text("❌ База данных недоступна.")
+        return
+
+    spec = TRANSFER_TABLES[kind]
+    columns = ', '.join(name for name, _, _ in spec['columns'])
+    query = f"SELECT {columns} FROM {spec['table']} WHERE user_id = $1 ORDER BY {spec['order_by']}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, f"{kind}.{fmt}")
+
+            # COPY пишет строки прямо в файл, не накапливая их в памяти
+            async with db_pool.acquire() as conn:
+                if fmt == 'csv':
+                    await conn.copy_from_query(query, user.id, output=path, format='csv', header=True)
+                else:
+                    # JSON не содержит сырых переводов строк и управляющих символов,
+                    # поэтому с такими QUOTE/DELIMITER CSV выводит строки JSON как есть
+                    await conn.copy_from_query(
+                        f"SELECT row_to_json(t)::text FROM ({query}) t", user.id,
+                        output=path, format='csv', quote='\x01', delimiter='\x02'
+                    )
+
+            if os.path.getsize(path) == 0 or (fmt == 'csv' and _count_lines(path) <= 1):
+                await update.message.reply_text("📭 Нечего экспортировать")
+                return
+
+            with open(path, 'rb') as document:
+                await update.message.reply_document(
+                    document=document,
+                    filename=f"{kind}_{datetime.now().strftime('%Y%m%d')}.{fmt}",
+                    caption=f"📦 Экспорт: {kind}"
+                )
+
+    except Exception as e:
+        logger.error(f"Ошибка экспорта: {e}")
+        await update.message.reply_text("❌ Ошибка экспорта")
+
+async def import_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Импорт данных: документ .csv/.jsonl с подписью /import <notes|tasks|posts>"""
+    user = update.effective_user
+    await update_user_stats(user.id, user.username, user.first_name)
+
+    caption_args = (update.message.caption or '').split()[1:]
+    kind = caption_args[0].lower() if caption_args else None
+    document = update.message.document
+    fmt = document.file_name.rsplit('.', 1)[-1].lower() if document and document.file_name and '.' in document.file_name else None
+
+    if kind not in TRANSFER_TABLES or fmt not in EXPORT_FORMATS:
+        await update.message.reply_text(
+            "❌ Отправьте файл `.csv` или `.jsonl` с подписью\n"
+            "`/import <notes|tasks|posts>`\n\n"
+            "Формат файла — как в `/export`",
+            parse_mode='Markdown'
+        )
+        return
+
+    db_pool = get_db_pool()
+    if not db_pool:
+        await update.message.reply_text("❌ База данных недоступна.")
+        return
+
+    spec = TRANSFER_TABLES[kind]
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, f"import.{fmt}")
+            tg_file = await document.get_file()
+            await tg_file.download_to_drive(path)
+
+            with open(path, encoding='utf-8', newline='') as f:
+                rows = csv.DictReader(f) if fmt == 'csv' else (json.loads(line) for line in f if line.strip())
+                counter = {'rows': 0}
+                slots = [] if spec.get('book_slots') else None
+
+                # Одна операция COPY на весь файл, записи читаются по мере отправки
+                async with db_pool.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.copy_records_to_table(
+                            spec['table'],
+                            records=_iter_records(rows, spec['columns'], user.id, counter, slots),
+                            columns=['user_id'] + [name for name, _, _ in spec['columns']]
+                        )
+
+        # Календарь слотов обновляется только после успешного COPY
+        for platform, scheduled_time in slots or ():
+            book_slot(platform, scheduled_time)
+        await invalidate(user.id, spec['cache_scope'])
+
+        await update.message.reply_text(
+            f"✅ Импортировано записей: **{counter['rows']}** ({kind})",
+            parse_mode='Markdown'
+        )
+
+    except ValueError as e:
+        await update.message.reply_text(f"❌ Ошибка в файле: {e}\n\nНичего не импортировано.")
+    except Exception as e:
+        logger.error(f"Ошибка импорта: {e}")
+        await update.message.reply_text("❌ Ошибка импорта. Ничего не импортировано.")
+
+def _iter_records(rows, columns: list, user_id: int, counter: dict, slots: list = None):
+    """Преобразование строк файла в кортежи для COPY (slots — сюда попадают будущие pending-посты)"""
+    names = [name for name, _, _ in columns]
+    now = datetime.now()
+
+    for line_no, row in enumerate(rows, 1):
+        record = [user_id]
+
+        for name, parse, default in columns:
+            try:
+                value = parse(row.get(name))
+            except (TypeError, ValueError):
+                raise ValueError(f"строка {line_no}: неверное значение поля {name}")
+
+            if value is None:
+                if default is None:
+                    raise ValueError(f"строка {line_no}: не заполнено поле {name}")
+                value = default()
+
+            record.append(value)
+
+        if slots is not None:
+            post = dict(zip(names, record[1:]))
+            if post['status'] == POST_STATUSES['PENDING'] and post['scheduled_time'] > now:
+                slots.append((post['platform'], post['scheduled_time']))
+
+        counter['rows'] += 1
+        yield tuple(record)
+
+def _count_lines(path: str, limit: int = 2) -> int:
+    """Количество строк в файле (считает не больше limit)"""
+    count = 0
+    with open(path, 'rb') as f:
+        for _ in f:
+            count += 1
+            if count >= limit:
+                break
+    return count
@@ -6,8 +6,10 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 from database.db import get_db_pool, update_user_stats
-from services.parsers.artstation import get_artstation_trends
-from services.parsers.music_trends import get_music_trends
+from services.parsers import crawl
+from utils.message_builder import MessageBuilder, escape_markdown, escape_url
+from services.response_cache import invalidate, NOTIFICATIONS
+from services.notification_index import notification_index
 
 logger = logging.getLogger(__name__)
 
@@ -19,47 +21,42 @@ async def show_trends(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("🔥 Загружаю свежие тренды...")
     
     try:
-        # Получаем тренды с ArtStation
-        art_trends = await get_artstation_trends(limit=10)
-        
-        # Получаем музыкальные тренды
-        music_trends = await get_music_trends(limit=20)
+        # Получаем тренды ArtStation и музыку параллельно
+        trends = await crawl(['artstation', 'music'], limits={'artstation': 10, 'music': 20})
+        art_trends = trends['artstation']
+        music_trends = trends['music']
         
         # Формируем сообщение
-        message = "🔥 **АКТУАЛЬНЫЕ ТРЕНДЫ**\n\n"
+        message = MessageBuilder().add("🔥 **АКТУАЛЬНЫЕ ТРЕНДЫ**\n\n")
         
         # ArtStation тренды
         if art_trends:
-            message += "🎨 **Топ-10 трендов ArtStation:**\n\n"
+            message.add("🎨 **Топ-10 трендов ArtStation:**\n\n")
             for i, art in enumerate(art_trends, 1):
-                message += f"{i}. **{art['title']}**\n"
-                message += f"   👤 {art['artist']}\n"
-                message += f"   ❤️ {art['likes']} | 👁 {art['views']}\n"
-                if art.get('url'):
-                    message += f"   🔗 [Смотреть]({art['url']})\n"
-                message += "\n"
+                link = f"   🔗 [Смотреть]({escape_url(art['url'])})\n" if art.get('url') else ''
+                message.add(
+                    f"{i}. **{escape_markdown(art['title'])}**\n"
+                    f"   👤 {escape_markdown(art['artist'])}\n"
+                    f"   ❤️ {art['likes']} | 👁 {art['views']}\n"
+                    f"{link}\n"
+                )
         else:
-            message += "🎨 ArtStation тренды временно недоступны\n\n"
+            message.add("🎨 ArtStation тренды временно недоступны\n\n")
         
         # Музыкальные тренды
         if music_trends:
-            message += "🎵 **Топ-20 треков TikTok/Billboard:**\n\n"
+            message.add("🎵 **Топ-20 треков TikTok/Billboard:**\n\n")
             for i, track in enumerate(music_trends[:10], 1):  # Показываем первые 10
-                message += f"{i}. **{track['title']}** — {track['artist']}\n"
+                message.add(f"{i}. **{escape_markdown(track['title'])}** — {escape_markdown(track['artist'])}\n")
             
-            message += "\n_...и ещё 10 треков_\n\n"
+            message.add("\n_...и ещё 10 треков_\n\n")
         else:
-            message += "🎵 Музыкальные тренды временно недоступны\n\n"
+            message.add("🎵 Музыкальные тренды временно недоступны\n\n")
         
-        message += "💡 Автоматическая рассылка: /trendsnotify"
+        message.add("💡 Автоматическая рассылка: /trendsnotify")
         
-        # Разбиваем если слишком длинное
-        if len(message) > 4096:
-            parts = [message[i:i+4096] for i in range(0, len(message), 4096)]
-            for part in parts:
-                await update.message.reply_text(part, parse_mode='Markdown', disable_web_page_preview=True)
-        else:
-            await update.message.reply_text(message, parse_mode='Markdown', disable_web_page_preview=True)
+        # Длинное сообщение режется между трендами
+        await message.reply(update.message, disable_web_page_preview=True)
         
     except Exception as e:
         logger.error(f"Ошибка получения трендов: {e}")
@@ -92,6 +89,7 @@ async def toggle_trends_notifications(update: Update, context: ContextTypes.DEFA
                     'INSERT INTO notification_settings (user_id, trends) VALUES ($1, TRUE)',
                     user.id
                 )
+                notification_index.add_user(user.id)
                 new_state = True
             else:
                 # Переключаем состояние
@@ -100,6 +98,8 @@ async def toggle_trends_notifications(update: Update, context: ContextTypes.DEFA
                     'UPDATE notification_settings SET trends = $1 WHERE user_id = $2',
                     new_state, user.id
                 )
+                notification_index.set(user.id, 'trends', new_state)
+        await invalidate(user.id, NOTIFICATIONS)
         
         if new_state:
             await update.message.reply_text(
@@ -3,12 +3,13 @@
 """
 
 from .twitter import post_to_twitter
-from .telegram_channel import post_to_telegram_channel
+from .telegram_channel import post_to_telegram_channel, post_many_to_telegram_channel
 from .instagram import post_to_instagram, post_to_threads
 
 __all__ = [
     'post_to_twitter',
     'post_to_telegram_channel',
+    'post_many_to_telegram_channel',
     'post_to_instagram',
     'post_to_threads',
 ]
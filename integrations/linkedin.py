@@ -1,52 +1,63 @@
 """
 Интеграция с LinkedIn API
+
+Заголовки лимитов каждого ответа пишутся в общий журнал (services.rate_limits);
+публикация — эндпоинт 'publish', его бюджет проверяет Publisher.
 """
 
 import logging
 import aiohttp
-from config.settings import LINKEDIN_ACCESS_TOKEN
+from services.tokens import get_access_token
+from services.rate_limits import record_headers, rate_limited
+from utils.http import get_http_session
 
 logger = logging.getLogger(__name__)
 
 LINKEDIN_API_URL = "https://api.linkedin.com/v2"
 
-async def post_to_linkedin(text: str, image_url: str = None) -> dict:
+async def post_to_linkedin(text: str, image_url: str = None, user_id: int = None, account: str = None) -> dict:
     """
     Публикация поста в LinkedIn
     
     Args:
         text: Текст поста (до 3000 символов)
         image_url: URL изображения (опционально)
+        user_id, account: Чей токен использовать (по умолчанию — аккаунт бота)
     
     Returns:
         dict: {'success': bool, 'url': str, 'post_id': str}
     """
-    if not LINKEDIN_ACCESS_TOKEN:
+    access_token = await get_access_token('linkedin', user_id, account)
+    if not access_token:
         logger.error("LinkedIn Access Token не настроен")
         return {'success': False, 'error': 'Token not configured'}
     
     try:
         headers = {
-            'Authorization': f'Bearer {LINKEDIN_ACCESS_TOKEN}',
+            'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json',
             'X-Restli-Protocol-Version': '2.0.0'
         }
         
         # Получаем ID пользователя
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{LINKEDIN_API_URL}/me",
-                headers=headers,
-                timeout=15
-            ) as response:
-                
-                if response.status != 200:
-                    error = await response.text()
-                    logger.error(f"Ошибка получения профиля LinkedIn: {error}")
-                    return {'success': False, 'error': error}
-                
-                user_data = await response.json()
-                user_id = user_data['id']
+        session = get_http_session()
+        async with session.get(
+            f"{LINKEDIN_API_URL}/me",
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=15)
+        ) as response:
+            
+            await record_headers('linkedin', 'me', response.headers, account)
+            if response.status == 429:
+                return rate_limited(response.headers)
+            
+            if response.status != 200:
+                error = await response.text()
+                logger.error(f"Ошибка получения профиля LinkedIn: {error}")
+                return {'success': False, 'error': error}
+            
+            user_data = await response.json()
+            member_id = user_data['id']
         
         # Обрезаем текст если нужно
         if len(text) > 3000:
@@ -54,7 +65,7 @@ async def post_to_linkedin(text: str, image_url: str = None) -> dict:
         
         # Создаем пост
         post_data = {
-            'author': f'urn:li:person:{user_id}',
+            'author': f'urn:li:person:{member_id}',
             'lifecycleState': 'PUBLISHED',
             'specificContent': {
                 'com.linkedin.ugc.ShareContent': {
@@ -80,32 +91,36 @@ async def post_to_linkedin(text: str, image_url: str = None) -> dict:
                 }
             }]
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{LINKEDIN_API_URL}/ugcPosts",
-                headers=headers,
-                json=post_data,
-                timeout=30
-            ) as response:
-                
-                if response.status not in [200, 201]:
-                    error_text = await response.text()
-                    logger.error(f"LinkedIn API error: {error_text}")
-                    return {'success': False, 'error': error_text}
-                
-                result = await response.json()
-                post_id = result.get('id', '').split(':')[-1]
-                
-                # LinkedIn не возвращает прямую ссылку, формируем сами
-                post_url = f"https://www.linkedin.com/feed/update/{post_id}/"
-                
-                logger.info(f"✅ Пост опубликован в LinkedIn: {post_url}")
-                
-                return {
-                    'success': True,
-                    'url': post_url,
-                    'post_id': post_id
-                }
+        async with session.post(
+            f"{LINKEDIN_API_URL}/ugcPosts",
+            headers=headers,
+            json=post_data,
+            timeout=aiohttp.ClientTimeout(total=30)
+        ) as response:
+            
+            await record_headers('linkedin', 'publish', response.headers, account)
+            if response.status == 429:
+                logger.warning("⏳ LinkedIn 429 (publish)")
+                return rate_limited(response.headers)
+            
+            if response.status not in [200, 201]:
+                error_text = await response.text()
+                logger.error(f"LinkedIn API error: {error_text}")
+                return {'success': False, 'error': error_text}
+            
+            result = await response.json()
+            post_id = result.get('id', '').split(':')[-1]
+            
+            # LinkedIn не возвращает прямую ссылку, формируем сами
+            post_url = f"https://www.linkedin.com/feed/update/{post_id}/"
+            
+            logger.info(f"✅ Пост опубликован в LinkedIn: {post_url}")
+            
+            return {
+                'success': True,
+                'url': post_url,
+                'post_id': post_id
+            }
     
     except aiohttp.ClientError as e:
         logger.error(f"Ошибка HTTP при публикации в LinkedIn: {e}")
@@ -115,54 +130,58 @@ async def post_to_linkedin(text: str, image_url: str = None) -> dict:
         logger.error(f"Неожиданная ошибка LinkedIn: {e}")
         return {'success': False, 'error': str(e)}
 
-async def get_linkedin_profile() -> dict:
+async def get_linkedin_profile(user_id: int = None, account: str = None) -> dict:
     """Получение информации о профиле"""
     try:
+        access_token = await get_access_token('linkedin', user_id, account)
         headers = {
-            'Authorization': f'Bearer {LINKEDIN_ACCESS_TOKEN}'
+            'Authorization': f'Bearer {access_token}'
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{LINKEDIN_API_URL}/me",
-                headers=headers,
-                timeout=15
-            ) as response:
-                
-                if response.status != 200:
-                    return {}
-                
-                data = await response.json()
-                return {
-                    'id': data.get('id'),
-                    'firstName': data.get('localizedFirstName'),
-                    'lastName': data.get('localizedLastName'),
-                }
+        session = get_http_session()
+        async with session.get(
+            f"{LINKEDIN_API_URL}/me",
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=15)
+        ) as response:
+            
+            await record_headers('linkedin', 'me', response.headers, account)
+            if response.status != 200:
+                return {}
+            
+            data = await response.json()
+            return {
+                'id': data.get('id'),
+                'firstName': data.get('localizedFirstName'),
+                'lastName': data.get('localizedLastName'),
+            }
     
     except Exception as e:
         logger.error(f"Ошибка получения профиля LinkedIn: {e}")
         return {}
 
-async def delete_linkedin_post(post_id: str) -> bool:
+async def delete_linkedin_post(post_id: str, user_id: int = None, account: str = None) -> bool:
     """Удаление поста из LinkedIn"""
     try:
+        access_token = await get_access_token('linkedin', user_id, account)
         headers = {
-            'Authorization': f'Bearer {LINKEDIN_ACCESS_TOKEN}',
+            'Authorization': f'Bearer {access_token}',
             'X-Restli-Protocol-Version': '2.0.0'
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(
-                f"{LINKEDIN_API_URL}/ugcPosts/{post_id}",
-                headers=headers,
-                timeout=15
-            ) as response:
-                
-                if response.status == 204:
-                    logger.info(f"✅ Пост {post_id} удален из LinkedIn")
-                    return True
-                
-                return False
+        session = get_http_session()
+        async with session.delete(
+            f"{LINKEDIN_API_URL}/ugcPosts/{post_id}",
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=15)
+        ) as response:
+            
+            await record_headers('linkedin', 'delete', response.headers, account)
+            if response.status == 204:
+                logger.info(f"✅ Пост {post_id} удален из LinkedIn")
+                return True
+            
+            return False
     
     except Exception as e:
         logger.error(f"Ошибка удаления поста LinkedIn: {e}")
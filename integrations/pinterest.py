@@ -1,16 +1,47 @@
 """
 Интеграция с Pinterest API
+
+Заголовки лимитов каждого ответа пишутся в общий журнал (services.rate_limits);
+публикация — эндпоинт 'publish', его бюджет проверяет Publisher.
 """
 
+import os
+import base64
+import asyncio
 import logging
 import aiohttp
-from config.settings import PINTEREST_ACCESS_TOKEN
+from services.tokens import get_access_token
+from services.rate_limits import record_headers, rate_limited
+from utils.http import get_http_session
 
 logger = logging.getLogger(__name__)
 
 PINTEREST_API_URL = "https://api.pinterest.com/v5"
 
-async def post_to_pinterest(title: str, description: str, image_url: str, link: str = None, board_id: str = None) -> dict:
+# Форматы, которые Pinterest принимает в image_base64
+BASE64_CONTENT_TYPES = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png'}
+
+def _read_base64(path: str) -> str:
+    with open(path, 'rb') as f:
+        return base64.b64encode(f.read()).decode('ascii')
+
+async def _media_source(image_url: str, image_path: str) -> dict:
+    """media_source пина: ссылка на изображение или сам файл (image_base64)"""
+    if image_url:
+        return {'source_type': 'image_url', 'url': image_url}
+
+    content_type = BASE64_CONTENT_TYPES.get(os.path.splitext(image_path)[1].lower())
+    if content_type is None:
+        raise ValueError(f"Pinterest принимает только JPEG и PNG: {image_path}")
+
+    return {
+        'source_type': 'image_base64',
+        'content_type': content_type,
+        'data': await asyncio.to_thread(_read_base64, image_path),
+    }
+
+async def post_to_pinterest(title: str, description: str, image_url: str = None, link: str = None, board_id: str = None,
+                            user_id: int = None, account: str = None, image_path: str = None) -> dict:
     """
     Создание пина в Pinterest
     
@@ -20,11 +51,14 @@ async def post_to_pinterest(title: str, description: str, image_url: str, link:
         image_url: URL изображения
         link: Ссылка (опционально)
         board_id: ID доски (обязательно)
+        user_id, account: Чей токен использовать (по умолчанию — аккаунт бота)
+        image_path: Локальный файл JPEG/PNG, если URL нет (загружается в запросе)
     
     Returns:
         dict: {'success': bool, 'url': str, 'pin_id': str}
     """
-    if not PINTEREST_ACCESS_TOKEN:
+    access_token = await get_access_token('pinterest', user_id, account)
+    if not access_token:
         logger.error("Pinterest Access Token не настроен")
         return {'success': False, 'error': 'Token not configured'}
     
@@ -32,9 +66,12 @@ async def post_to_pinterest(title: str, description: str, image_url: str, link:
         logger.error("Board ID обязателен для Pinterest")
         return {'success': False, 'error': 'Board ID required'}
     
+    if not image_url and not image_path:
+        return {'success': False, 'error': 'Image required'}
+    
     try:
         headers = {
-            'Authorization': f'Bearer {PINTEREST_ACCESS_TOKEN}',
+            'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json'
         }
         
@@ -42,39 +79,41 @@ async def post_to_pinterest(title: str, description: str, image_url: str, link:
             'board_id': board_id,
             'title': title,
             'description': description,
-            'media_source': {
-                'source_type': 'image_url',
-                'url': image_url
-            }
+            'media_source': await _media_source(image_url, image_path)
         }
         
         if link:
             data['link'] = link
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{PINTEREST_API_URL}/pins",
-                headers=headers,
-                json=data,
-                timeout=30
-            ) as response:
-                
-                if response.status != 201:
-                    error_text = await response.text()
-                    logger.error(f"Pinterest API error: {error_text}")
-                    return {'success': False, 'error': error_text}
-                
-                result = await response.json()
-                pin_id = result.get('id')
-                pin_url = result.get('link') or f"https://www.pinterest.com/pin/{pin_id}/"
-                
-                logger.info(f"✅ Пин создан в Pinterest: {pin_url}")
-                
-                return {
-                    'success': True,
-                    'url': pin_url,
-                    'pin_id': pin_id
-                }
+        session = get_http_session()
+        async with session.post(
+            f"{PINTEREST_API_URL}/pins",
+            headers=headers,
+            json=data,
+            timeout=aiohttp.ClientTimeout(total=30)
+        ) as response:
+            
+            await record_headers('pinterest', 'publish', response.headers, account)
+            if response.status == 429:
+                logger.warning("⏳ Pinterest 429 (publish)")
+                return rate_limited(response.headers)
+            
+            if response.status != 201:
+                error_text = await response.text()
+                logger.error(f"Pinterest API error: {error_text}")
+                return {'success': False, 'error': error_text}
+            
+            result = await response.json()
+            pin_id = result.get('id')
+            pin_url = result.get('link') or f"https://www.pinterest.com/pin/{pin_id}/"
+            
+            logger.info(f"✅ Пин создан в Pinterest: {pin_url}")
+            
+            return {
+                'success': True,
+                'url': pin_url,
+                'pin_id': pin_id
+            }
     
     except aiohttp.ClientError as e:
         logger.error(f"Ошибка HTTP при публикации в Pinterest: {e}")
@@ -84,59 +123,63 @@ async def post_to_pinterest(title: str, description: str, image_url: str, link:
         logger.error(f"Неожиданная ошибка Pinterest: {e}")
         return {'success': False, 'error': str(e)}
 
-async def get_pinterest_boards() -> list:
+async def get_pinterest_boards(user_id: int = None, account: str = None) -> list:
     """Получение списка досок пользователя"""
     try:
+        access_token = await get_access_token('pinterest', user_id, account)
         headers = {
-            'Authorization': f'Bearer {PINTEREST_ACCESS_TOKEN}'
+            'Authorization': f'Bearer {access_token}'
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{PINTEREST_API_URL}/boards",
-                headers=headers,
-                timeout=15
-            ) as response:
-                
-                if response.status != 200:
-                    return []
-                
-                result = await response.json()
-                boards = []
-                
-                for board in result.get('items', []):
-                    boards.append({
-                        'id': board['id'],
-                        'name': board['name'],
-                        'description': board.get('description', ''),
-                        'pin_count': board.get('pin_count', 0)
-                    })
-                
-                return boards
+        session = get_http_session()
+        async with session.get(
+            f"{PINTEREST_API_URL}/boards",
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=15)
+        ) as response:
+            
+            await record_headers('pinterest', 'boards', response.headers, account)
+            if response.status != 200:
+                return []
+            
+            result = await response.json()
+            boards = []
+            
+            for board in result.get('items', []):
+                boards.append({
+                    'id': board['id'],
+                    'name': board['name'],
+                    'description': board.get('description', ''),
+                    'pin_count': board.get('pin_count', 0)
+                })
+            
+            return boards
     
     except Exception as e:
         logger.error(f"Ошибка получения досок Pinterest: {e}")
         return []
 
-async def delete_pinterest_pin(pin_id: str) -> bool:
+async def delete_pinterest_pin(pin_id: str, user_id: int = None, account: str = None) -> bool:
     """Удаление пина"""
     try:
+        access_token = await get_access_token('pinterest', user_id, account)
         headers = {
-            'Authorization': f'Bearer {PINTEREST_ACCESS_TOKEN}'
+            'Authorization': f'Bearer {access_token}'
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(
-                f"{PINTEREST_API_URL}/pins/{pin_id}",
-                headers=headers,
-                timeout=15
-            ) as response:
-                
-                if response.status == 204:
-                    logger.info(f"✅ Пин {pin_id} удален")
-                    return True
-                
-                return False
+        session = get_http_session()
+        async with session.delete(
+            f"{PINTEREST_API_URL}/pins/{pin_id}",
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=15)
+        ) as response:
+            
+            await record_headers('pinterest', 'delete', response.headers, account)
+            if response.status == 204:
+                logger.info(f"✅ Пин {pin_id} удален")
+                return True
+            
+            return False
     
     except Exception as e:
         logger.error(f"Ошибка удаления пина: {e}")
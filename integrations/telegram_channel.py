@@ -1,53 +1,251 @@
 """
 Интеграция с Telegram каналами
+
+Используется бот приложения (его HTTP-пул), а посты проходят через очередь
+с ограничением Telegram на количество сообщений в чат в минуту, поэтому
+накопившиеся публикации отправляются с максимально допустимой скоростью.
 """
 
-import os
+import asyncio
 import logging
-from telegram import Bot
+from contextlib import ExitStack
+from telegram import Bot, InputMediaPhoto
+from telegram.error import RetryAfter
+from config.settings import TELEGRAM_TOKEN, TELEGRAM_CHANNEL_ID, CHANNEL_MESSAGES_PER_MINUTE
+from services.rate_limits import configure_limit, wait_for_budget, record_retry_after
 
 logger = logging.getLogger(__name__)
 
-TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
-TELEGRAM_CHANNEL_ID = os.getenv('TELEGRAM_CHANNEL_ID', '')
+# Максимум фото в одном альбоме
+MAX_ALBUM_SIZE = 10
+
+# Сколько раз повторять отправку после RetryAfter
+MAX_RETRY_AFTER = 3
+
+_bot = None
+_own_bot = False
+
+def set_channel_bot(bot: Bot):
+    """Использовать бот приложения для публикаций"""
+    global _bot, _own_bot
+    _bot = bot
+    _own_bot = False
+
+async def get_channel_bot() -> Bot:
+    """Бот для публикаций (свой создаётся один раз, если бот приложения не передан)"""
+    global _bot, _own_bot
+    if _bot is None:
+        _bot = Bot(token=TELEGRAM_TOKEN)
+        _own_bot = True
+        await _bot.initialize()
+    return _bot
 
 def is_telegram_channel_configured():
     """Проверка настроен ли канал"""
     return bool(TELEGRAM_CHANNEL_ID)
 
-async def post_to_telegram_channel(text: str, image_path: str = None, channel_id: str = None) -> dict:
-    """Публикация в Telegram канал"""
-    
+# ========================================
+# ОЧЕРЕДЬ ОТПРАВКИ
+# ========================================
+
+class ChannelSender:
+    """
+    Очередь публикаций с ограничением скорости по каждому чату
+
+    Для каждого чата запускается свой обработчик: медленный канал не задерживает
+    остальные. Альбом из N фото считается как N сообщений. Бюджет чата берётся
+    из общего журнала лимитов, поэтому его делят все процессы бота.
+    """
+
+    def __init__(self, per_minute: int = CHANNEL_MESSAGES_PER_MINUTE):
+        self.per_minute = max(1, per_minute)
+        self._queues = {}    # chat_id -> asyncio.Queue
+        self._workers = {}   # chat_id -> asyncio.Task
+        self._closed = False
+
+    def submit(self, chat_id: str, text: str, images: list = None) -> asyncio.Future:
+        """Поставить пост в очередь (Future с результатом публикации)"""
+        if self._closed:
+            raise RuntimeError("Очередь публикаций остановлена")
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = asyncio.Queue()
+            self._workers[chat_id] = asyncio.create_task(self._worker(chat_id, queue))
+
+        queue.put_nowait((text, images, future))
+        return future
+
+    @property
+    def pending(self) -> int:
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    async def _wait_capacity(self, chat_id: str, cost: int):
+        """Ожидание, пока в минутном окне чата хватит места на cost сообщений"""
+        await configure_limit('telegram', 'sendMessage', self.per_minute, 60, account=chat_id)
+        await wait_for_budget('telegram', 'sendMessage', account=chat_id, cost=min(cost, self.per_minute))
+
+    async def _worker(self, chat_id: str, queue: asyncio.Queue):
+        while True:
+            text, images, future = await queue.get()
+            try:
+                if future.cancelled():
+                    continue
+
+                for attempt in range(MAX_RETRY_AFTER + 1):
+                    await self._wait_capacity(chat_id, max(1, len(images or [])))
+                    try:
+                        result = await _send(chat_id, text, images)
+                        break
+                    except RetryAfter as e:
+                        if attempt == MAX_RETRY_AFTER:
+                            raise
+                        retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                        logger.warning(f"⏳ Telegram просит подождать {retry_after} сек ({chat_id})")
+                        await record_retry_after('telegram', 'sendMessage', retry_after, account=chat_id)
+
+                if not future.done():
+                    future.set_result(result)
+
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                queue.task_done()
+
+    async def drain(self):
+        """Дождаться отправки всех постов в очереди"""
+        await asyncio.gather(*(queue.join() for queue in self._queues.values()))
+
+    async def close(self):
+        """Остановка обработчиков (неотправленные посты завершаются ошибкой)"""
+        self._closed = True
+
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+        for queue in self._queues.values():
+            while not queue.empty():
+                _, _, future = queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Очередь публикаций остановлена"))
+
+_sender = None
+
+def start_channel_sender(per_minute: int = CHANNEL_MESSAGES_PER_MINUTE) -> ChannelSender:
+    """Запуск очереди публикаций (вызывается при старте приложения)"""
+    global _sender
+    if _sender is None:
+        _sender = ChannelSender(per_minute)
+        logger.info(f"✅ Очередь публикаций в каналы: {_sender.per_minute} сообщений/мин")
+    return _sender
+
+async def stop_channel_sender():
+    """Остановка очереди публикаций и своего бота"""
+    global _sender, _bot, _own_bot
+
+    if _sender is not None:
+        if _sender.pending:
+            logger.warning(f"⚠️ Не отправлено постов в каналы: {_sender.pending}")
+        await _sender.close()
+        _sender = None
+
+    if _bot is not None and _own_bot:
+        await _bot.shutdown()
+        _bot = None
+        _own_bot = False
+
+# ========================================
+# ПУБЛИКАЦИЯ
+# ========================================
+
+async def _send(chat_id: str, text: str, images: list = None):
+    """Отправка поста: текст, фото с подписью или альбом"""
+    bot = await get_channel_bot()
+
+    if not images:
+        return await bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            parse_mode='Markdown'
+        )
+
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(path, 'rb')) for path in images]
+
+        if len(files) == 1:
+            return await bot.send_photo(
+                chat_id=chat_id,
+                photo=files[0],
+                caption=text,
+                parse_mode='Markdown'
+            )
+
+        # Подпись альбома — у первого фото
+        media = [
+            InputMediaPhoto(media=f, caption=text if i == 0 else None, parse_mode='Markdown' if i == 0 else None)
+            for i, f in enumerate(files)
+        ]
+        messages = await bot.send_media_group(chat_id=chat_id, media=media)
+        return messages[0]
+
+async def post_to_telegram_channel(text: str, image_path: str = None, channel_id: str = None, images: list = None) -> dict:
+    """
+    Публикация в Telegram канал
+
+    Args:
+        text: Текст поста (подпись к фото/альбому)
+        image_path: Путь к одному изображению
+        channel_id: Канал (по умолчанию TELEGRAM_CHANNEL_ID)
+        images: Список путей к изображениям для альбома (до 10)
+
+    Если очередь публикаций запущена, пост отправляется через неё
+    с соблюдением лимита Telegram.
+    """
+
     channel = channel_id or TELEGRAM_CHANNEL_ID
-    
+
     if not channel:
         logger.warning("⚠️ Telegram канал не настроен")
         return {'success': False, 'error': 'Channel not configured'}
-    
+
+    images = list(images or [])
+    if image_path:
+        images.insert(0, image_path)
+
+    if len(images) > MAX_ALBUM_SIZE:
+        return {'success': False, 'error': f'Album is limited to {MAX_ALBUM_SIZE} images'}
+
     try:
-        bot = Bot(token=TELEGRAM_TOKEN)
-        
-        if image_path:
-            with open(image_path, 'rb') as photo:
-                message = await bot.send_photo(
-                    chat_id=channel,
-                    photo=photo,
-                    caption=text,
-                    parse_mode='Markdown'
-                )
+        if _sender is not None:
+            message = await _sender.submit(channel, text, images)
         else:
-            message = await bot.send_message(
-                chat_id=channel,
-                text=text,
-                parse_mode='Markdown'
-            )
-        
-        channel_username = channel.replace('@', '')
+            message = await _send(channel, text, images)
+
+        channel_username = str(channel).replace('@', '')
         post_url = f"https://t.me/{channel_username}/{message.message_id}"
-        
+
         logger.info(f"✅ Пост в Telegram: {post_url}")
         return {'success': True, 'url': post_url, 'message_id': message.message_id}
-    
+
     except Exception as e:
         logger.error(f"❌ Ошибка Telegram: {e}")
         return {'success': False, 'error': str(e)}
+
+async def post_many_to_telegram_channel(posts: list, channel_id: str = None) -> list:
+    """
+    Публикация пачки постов (например, накопившихся запланированных)
+
+    Args:
+        posts: Список dict с ключами text и (необязательно) images
+
+    Returns:
+        list: Результаты в том же порядке
+    """
+    start_channel_sender()
+    return await asyncio.gather(*(
+        post_to_telegram_channel(post['text'], channel_id=channel_id, images=post.get('images'))
+        for post in posts
+    ))
@@ -2,35 +2,63 @@
 Интеграция с TikTok API
 """
 
+import os
 import logging
 import aiohttp
-from config.settings import TIKTOK_CLIENT_KEY, TIKTOK_CLIENT_SECRET, TIKTOK_ACCESS_TOKEN
+from config.settings import TIKTOK_CLIENT_KEY, TIKTOK_USERNAME
+from services.tokens import get_access_token
+from services.rate_limits import record_headers, rate_limited
+from integrations.uploads import (
+    ChunkedUploader,
+    UploadError,
+    plan_chunks,
+    load_upload_state,
+    save_upload_state,
+    clear_upload_state,
+)
+from utils.http import get_http_session
 
 logger = logging.getLogger(__name__)
 
-TIKTOK_API_URL = "https://open.tiktokapis.com/v2"
+TIKTOK_API_URL = os.getenv('TIKTOK_API_URL', 'https://open.tiktokapis.com/v2')
 
-async def post_to_tiktok(video_path: str, caption: str, hashtags: list = None) -> dict:
+# Размер чанка: TikTok принимает 5-64 МБ (файлы меньше 5 МБ — одним чанком)
+TIKTOK_CHUNK_SIZE = 10 * 1024 * 1024
+
+# TikTok принимает чанки только последовательно
+TIKTOK_UPLOAD_PARALLELISM = 1
+
+# upload_url действителен 1 час
+TIKTOK_UPLOAD_URL_TTL = 55 * 60
+
+async def post_to_tiktok(video_path: str, caption: str, hashtags: list = None, progress=None,
+                         user_id: int = None, account: str = None) -> dict:
     """
     Загрузка видео в TikTok
     
     Note: TikTok API требует одобрения и работает только с бизнес-аккаунтами
     
+    Видео загружается чанками; при сбое повторный вызов продолжает загрузку
+    с последнего подтверждённого чанка.
+    
     Args:
         video_path: Путь к видео файлу
         caption: Описание видео
         hashtags: Список хештегов
+        progress: Обработчик прогресса (uploaded_bytes, total_bytes)
+        user_id, account: Чей токен использовать (по умолчанию — аккаунт бота)
     
     Returns:
         dict: {'success': bool, 'url': str, 'video_id': str}
     """
-    if not TIKTOK_CLIENT_KEY or not TIKTOK_ACCESS_TOKEN:
+    access_token = await get_access_token('tiktok', user_id, account)
+    if not TIKTOK_CLIENT_KEY or not access_token:
         logger.error("TikTok API не настроен")
         return {'success': False, 'error': 'API not configured'}
     
     try:
         headers = {
-            'Authorization': f'Bearer {TIKTOK_ACCESS_TOKEN}',
+            'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json'
         }
         
@@ -43,111 +71,143 @@ async def post_to_tiktok(video_path: str, caption: str, hashtags: list = None) -
         if len(full_caption) > 2200:
             full_caption = full_caption[:2197] + '...'
         
-        # TikTok требует сначала инициализировать загрузку
-        init_data = {
-            'post_info': {
-                'title': full_caption,
-                'privacy_level': 'PUBLIC_TO_EVERYONE',
-                'disable_duet': False,
-                'disable_comment': False,
-                'disable_stitch': False,
-                'video_cover_timestamp_ms': 1000
-            },
-            'source_info': {
-                'source': 'FILE_UPLOAD',
-                'video_size': os.path.getsize(video_path),
-                'chunk_size': 10000000,
-                'total_chunk_count': 1
-            }
-        }
+        video_size = os.path.getsize(video_path)
+        chunk_size = min(TIKTOK_CHUNK_SIZE, video_size)
+        session = get_http_session()
+        
+        # Незавершённая загрузка этого файла — продолжаем её
+        state = load_upload_state(video_path, 'tiktok', max_age=TIKTOK_UPLOAD_URL_TTL)
         
-        async with aiohttp.ClientSession() as session:
-            # Инициализация загрузки
+        if not state:
+            # TikTok требует сначала инициализировать загрузку
+            init_data = {
+                'post_info': {
+                    'title': full_caption,
+                    'privacy_level': 'PUBLIC_TO_EVERYONE',
+                    'disable_duet': False,
+                    'disable_comment': False,
+                    'disable_stitch': False,
+                    'video_cover_timestamp_ms': 1000
+                },
+                'source_info': {
+                    'source': 'FILE_UPLOAD',
+                    'video_size': video_size,
+                    'chunk_size': chunk_size,
+                    'total_chunk_count': len(plan_chunks(video_size, chunk_size))
+                }
+            }
+            
             async with session.post(
                 f"{TIKTOK_API_URL}/post/publish/inbox/video/init/",
                 headers=headers,
                 json=init_data,
-                timeout=30
+                timeout=aiohttp.ClientTimeout(total=30)
             ) as response:
                 
+                await record_headers('tiktok', 'publish', response.headers, account)
+                if response.status == 429:
+                    logger.warning("⏳ TikTok 429 (publish)")
+                    return rate_limited(response.headers)
+                
                 if response.status != 200:
                     error = await response.text()
                     logger.error(f"TikTok init error: {error}")
                     return {'success': False, 'error': error}
                 
                 init_result = await response.json()
-                publish_id = init_result['data']['publish_id']
-                upload_url = init_result['data']['upload_url']
             
-            # Загрузка видео
-            with open(video_path, 'rb') as video_file:
-                async with session.put(
-                    upload_url,
-                    data=video_file,
-                    timeout=300
-                ) as upload_response:
-                    
-                    if upload_response.status != 200:
-                        return {'success': False, 'error': 'Upload failed'}
+            state = {
+                'publish_id': init_result['data']['publish_id'],
+                'upload_url': init_result['data']['upload_url'],
+                'chunk_size': chunk_size,
+                'acked': [],
+            }
+            save_upload_state(video_path, 'tiktok', state)
+        
+        def on_ack(acked: list):
+            state['acked'] = acked
+            save_upload_state(video_path, 'tiktok', state)
+        
+        # Загрузка видео чанками
+        uploader = ChunkedUploader(
+            video_path,
+            state['upload_url'],
+            chunk_size=state['chunk_size'],
+            parallelism=TIKTOK_UPLOAD_PARALLELISM,
+            content_type='video/mp4',
+            progress=progress,
+            acked=state['acked'],
+            on_ack=on_ack
+        )
+        await uploader.upload(session)
+        
+        # Проверка статуса публикации
+        async with session.post(
+            f"{TIKTOK_API_URL}/post/publish/status/fetch/",
+            headers=headers,
+            json={'publish_id': state['publish_id']},
+            timeout=aiohttp.ClientTimeout(total=30)
+        ) as status_response:
             
-            # Публикация
-            async with session.post(
-                f"{TIKTOK_API_URL}/post/publish/status/fetch/",
-                headers=headers,
-                json={'publish_id': publish_id},
-                timeout=30
-            ) as status_response:
-                
-                result = await status_response.json()
-                
-                if result.get('data', {}).get('status') == 'PUBLISH_COMPLETE':
-                    video_id = result['data']['video_id']
-                    video_url = f"https://www.tiktok.com/@{INSTAGRAM_USERNAME}/video/{video_id}"
-                    
-                    logger.info(f"✅ Видео опубликовано в TikTok: {video_url}")
-                    
-                    return {
-                        'success': True,
-                        'url': video_url,
-                        'video_id': video_id
-                    }
-                else:
-                    return {'success': False, 'error': 'Publishing failed'}
+            await record_headers('tiktok', 'status', status_response.headers, account)
+            result = await status_response.json()
+        
+        clear_upload_state(video_path, 'tiktok')
+        
+        if result.get('data', {}).get('status') == 'PUBLISH_COMPLETE':
+            video_id = result['data']['video_id']
+            video_url = f"https://www.tiktok.com/@{TIKTOK_USERNAME}/video/{video_id}"
+            
+            logger.info(f"✅ Видео опубликовано в TikTok: {video_url}")
+            
+            return {
+                'success': True,
+                'url': video_url,
+                'video_id': video_id
+            }
+        else:
+            return {'success': False, 'error': 'Publishing failed'}
+    
+    except UploadError as e:
+        logger.error(f"Загрузка в TikTok прервана (будет продолжена при повторе): {e}")
+        return {'success': False, 'error': str(e), 'resumable': True}
     
     except Exception as e:
         logger.error(f"Ошибка публикации в TikTok: {e}")
         return {'success': False, 'error': str(e)}
 
-async def get_tiktok_user_info() -> dict:
+async def get_tiktok_user_info(user_id: int = None, account: str = None) -> dict:
     """Получение информации о пользователе TikTok"""
     try:
-        if not TIKTOK_ACCESS_TOKEN:
+        access_token = await get_access_token('tiktok', user_id, account)
+        if not access_token:
             return {}
         
         headers = {
-            'Authorization': f'Bearer {TIKTOK_ACCESS_TOKEN}'
+            'Authorization': f'Bearer {access_token}'
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{TIKTOK_API_URL}/user/info/",
-                headers=headers,
-                timeout=15
-            ) as response:
-                
-                if response.status != 200:
-                    return {}
-                
-                data = await response.json()
-                user = data.get('data', {}).get('user', {})
-                
-                return {
-                    'display_name': user.get('display_name'),
-                    'follower_count': user.get('follower_count', 0),
-                    'following_count': user.get('following_count', 0),
-                    'likes_count': user.get('likes_count', 0),
-                    'video_count': user.get('video_count', 0),
-                }
+        session = get_http_session()
+        async with session.get(
+            f"{TIKTOK_API_URL}/user/info/",
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=15)
+        ) as response:
+            
+            await record_headers('tiktok', 'user_info', response.headers, account)
+            if response.status != 200:
+                return {}
+            
+            data = await response.json()
+            user = data.get('data', {}).get('user', {})
+            
+            return {
+                'display_name': user.get('display_name'),
+                'follower_count': user.get('follower_count', 0),
+                'following_count': user.get('following_count', 0),
+                'likes_count': user.get('likes_count', 0),
+                'video_count': user.get('video_count', 0),
+            }
     
     except Exception as e:
         logger.error(f"Ошибка получения информации TikTok: {e}")
@@ -1,9 +1,19 @@
 """
 Интеграция с X (Twitter)
+
+Клиенты создаются один раз, блокирующие вызовы tweepy выполняются в пуле
+потоков. Заголовки x-rate-limit-* записываются в общий журнал лимитов по
+каждому эндпоинту, чтобы планировщик публикаций мог дождаться окна,
+а не получать ошибку 429.
 """
 
 import os
+import time
+import asyncio
 import logging
+import threading
+from urllib.parse import urlparse
+from services.rate_limits import RateLimitExceeded, check_budget, record_limit, record_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -13,53 +23,196 @@ TWITTER_ACCESS_TOKEN = os.getenv('TWITTER_ACCESS_TOKEN', '')
 TWITTER_ACCESS_SECRET = os.getenv('TWITTER_ACCESS_SECRET', '')
 TWITTER_BEARER_TOKEN = os.getenv('TWITTER_BEARER_TOKEN', '')
 
+# Аккаунт в журнале лимитов — ID пользователя из access token
+TWITTER_ACCOUNT = TWITTER_ACCESS_TOKEN.split('-', 1)[0] or 'default'
+
+# Максимальная длина твита
+TWEET_MAX_LENGTH = 280
+
+# Файлы больше этого размера (и все видео/GIF) загружаются через chunked upload
+TWITTER_SIMPLE_UPLOAD_LIMIT = 5 * 1024 * 1024
+
+# Эндпоинты для учёта лимитов
+TWEET_ENDPOINT = 'POST /2/tweets'
+MEDIA_ENDPOINT = 'POST /1.1/media/upload.json'
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v')
+
 def is_twitter_configured():
     """Проверка настроен ли Twitter"""
     return bool(TWITTER_API_KEY and TWITTER_ACCESS_TOKEN)
 
+class TwitterPublisher:
+    """
+    Публикация твитов с переиспользуемыми клиентами и учётом rate limit
+
+    Лимиты из заголовков сохраняются в общий журнал (services.rate_limits),
+    и перед каждым запросом бюджет списывается из него.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._api = None
+        self._lock = threading.Lock()
+        self.rate_limits = {}  # endpoint -> {'limit', 'remaining', 'reset'}
+        self._dirty = set()    # эндпоинты, ещё не записанные в журнал
+
+    def _record_rate_limit(self, response, *args, **kwargs):
+        """Хук requests: сохраняет x-rate-limit-* ответа"""
+        headers = response.headers
+        if 'x-rate-limit-remaining' not in headers:
+            return
+
+        endpoint = f"{response.request.method} {urlparse(response.url).path}"
+        try:
+            self.rate_limits[endpoint] = {
+                'limit': int(headers.get('x-rate-limit-limit', 0)),
+                'remaining': int(headers['x-rate-limit-remaining']),
+                'reset': int(headers.get('x-rate-limit-reset', 0)),
+            }
+            self._dirty.add(endpoint)
+        except ValueError:
+            pass
+
+    async def _flush_limits(self):
+        """Запись новых значений лимитов в общий журнал"""
+        while self._dirty:
+            endpoint = self._dirty.pop()
+            limit = self.rate_limits[endpoint]
+            await record_limit(
+                'twitter', endpoint, TWITTER_ACCOUNT,
+                quota=limit['limit'] or None,
+                remaining=limit['remaining'],
+                reset_at=limit['reset'] or None
+            )
+
+    def _clients(self):
+        """Клиенты API v2 и v1.1 (создаются при первом вызове)"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import tweepy
+
+                    api = tweepy.API(tweepy.OAuth1UserHandler(
+                        TWITTER_API_KEY,
+                        TWITTER_API_SECRET,
+                        TWITTER_ACCESS_TOKEN,
+                        TWITTER_ACCESS_SECRET
+                    ))
+                    client = tweepy.Client(
+                        bearer_token=TWITTER_BEARER_TOKEN,
+                        consumer_key=TWITTER_API_KEY,
+                        consumer_secret=TWITTER_API_SECRET,
+                        access_token=TWITTER_ACCESS_TOKEN,
+                        access_token_secret=TWITTER_ACCESS_SECRET
+                    )
+
+                    for session in (api.session, client.session):
+                        session.hooks['response'].append(self._record_rate_limit)
+
+                    self._api = api
+                    self._client = client
+
+        return self._client, self._api
+
+    def wait_time(self, endpoint: str) -> float:
+        """Сколько секунд ждать до восстановления лимита эндпоинта (0 — можно вызывать)"""
+        limit = self.rate_limits.get(endpoint)
+        if not limit or limit['remaining'] > 0:
+            return 0.0
+        return max(0.0, limit['reset'] - time.time())
+
+    def _upload_media(self, path: str):
+        _, api = self._clients()
+        is_video = path.lower().endswith(VIDEO_EXTENSIONS)
+        is_gif = path.lower().endswith('.gif')
+
+        if is_video or is_gif or os.path.getsize(path) > TWITTER_SIMPLE_UPLOAD_LIMIT:
+            category = 'tweet_video' if is_video else 'tweet_gif' if is_gif else 'tweet_image'
+            return api.media_upload(path, chunked=True, media_category=category)
+
+        return api.media_upload(path)
+
+    async def upload_media(self, path: str) -> str:
+        """
+        Загрузка медиа в отдельном потоке (большие файлы и видео — частями)
+
+        Raises:
+            RateLimitExceeded: Бюджет эндпоинта загрузки исчерпан
+        """
+        await check_budget('twitter', MEDIA_ENDPOINT, TWITTER_ACCOUNT)
+        try:
+            media = await asyncio.to_thread(self._upload_media, path)
+        finally:
+            await self._flush_limits()
+        return str(media.media_id)
+
+    async def publish(self, text: str, media_paths: list = None, media_ids: list = None) -> dict:
+        """
+        Публикация твита
+
+        Args:
+            text: Текст (обрезается до 280 символов)
+            media_paths: Файлы для загрузки (до 4)
+            media_ids: Уже загруженные медиа
+
+        Returns:
+            dict: {'success', 'url', 'tweet_id'}; при исчерпанном лимите —
+                {'success': False, 'error': 'rate_limited', 'retry_after': секунды}
+        """
+        if not is_twitter_configured():
+            logger.warning("⚠️ Twitter API не настроен")
+            return {'success': False, 'error': 'Twitter API not configured'}
+
+        try:
+            import tweepy
+
+            # Не тратим запросы, если окно лимита ещё не открылось
+            await check_budget('twitter', TWEET_ENDPOINT, TWITTER_ACCOUNT)
+
+            if len(text) > TWEET_MAX_LENGTH:
+                text = text[:TWEET_MAX_LENGTH - 3] + '...'
+
+            media_ids = list(media_ids or [])
+            if media_paths:
+                media_ids += await asyncio.gather(*(self.upload_media(path) for path in media_paths[:4]))
+
+            client, _ = self._clients()
+            try:
+                response = await asyncio.to_thread(client.create_tweet, text=text, media_ids=media_ids or None)
+            finally:
+                await self._flush_limits()
+
+            tweet_id = response.data['id']
+            tweet_url = f"https://twitter.com/user/status/{tweet_id}"
+
+            logger.info(f"✅ Твит опубликован: {tweet_url}")
+            return {'success': True, 'url': tweet_url, 'tweet_id': str(tweet_id)}
+
+        except RateLimitExceeded as e:
+            logger.warning(f"⏳ {e}")
+            return {'success': False, 'error': 'rate_limited', 'retry_after': e.retry_after}
+
+        except tweepy.TooManyRequests as e:
+            endpoint = f"{e.response.request.method} {urlparse(e.response.url).path}"
+            retry_after = self.wait_time(endpoint) or 60
+            await record_retry_after('twitter', endpoint, retry_after, TWITTER_ACCOUNT)
+            logger.warning(f"⏳ Twitter 429 ({endpoint}), повтор через {int(retry_after)} сек")
+            return {'success': False, 'error': 'rate_limited', 'retry_after': retry_after}
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка Twitter: {e}")
+            return {'success': False, 'error': str(e)}
+
+_publisher = None
+
+def get_twitter_publisher() -> TwitterPublisher:
+    """Общий экземпляр публикатора"""
+    global _publisher
+    if _publisher is None:
+        _publisher = TwitterPublisher()
+    return _publisher
+
 async def post_to_twitter(text: str, image_path: str = None) -> dict:
     """Публикация твита"""
-    
-    if not is_twitter_configured():
-        logger.warning("⚠️ Twitter API не настроен")
-        return {'success': False, 'error': 'Twitter API not configured'}
-    
-    try:
-        import tweepy
-        
-        client = tweepy.Client(
-            bearer_token=TWITTER_BEARER_TOKEN,
-            consumer_key=TWITTER_API_KEY,
-            consumer_secret=TWITTER_API_SECRET,
-            access_token=TWITTER_ACCESS_TOKEN,
-            access_token_secret=TWITTER_ACCESS_SECRET
-        )
-        
-        # Обрезаем если слишком длинный
-        if len(text) > 280:
-            text = text[:277] + '...'
-        
-        # Публикуем
-        if image_path:
-            # Для изображений нужен API v1.1
-            auth = tweepy.OAuth1UserHandler(
-                TWITTER_API_KEY,
-                TWITTER_API_SECRET,
-                TWITTER_ACCESS_TOKEN,
-                TWITTER_ACCESS_SECRET
-            )
-            api = tweepy.API(auth)
-            media = api.media_upload(image_path)
-            response = client.create_tweet(text=text, media_ids=[media.media_id])
-        else:
-            response = client.create_tweet(text=text)
-        
-        tweet_id = response.data['id']
-        tweet_url = f"https://twitter.com/user/status/{tweet_id}"
-        
-        logger.info(f"✅ Твит опубликован: {tweet_url}")
-        return {'success': True, 'url': tweet_url, 'tweet_id': str(tweet_id)}
-    
-    except Exception as e:
-        logger.error(f"❌ Ошибка Twitter: {e}")
-        return {'success': False, 'error': str(e)}
+    return await get_twitter_publisher().publish(text, media_paths=[image_path] if image_path else None)
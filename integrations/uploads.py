@@ -0,0 +1,330 @@
+"""
+Загрузка больших файлов частями: mmap, параллельные чанки, докачка
+
+Состояние загрузки хранится рядом с файлом (<файл>.<тип>.upload.json),
+поэтому после перезапуска бота загрузка продолжается с подтверждённых чанков.
+
+Локальный тестовый сервер:
+    python -m integrations.uploads --port 8085 --fail-rate 0.2
+"""
+
+import os
+import json
+import mmap
+import time
+import asyncio
+import logging
+import inspect
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# ========================================
+# СОСТОЯНИЕ ЗАГРУЗКИ (для докачки)
+# ========================================
+
+def _state_path(file_path: str, kind: str) -> str:
+    return f"{file_path}.{kind}.upload.json"
+
+def load_upload_state(file_path: str, kind: str, max_age: float = None) -> dict:
+    """Сохранённое состояние загрузки (None, если файл изменился или состояние устарело)"""
+    try:
+        with open(_state_path(file_path, kind), encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    stat = os.stat(file_path)
+    if state.get('size') != stat.st_size or state.get('mtime') != int(stat.st_mtime):
+        return None
+
+    if max_age and time.time() - state.get('created_at', 0) > max_age:
+        return None
+
+    return state
+
+def save_upload_state(file_path: str, kind: str, state: dict):
+    """Сохранение состояния загрузки (атомарно)"""
+    stat = os.stat(file_path)
+    state.setdefault('created_at', time.time())
+    state['size'] = stat.st_size
+    state['mtime'] = int(stat.st_mtime)
+
+    path = _state_path(file_path, kind)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+def clear_upload_state(file_path: str, kind: str):
+    """Удаление состояния после успешной загрузки"""
+    try:
+        os.remove(_state_path(file_path, kind))
+    except OSError:
+        pass
+
+async def emit_progress(callback, uploaded: int, total: int):
+    """Вызов обработчика прогресса (sync или async)"""
+    if not callback:
+        return
+
+    try:
+        result = callback(uploaded, total)
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        logger.warning(f"Ошибка обработчика прогресса: {e}")
+
+class TelegramProgress:
+    """
+    Обработчик прогресса, который показывает загрузку в чате Telegram
+
+    Сообщение редактируется не чаще раза в min_interval секунд.
+    """
+
+    def __init__(self, bot, chat_id: int, title: str = 'Загрузка', min_interval: float = 5.0):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.title = title
+        self.min_interval = min_interval
+        self._message = None
+        self._last_update = 0.0
+        self._last_percent = -1
+
+    async def __call__(self, uploaded: int, total: int):
+        percent = int(uploaded * 100 / total) if total else 100
+        now = time.monotonic()
+
+        if percent == self._last_percent or (percent < 100 and now - self._last_update < self.min_interval):
+            return
+
+        self._last_update = now
+        self._last_percent = percent
+        bar = '█' * (percent // 10) + '░' * (10 - percent // 10)
+        text = f"📤 {self.title}: {bar} {percent}% ({uploaded // (1024 * 1024)}/{total // (1024 * 1024)} МБ)"
+
+        if self._message is None:
+            self._message = await self.bot.send_message(chat_id=self.chat_id, text=text)
+        else:
+            await self._message.edit_text(text)
+
+# ========================================
+# ЗАГРУЗКА ЧАСТЯМИ
+# ========================================
+
+class UploadError(Exception):
+    """Чанк не удалось загрузить"""
+    pass
+
+def plan_chunks(size: int, chunk_size: int) -> list:
+    """
+    Разбиение файла на чанки [(start, end)]
+
+    Последний чанк забирает остаток (как требует TikTok: количество чанков —
+    целая часть size / chunk_size).
+    """
+    if size <= chunk_size:
+        return [(0, size)]
+
+    count = size // chunk_size
+    chunks = [(i * chunk_size, (i + 1) * chunk_size) for i in range(count)]
+    chunks[-1] = (chunks[-1][0], size)
+    return chunks
+
+class ChunkedUploader:
+    """
+    Загрузка файла частями через PUT с Content-Range
+
+    Файл отображается в память (mmap) и отправляется срезами memoryview,
+    поэтому целиком в RAM не читается.
+    """
+
+    def __init__(self, file_path: str, upload_url: str, chunk_size: int, parallelism: int = 1,
+                 content_type: str = 'application/octet-stream', progress=None,
+                 acked: list = None, on_ack=None, retries: int = 3, timeout: float = 120):
+        self.file_path = file_path
+        self.upload_url = upload_url
+        self.size = os.path.getsize(file_path)
+        self.chunks = plan_chunks(self.size, chunk_size)
+        self.parallelism = max(1, parallelism)
+        self.content_type = content_type
+        self.progress = progress
+        self.acked = set(acked or [])
+        self.on_ack = on_ack
+        self.retries = retries
+        self.timeout = timeout
+
+    @property
+    def uploaded_bytes(self) -> int:
+        return sum(self.chunks[i][1] - self.chunks[i][0] for i in self.acked)
+
+    @property
+    def resume_offset(self) -> int:
+        """Смещение, до которого все чанки подтверждены подряд"""
+        offset = 0
+        for i, (start, end) in enumerate(self.chunks):
+            if i not in self.acked:
+                break
+            offset = end
+        return offset
+
+    async def upload(self, session: aiohttp.ClientSession) -> dict:
+        """
+        Загрузка всех неподтверждённых чанков
+
+        Returns:
+            dict: Ответ сервера на последний чанк (если он JSON), иначе {}
+        """
+        pending = [i for i in range(len(self.chunks)) if i not in self.acked]
+        if self.acked:
+            logger.info(f"Докачка {self.file_path} с {self.resume_offset} байт ({len(self.acked)}/{len(self.chunks)} чанков)")
+
+        semaphore = asyncio.Semaphore(self.parallelism)
+        last_response = {}
+
+        with open(self.file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                async def upload_one(index: int):
+                    nonlocal last_response
+                    async with semaphore:
+                        response = await self._put_chunk(session, view, index)
+                    if index == len(self.chunks) - 1:
+                        last_response = response
+                    self.acked.add(index)
+                    if self.on_ack:
+                        self.on_ack(sorted(self.acked))
+                    await emit_progress(self.progress, self.uploaded_bytes, self.size)
+
+                if self.parallelism == 1:
+                    for index in pending:
+                        await upload_one(index)
+                else:
+                    # Последний чанк отправляем после остальных: по нему сервер завершает загрузку
+                    *body, last = pending or [None]
+                    results = await asyncio.gather(*(upload_one(i) for i in body), return_exceptions=True)
+                    errors = [r for r in results if isinstance(r, BaseException)]
+                    if errors:
+                        raise errors[0]
+                    if last is not None:
+                        await upload_one(last)
+            finally:
+                view.release()
+
+        return last_response
+
+    async def _put_chunk(self, session: aiohttp.ClientSession, view: memoryview, index: int) -> dict:
+        start, end = self.chunks[index]
+        headers = {
+            'Content-Type': self.content_type,
+            'Content-Length': str(end - start),
+            'Content-Range': f"bytes {start}-{end - 1}/{self.size}",
+        }
+
+        for attempt in range(self.retries + 1):
+            chunk = view[start:end]
+            try:
+                async with session.put(
+                    self.upload_url,
+                    data=chunk,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                ) as response:
+                    if response.status in (200, 201, 206):
+                        if response.content_type == 'application/json':
+                            return await response.json()
+                        return {}
+
+                    error = f"HTTP {response.status}: {(await response.text())[:200]}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+            finally:
+                chunk.release()
+
+            logger.warning(f"Чанк {index + 1}/{len(self.chunks)} не загружен (попытка {attempt + 1}): {error}")
+            if attempt < self.retries:
+                await asyncio.sleep(2 ** attempt)
+
+        raise UploadError(f"Чанк {index + 1}/{len(self.chunks)}: {error}")
+
+# ========================================
+# ЛОКАЛЬНЫЙ ТЕСТОВЫЙ СЕРВЕР
+# ========================================
+
+def create_stub_app(storage_dir: str, fail_rate: float = 0.0):
+    """
+    Заглушка API загрузки (совместима с TikTok Content Posting API)
+
+    TIKTOK_API_URL=http://localhost:8085/v2 направляет интеграцию на заглушку.
+    fail_rate — доля чанков, на которые сервер отвечает 500.
+    """
+    import random
+    import uuid
+    from aiohttp import web
+
+    uploads = {}
+
+    async def init_upload(request):
+        data = await request.json()
+        source = data.get('source_info', {})
+        publish_id = uuid.uuid4().hex
+        uploads[publish_id] = {'size': source.get('video_size', 0), 'received': 0}
+        upload_url = f"{request.scheme}://{request.host}/upload/{publish_id}"
+        return web.json_response({'data': {'publish_id': publish_id, 'upload_url': upload_url}})
+
+    async def put_chunk(request):
+        publish_id = request.match_info['publish_id']
+        if publish_id not in uploads:
+            return web.Response(status=404)
+
+        if random.random() < fail_rate:
+            return web.Response(status=500, text='injected failure')
+
+        unit, _, rest = request.headers.get('Content-Range', '').partition(' ')
+        span, _, total = rest.partition('/')
+        start, _, end = span.partition('-')
+        body = await request.read()
+
+        if unit != 'bytes' or len(body) != int(end) - int(start) + 1:
+            return web.Response(status=400, text='bad Content-Range')
+
+        path = os.path.join(storage_dir, publish_id)
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            f.seek(int(start))
+            f.write(body)
+
+        upload = uploads[publish_id]
+        upload['received'] += len(body)
+        return web.Response(status=201 if upload['received'] >= int(total) else 206)
+
+    async def fetch_status(request):
+        data = await request.json()
+        upload = uploads.get(data.get('publish_id'))
+        if not upload:
+            return web.json_response({'error': {'code': 'not_found'}}, status=404)
+
+        done = upload['received'] >= upload['size']
+        return web.json_response({'data': {
+            'status': 'PUBLISH_COMPLETE' if done else 'PROCESSING_UPLOAD',
+            'video_id': data['publish_id'] if done else None,
+        }})
+
+    app = web.Application(client_max_size=256 * 1024 * 1024)
+    app.router.add_post('/v2/post/publish/inbox/video/init/', init_upload)
+    app.router.add_put('/upload/{publish_id}', put_chunk)
+    app.router.add_post('/v2/post/publish/status/fetch/', fetch_status)
+    return app
+
+if __name__ == '__main__':
+    import argparse
+    import tempfile
+    from aiohttp import web
+
+    parser = argparse.ArgumentParser(description='Тестовый сервер загрузки чанками')
+    parser.add_argument('--port', type=int, default=8085)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--storage', default=tempfile.mkdtemp(prefix='upload_stub_'))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"Файлы сохраняются в {args.storage}")
+    web.run_app(create_stub_app(args.storage, args.fail_rate), port=args.port)
@@ -2,40 +2,151 @@
 Интеграция с YouTube Data API v3
 """
 
+import json
+import asyncio
 import logging
+import threading
+from datetime import datetime, timedelta
+import pytz
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
 from google.oauth2.credentials import Credentials
 from config.settings import (
     YOUTUBE_CLIENT_ID,
     YOUTUBE_CLIENT_SECRET,
     YOUTUBE_REFRESH_TOKEN
 )
+from integrations.uploads import emit_progress, load_upload_state, save_upload_state, clear_upload_state
+from services.tokens import token_manager
+from services.rate_limits import record_headers, retry_after_from_headers
 
 logger = logging.getLogger(__name__)
 
+# Размер чанка загрузки (должен быть кратен 256 КБ)
+YOUTUBE_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Сессия resumable upload действительна неделю
+YOUTUBE_SESSION_TTL = 6 * 24 * 3600
+
+# Дневная квота YouTube Data API сбрасывается в полночь по тихоокеанскому времени
+QUOTA_TIMEZONE = pytz.timezone('America/Los_Angeles')
+
+# Причины 403, которые означают исчерпанный лимит, а не запрет
+QUOTA_REASONS = ('quotaExceeded', 'dailyLimitExceeded')
+RATE_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'uploadRateLimitExceeded')
+
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+# Сервис создаётся один раз (discovery-документ переиспользуется); запросы
+# выполняются через _new_http() со своими credentials
+_service = None
+_service_lock = threading.Lock()
+
+def _new_credentials(token: dict = None) -> Credentials:
+    return Credentials(
+        token=token['access_token'] if token else None,
+        expiry=token.get('expires_at') if token else None,
+        refresh_token=YOUTUBE_REFRESH_TOKEN,
+        token_uri=TOKEN_URI,
+        client_id=YOUTUBE_CLIENT_ID,
+        client_secret=YOUTUBE_CLIENT_SECRET
+    )
+
 def get_youtube_service():
-    """Создание YouTube API сервиса"""
-    try:
-        if not YOUTUBE_CLIENT_ID or not YOUTUBE_REFRESH_TOKEN:
-            logger.error("YouTube API не настроен")
-            return None
+    """YouTube API сервис (кэшируется)"""
+    global _service
+    
+    if _service is not None:
+        return _service
+    
+    with _service_lock:
+        if _service is not None:
+            return _service
         
-        credentials = Credentials(
-            token=None,
-            refresh_token=YOUTUBE_REFRESH_TOKEN,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=YOUTUBE_CLIENT_ID,
-            client_secret=YOUTUBE_CLIENT_SECRET
-        )
+        try:
+            if not YOUTUBE_CLIENT_ID or not YOUTUBE_REFRESH_TOKEN:
+                logger.error("YouTube API не настроен")
+                return None
+            
+            _service = build('youtube', 'v3', credentials=_new_credentials(), cache_discovery=False)
+            return _service
         
-        service = build('youtube', 'v3', credentials=credentials)
-        return service
-    
-    except Exception as e:
-        logger.error(f"Ошибка создания YouTube сервиса: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка создания YouTube сервиса: {e}")
+            return None
+
+async def _get_service():
+    return await asyncio.to_thread(get_youtube_service)
+
+async def _new_http() -> AuthorizedHttp:
+    """
+    HTTP-клиент на вызов: свой httplib2.Http (не потокобезопасен) и свои
+    Credentials с токеном из менеджера токенов
+
+    Токен обновляется менеджером заранее, поэтому google-auth не делает
+    OAuth-запрос перед первым вызовом API. Общий объект Credentials нельзя
+    обновлять, пока им пользуется загрузка в другом потоке.
+    """
+    token = await token_manager.get('youtube')
+    http = httplib2.Http(timeout=120)
+    # 308 в resumable upload — «продолжайте», а не редирект (как в build_http())
+    http.redirect_codes = http.redirect_codes - {308}
+    return AuthorizedHttp(_new_credentials(token), http=http)
+
+def _session_offset(http: AuthorizedHttp, session_uri: str, total: int) -> tuple:
+    """
+    Состояние прерванной resumable-загрузки (пустой PUT с Content-Range: bytes */total)
+
+    Returns:
+        tuple: (смещение, None) — продолжать с него; (None, ответ API) —
+        загрузка уже завершена; (None, None) — сессия недействительна
+    """
+    resp, content = http.request(
+        session_uri, method='PUT',
+        headers={'Content-Range': f'bytes */{total}', 'Content-Length': '0'}
+    )
+
+    if resp.status == 308:
+        # Range: bytes=0-N — сервер получил N + 1 байт
+        received = resp.get('range')
+        return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+    if resp.status in (200, 201):
+        return None, json.loads(content)
+    if resp.status in (404, 410):
+        return None, None
+    raise HttpError(resp, content, uri=session_uri)
+
+def _error_reasons(error: HttpError) -> set:
+    details = error.error_details if isinstance(error.error_details, list) else []
+    return {detail.get('reason') for detail in details if isinstance(detail, dict)}
+
+def _seconds_until_quota_reset() -> float:
+    now = datetime.now(QUOTA_TIMEZONE)
+    midnight = QUOTA_TIMEZONE.localize(datetime.combine(now.date() + timedelta(days=1), datetime.min.time()))
+    return (midnight - now).total_seconds()
+
+async def _rate_limit_result(error: HttpError, endpoint: str) -> dict:
+    """
+    Результат для ответа «лимит исчерпан» (None, если ошибка другая)
+
+    Google не присылает x-rate-limit-*, поэтому журнал заполняется только из
+    ответов 429 и 403 с причиной из QUOTA_REASONS / RATE_REASONS.
+    """
+    reasons = _error_reasons(error)
+    if reasons & set(QUOTA_REASONS):
+        retry_after = _seconds_until_quota_reset()
+    elif error.resp.status == 429 or reasons & set(RATE_REASONS):
+        await record_headers('youtube', endpoint, error.resp)
+        retry_after = retry_after_from_headers(error.resp)
+    else:
         return None
 
+    logger.warning(f"⏳ YouTube: лимит {endpoint} исчерпан, повтор через {int(retry_after)} сек")
+    return {'success': False, 'error': 'rate_limited', 'retry_after': retry_after}
+
 async def post_to_youtube_community(text: str, image_path: str = None) -> dict:
     """
     Публикация в YouTube Community Tab
@@ -54,7 +165,7 @@ async def post_to_youtube_community(text: str, image_path: str = None) -> dict:
         return {'success': False, 'error': 'API not configured'}
     
     try:
-        service = get_youtube_service()
+        service = await _get_service()
         if not service:
             return {'success': False, 'error': 'Failed to create service'}
         
@@ -79,26 +190,30 @@ async def post_to_youtube_community(text: str, image_path: str = None) -> dict:
         logger.error(f"Неожиданная ошибка YouTube: {e}")
         return {'success': False, 'error': str(e)}
 
-async def upload_youtube_video(title: str, description: str, video_path: str, tags: list = None) -> dict:
+async def upload_youtube_video(title: str, description: str, video_path: str, tags: list = None, progress=None) -> dict:
     """
     Загрузка видео на YouTube
     
+    Видео загружается чанками в отдельном потоке, event loop не блокируется.
+    URI сессии сохраняется рядом с файлом, поэтому после перезапуска
+    повторный вызов продолжает загрузку.
+    
     Args:
         title: Название видео
         description: Описание
         video_path: Путь к видео файлу
         tags: Список тегов
+        progress: Обработчик прогресса (uploaded_bytes, total_bytes),
+            например integrations.uploads.TelegramProgress
     
     Returns:
         dict: {'success': bool, 'url': str, 'video_id': str}
     """
     try:
-        service = get_youtube_service()
+        service = await _get_service()
         if not service:
             return {'success': False, 'error': 'Service not available'}
         
-        from googleapiclient.http import MediaFileUpload
-        
         body = {
             'snippet': {
                 'title': title,
@@ -113,7 +228,7 @@ async def upload_youtube_video(title: str, description: str, video_path: str, ta
         
         media = MediaFileUpload(
             video_path,
-            chunksize=-1,
+            chunksize=YOUTUBE_CHUNK_SIZE,
             resumable=True,
             mimetype='video/*'
         )
@@ -124,7 +239,36 @@ async def upload_youtube_video(title: str, description: str, video_path: str, ta
             media_body=media
         )
         
-        response = request.execute()
+        http = await _new_http()
+        response = None
+        
+        # Продолжаем прерванную загрузку этого файла с подтверждённого сервером смещения
+        state = load_upload_state(video_path, 'youtube', max_age=YOUTUBE_SESSION_TTL)
+        if state:
+            offset, response = await asyncio.to_thread(_session_offset, http, state['session_uri'], media.size())
+            if offset is not None:
+                logger.info(f"Продолжаем загрузку на YouTube с {offset} байт: {video_path}")
+                request.resumable_uri = state['session_uri']
+                request.resumable_progress = offset
+            elif response is None:
+                logger.info(f"Сессия загрузки YouTube недействительна, начинаем заново: {video_path}")
+                clear_upload_state(video_path, 'youtube')
+                state = None
+        
+        while response is None:
+            try:
+                status, response = await asyncio.to_thread(request.next_chunk, http=http, num_retries=3)
+            finally:
+                if request.resumable_uri and (not state or state['session_uri'] != request.resumable_uri):
+                    state = {'session_uri': request.resumable_uri}
+                    save_upload_state(video_path, 'youtube', state)
+            
+            if status:
+                await emit_progress(progress, status.resumable_progress, status.total_size)
+        
+        clear_upload_state(video_path, 'youtube')
+        await emit_progress(progress, media.size(), media.size())
+        
         video_id = response['id']
         video_url = f"https://www.youtube.com/watch?v={video_id}"
         
@@ -137,6 +281,9 @@ async def upload_youtube_video(title: str, description: str, video_path: str, ta
         }
     
     except HttpError as e:
+        limited = await _rate_limit_result(e, 'publish')
+        if limited:
+            return limited
         logger.error(f"Ошибка загрузки видео: {e}")
         return {'success': False, 'error': str(e)}
     
@@ -147,7 +294,7 @@ async def upload_youtube_video(title: str, description: str, video_path: str, ta
 async def get_channel_info() -> dict:
     """Получение информации о канале"""
     try:
-        service = get_youtube_service()
+        service = await _get_service()
         if not service:
             return {}
         
@@ -156,7 +303,7 @@ async def get_channel_info() -> dict:
             mine=True
         )
         
-        response = request.execute()
+        response = await asyncio.to_thread(request.execute, http=await _new_http())
         
         if response['items']:
             channel = response['items'][0]
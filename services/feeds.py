@@ -0,0 +1,135 @@
+"""
+Лента вакансий и ассетов: инкрементальная загрузка и дайджесты
+"""
+
+import json
+import hashlib
+import logging
+from database.db import get_db_pool
+from services.parsers import crawl, get_sources
+from services.notification_index import notification_index
+
+logger = logging.getLogger(__name__)
+
+FEED_TYPES = ('jobs', 'assets')
+
+# Новые записи старше этого срока в дайджест не попадают
+DIGEST_MAX_AGE_DAYS = 7
+
+def content_hash(item: dict) -> str:
+    """Хэш содержимого записи (ссылка + заголовок без учёта регистра и пробелов)"""
+    key = f"{(item.get('url') or '').strip().lower()}|{' '.join((item.get('title') or '').lower().split())}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+async def ingest_feed(feed_type: str) -> int:
+    """
+    Загрузка свежих записей из всех источников ленты
+
+    Returns:
+        int: Количество новых записей
+    """
+    db_pool = get_db_pool()
+    if not db_pool:
+        logger.warning("⚠️ БД не инициализирована")
+        return 0
+
+    names = [source.name for source in get_sources(feed_type)]
+    if not names:
+        logger.warning(f"Нет источников для ленты {feed_type}")
+        return 0
+
+    results = await crawl(names, use_cache=False)
+
+    hashes, sources, titles, urls, payloads = [], [], [], [], []
+    seen = set()
+
+    for name, items in results.items():
+        for item in items:
+            if not item.get('title'):
+                continue
+
+            item_hash = content_hash(item)
+            if item_hash in seen:
+                continue
+            seen.add(item_hash)
+
+            hashes.append(item_hash)
+            sources.append(item.get('source') or name)
+            titles.append(item['title'])
+            urls.append(item.get('url'))
+            payloads.append(json.dumps(item, ensure_ascii=False))
+
+    if not hashes:
+        return 0
+
+    try:
+        async with db_pool.acquire() as conn:
+            # Одна вставка на всю пачку, дубликаты отсекает уникальный индекс
+            inserted = await conn.fetch('''
+                INSERT INTO feed_items (feed_type, source, content_hash, title, url, data)
+                SELECT $1, s, h, t, u, d::jsonb
+                FROM unnest($2::text[], $3::text[], $4::text[], $5::text[], $6::text[]) AS x(s, h, t, u, d)
+                ON CONFLICT (content_hash) DO NOTHING
+                RETURNING id
+            ''', feed_type, sources, hashes, titles, urls, payloads)
+    except Exception as e:
+        logger.error(f"Ошибка сохранения ленты {feed_type}: {e}")
+        return 0
+
+    logger.info(f"✅ Лента {feed_type}: {len(inserted)} новых из {len(hashes)}")
+    return len(inserted)
+
+async def get_new_items(user_id: int, feed_type: str, limit: int = 10) -> list:
+    """Записи ленты, появившиеся после последней доставки пользователю"""
+    db_pool = get_db_pool()
+    if not db_pool:
+        return []
+
+    async with db_pool.acquire() as conn:
+        rows = await conn.fetch('''
+            SELECT id, source, title, url
+            FROM feed_items
+            WHERE feed_type = $1
+            AND id > COALESCE(
+                (SELECT last_item_id FROM feed_deliveries WHERE user_id = $2 AND feed_type = $1), 0
+            )
+            AND ingested_at > CURRENT_TIMESTAMP - make_interval(days => $3)
+            ORDER BY id DESC
+            LIMIT $4
+        ''', feed_type, user_id, DIGEST_MAX_AGE_DAYS, limit)
+
+    return [dict(row) for row in rows]
+
+async def mark_delivered(user_id: int, feed_type: str, last_item_id: int):
+    """Запомнить последнюю доставленную запись"""
+    db_pool = get_db_pool()
+    if not db_pool:
+        return
+
+    async with db_pool.acquire() as conn:
+        await conn.execute('''
+            INSERT INTO feed_deliveries (user_id, feed_type, last_item_id, delivered_at)
+            VALUES ($1, $2, $3, CURRENT_TIMESTAMP)
+            ON CONFLICT (user_id, feed_type)
+            DO UPDATE SET
+                last_item_id = GREATEST(feed_deliveries.last_item_id, $3),
+                delivered_at = CURRENT_TIMESTAMP
+        ''', user_id, feed_type, last_item_id)
+
+async def get_feed_subscribers(feed_type: str) -> list:
+    """Пользователи с включённым уведомлением о ленте"""
+    if feed_type not in FEED_TYPES:
+        raise ValueError(f"Неизвестная лента: {feed_type}")
+
+    # Обычно аудитория берётся из индекса в памяти, без запроса к таблице
+    if notification_index.loaded:
+        return notification_index.subscribers(feed_type)
+
+    db_pool = get_db_pool()
+    if not db_pool:
+        return []
+
+    async with db_pool.acquire() as conn:
+        rows = await conn.fetch(f'SELECT user_id FROM notification_settings WHERE {feed_type} = TRUE')
+
+    return [row['user_id'] for row in rows]
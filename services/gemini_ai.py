@@ -3,8 +3,12 @@
 """
 
 import os
+import time
+import asyncio
 import logging
 import google.generativeai as genai
+from utils.metrics import GEMINI_SECONDS, GEMINI_ERRORS
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -18,13 +22,25 @@ else:
     model = None
     logger.error("❌ GEMINI_API_KEY не установлен!")
 
+async def _generate(prompt: str, operation: str):
+    """Запрос к модели с замером времени (клиент блокирующий — в отдельном потоке)"""
+    start = time.perf_counter()
+    try:
+        with span('gemini', operation):
+            return await asyncio.to_thread(model.generate_content, prompt)
+    except Exception:
+        GEMINI_ERRORS.labels(operation).inc()
+        raise
+    finally:
+        GEMINI_SECONDS.labels(operation).observe(time.perf_counter() - start)
+
 async def ask_gemini(prompt: str) -> str:
     """Отправить запрос к Gemini AI"""
     if not model:
         return "❌ AI временно недоступен"
     
     try:
-        response = model.generate_content(prompt)
+        response = await _generate(prompt, 'ask')
         return response.text
     except Exception as e:
         logger.error(f"Ошибка Gemini: {e}")
@@ -43,7 +59,7 @@ async def generate_art_idea() -> str:
     """
     
     try:
-        response = model.generate_content(prompt)
+        response = await _generate(prompt, 'art_idea')
         return response.text
     except Exception as e:
         logger.error(f"Ошибка генерации идеи: {e}")
@@ -57,7 +73,7 @@ async def generate_motivation() -> str:
     """
     
     try:
-        response = model.generate_content(prompt)
+        response = await _generate(prompt, 'motivation')
         return response.text
     except:
         return "Каждый проект делает тебя лучше. Продолжай создавать! 🚀"
@@ -71,7 +87,7 @@ async def generate_project_idea() -> str:
     """
     
     try:
-        response = model.generate_content(prompt)
+        response = await _generate(prompt, 'project_idea')
         return response.text
     except:
         return "Создай стилизованный предмет из повседневной жизни в необычном стиле! 🎨"
@@ -0,0 +1,220 @@
+"""
+Подготовка изображений под платформы
+
+Для каждой платформы изображение один раз уменьшается и пережимается под её
+рекомендации (RENDITIONS). Pillow работает в пуле процессов, чтобы не
+занимать event loop и GIL. Версии хранятся на диске под ключом из хэша
+содержимого исходника и параметров платформы; при превышении
+MEDIA_RENDITIONS_MAX_MB удаляются давно не использованные (LRU по mtime).
+"""
+
+import os
+import shutil
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from config.settings import MEDIA_DIR, MEDIA_RENDITIONS_MAX_MB, IMAGE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = os.path.join(MEDIA_DIR, 'renditions')
+
+# Параметры версий: максимальные размеры, формат, качество JPEG и лимит файла платформы
+RENDITIONS = {
+    'telegram': {'max_width': 2560, 'max_height': 2560, 'format': 'JPEG', 'quality': 87, 'max_bytes': 10 * 1024 * 1024},
+    'twitter': {'max_width': 2048, 'max_height': 2048, 'format': 'JPEG', 'quality': 85, 'max_bytes': 5 * 1024 * 1024},
+    'linkedin': {'max_width': 1200, 'max_height': 1200, 'format': 'JPEG', 'quality': 85, 'max_bytes': 5 * 1024 * 1024},
+    'pinterest': {'max_width': 1000, 'max_height': 1500, 'format': 'JPEG', 'quality': 88, 'max_bytes': 20 * 1024 * 1024},
+    'instagram': {'max_width': 1080, 'max_height': 1350, 'format': 'JPEG', 'quality': 88, 'max_bytes': 8 * 1024 * 1024},
+}
+
+# Минимальное качество, до которого снижаем JPEG, чтобы уложиться в max_bytes
+MIN_QUALITY = 60
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# ========================================
+# ОБРАБОТКА (выполняется в дочернем процессе)
+# ========================================
+
+def _render(src_path: str, dst_path: str, spec: dict) -> int:
+    """Уменьшение и пережатие изображения; возвращает размер результата"""
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as image:
+        source_format = image.format
+        original_size = image.size
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((spec['max_width'], spec['max_height']), Image.LANCZOS)
+
+        if spec['format'] == 'JPEG' and image.mode != 'RGB':
+            # Прозрачность заливаем белым
+            background = Image.new('RGB', image.size, 'white')
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+
+        tmp_path = dst_path + '.tmp'
+        quality = spec['quality']
+        while True:
+            image.save(tmp_path, spec['format'], quality=quality, optimize=True, progressive=True)
+            size = os.path.getsize(tmp_path)
+            if size <= spec['max_bytes'] or quality <= MIN_QUALITY:
+                break
+            quality -= 7
+
+    # Небольшой JPEG после пережатия может стать только больше — оставляем исходник
+    source_bytes = os.path.getsize(src_path)
+    if source_format == spec['format'] and image.size == original_size and source_bytes <= min(size, spec['max_bytes']):
+        shutil.copyfile(src_path, tmp_path)
+        size = source_bytes
+
+    os.replace(tmp_path, dst_path)
+    return size
+
+# ========================================
+# КЭШ ВЕРСИЙ
+# ========================================
+
+_executor = None
+_index = None        # OrderedDict путь -> размер, от давно использованных к недавним
+_total_bytes = 0
+_inflight = {}       # путь версии -> asyncio.Task
+_hashes = {}         # (путь, размер, mtime) -> sha256 исходника
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, IMAGE_WORKERS))
+    return _executor
+
+def _load_index():
+    """Список файлов кэша, отсортированный по времени последнего использования"""
+    global _index, _total_bytes
+    entries = []
+
+    for root, _, files in os.walk(RENDITIONS_DIR):
+        for name in files:
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, path, stat.st_size))
+
+    _index = OrderedDict((path, size) for _, path, size in sorted(entries))
+    _total_bytes = sum(_index.values())
+
+def _touch(path: str):
+    """Отметка использования (mtime — порядок LRU между перезапусками)"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    _index.move_to_end(path)
+
+def _add(path: str, size: int):
+    global _total_bytes
+    _total_bytes += size - _index.get(path, 0)
+    _index[path] = size
+    _index.move_to_end(path)
+    _evict()
+
+def _forget(path: str):
+    """Забыть версию, удалённую с диска не через кэш"""
+    global _total_bytes
+    _total_bytes -= _index.pop(path, 0)
+
+def _evict():
+    """Удаление давно не использованных версий сверх лимита"""
+    global _total_bytes
+    limit = MEDIA_RENDITIONS_MAX_MB * 1024 * 1024
+
+    while _total_bytes > limit and len(_index) > 1:
+        path, size = _index.popitem(last=False)
+        _total_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _file_hash(path: str) -> str:
+    """SHA-256 содержимого (кэшируется по пути, размеру и mtime)"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _hashes.get(key)
+
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = _hashes[key] = sha.hexdigest()
+
+    return digest
+
+def rendition_path(digest: str, platform: str) -> str:
+    """Путь версии в кэше (параметры платформы входят в ключ)"""
+    spec = RENDITIONS[platform]
+    spec_key = hashlib.sha1(repr(sorted(spec.items())).encode()).hexdigest()[:8]
+    ext = '.jpg' if spec['format'] == 'JPEG' else '.' + spec['format'].lower()
+    return os.path.join(RENDITIONS_DIR, digest[:2], f"{digest}_{platform}_{spec_key}{ext}")
+
+async def get_rendition(src_path: str, platform: str) -> str:
+    """
+    Версия изображения для платформы
+
+    Returns:
+        str: Путь к версии (исходный файл, если платформа не требует обработки
+            или обработать не удалось)
+    """
+    if platform not in RENDITIONS or not src_path:
+        return src_path
+
+    if _index is None:
+        await asyncio.to_thread(_load_index)
+
+    digest = await asyncio.to_thread(_file_hash, src_path)
+    dst_path = rendition_path(digest, platform)
+
+    if dst_path in _index:
+        if os.path.exists(dst_path):
+            _touch(dst_path)
+            return dst_path
+        _forget(dst_path)
+
+    # Одновременные запросы одной версии ждут одну обработку
+    task = _inflight.get(dst_path)
+    if task is None:
+        task = _inflight[dst_path] = asyncio.ensure_future(_create(src_path, dst_path, platform))
+        task.add_done_callback(lambda _: _inflight.pop(dst_path, None))
+
+    try:
+        return await asyncio.shield(task)
+    except Exception as e:
+        logger.error(f"Ошибка обработки изображения {src_path} для {platform}: {e}")
+        return src_path
+
+async def _create(src_path: str, dst_path: str, platform: str) -> str:
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+
+    loop = asyncio.get_running_loop()
+    size = await loop.run_in_executor(_get_executor(), _render, src_path, dst_path, RENDITIONS[platform])
+
+    _add(dst_path, size)
+    original = os.path.getsize(src_path)
+    logger.info(f"🖼 Версия для {platform}: {original // 1024} КБ → {size // 1024} КБ")
+    return dst_path
+
+async def get_renditions(src_path: str, platforms: list) -> dict:
+    """Версии для нескольких платформ (обрабатываются параллельно)"""
+    paths = await asyncio.gather(*(get_rendition(src_path, platform) for platform in platforms))
+    return dict(zip(platforms, paths))
+
+def shutdown_image_pool():
+    """Остановка пула процессов (при остановке бота)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
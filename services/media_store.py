@@ -0,0 +1,246 @@
+"""
+Хранилище медиафайлов пользователей
+
+Файлы из Telegram скачиваются потоково, частями, с одновременным подсчётом
+SHA-256, и сохраняются под именем из хэша — одинаковое содержимое хранится
+на диске один раз. Метаданные лежат в media_files, запланированные посты
+ссылаются на них через scheduled_posts.media_id. При превышении
+MEDIA_STORE_MAX_MB удаляются давно не использованные файлы, на которые
+не ссылаются ожидающие публикации посты.
+"""
+
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+import aiohttp
+from config.settings import MEDIA_DIR, MEDIA_STORE_MAX_MB
+from database.db import get_db_pool
+from utils.http import get_http_session
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.path.join(MEDIA_DIR, 'store')
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Расширения по MIME-типу (для имени файла на диске)
+EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/gif': '.gif',
+    'video/mp4': '.mp4',
+    'video/quicktime': '.mov',
+}
+
+# Фоновая очистка хранилища (ссылка, чтобы задачу не собрал GC)
+_evict_tasks = set()
+
+class MediaError(Exception):
+    """Файл не удалось сохранить"""
+    pass
+
+def _store_path(sha256: str, ext: str) -> str:
+    return os.path.join(STORE_DIR, sha256[:2], sha256 + ext)
+
+async def _stream_to_file(source: str, fileobj) -> tuple:
+    """
+    Потоковое копирование файла Telegram (URL или локальный путь Bot API)
+
+    Returns:
+        tuple: (sha256, размер)
+    """
+    sha = hashlib.sha256()
+    size = 0
+
+    if os.path.isabs(source) and os.path.exists(source):
+        # Локальный Bot API сервер отдаёт путь к файлу на диске
+        def copy():
+            nonlocal size
+            with open(source, 'rb') as src:
+                for chunk in iter(lambda: src.read(DOWNLOAD_CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    fileobj.write(chunk)
+                    size += len(chunk)
+        await asyncio.to_thread(copy)
+        return sha.hexdigest(), size
+
+    session = get_http_session()
+    async with session.get(source, timeout=aiohttp.ClientTimeout(total=600, sock_read=60)) as response:
+        if response.status != 200:
+            raise MediaError(f"HTTP {response.status} при скачивании файла")
+
+        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+            sha.update(chunk)
+            fileobj.write(chunk)
+            size += len(chunk)
+
+    return sha.hexdigest(), size
+
+async def store_telegram_file(bot, user_id: int, attachment, kind: str, mime_type: str = None, file_name: str = None) -> dict:
+    """
+    Сохранение вложения Telegram (PhotoSize, Video, Document)
+
+    Повторная отправка того же файла не скачивает его снова
+    (поиск по file_unique_id, затем по SHA-256).
+
+    Returns:
+        dict: Запись media_files
+    """
+    db_pool = get_db_pool()
+    if not db_pool:
+        raise MediaError("БД недоступна")
+
+    async with db_pool.acquire() as conn:
+        existing = await conn.fetchrow('''
+            SELECT * FROM media_files WHERE file_unique_id = $1 ORDER BY user_id = $2 DESC LIMIT 1
+        ''', attachment.file_unique_id, user_id)
+
+    if existing and os.path.exists(existing['path']):
+        return await _register(user_id, existing['sha256'], attachment.file_unique_id, kind,
+                               existing['mime_type'], file_name or existing['file_name'],
+                               existing['size'], existing['path'])
+
+    tg_file = await bot.get_file(attachment.file_id)
+    ext = EXTENSIONS.get(mime_type, os.path.splitext(file_name or tg_file.file_path or '')[1].lower())
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=STORE_DIR, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            sha256, size = await _stream_to_file(tg_file.file_path, f)
+
+        path = _store_path(sha256, ext)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    record = await _register(user_id, sha256, attachment.file_unique_id, kind, mime_type, file_name, size, path)
+    logger.info(f"📎 Медиа #{record['id']} сохранено ({size // 1024} КБ)")
+
+    _schedule_evict()
+    return record
+
+def _schedule_evict():
+    """Фоновая очистка после загрузки (не больше одной одновременно)"""
+    if _evict_tasks:
+        return
+    task = asyncio.create_task(evict())
+    _evict_tasks.add(task)
+    task.add_done_callback(_evict_done)
+
+def _evict_done(task: asyncio.Task):
+    _evict_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"❌ Ошибка очистки медиахранилища: {task.exception()}")
+
+async def _register(user_id: int, sha256: str, file_unique_id: str, kind: str, mime_type: str,
+                    file_name: str, size: int, path: str) -> dict:
+    """Запись о файле для пользователя (повторная загрузка возвращает существующую)"""
+    async with get_db_pool().acquire() as conn:
+        row = await conn.fetchrow('''
+            INSERT INTO media_files (user_id, sha256, file_unique_id, kind, mime_type, file_name, size, path)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+            ON CONFLICT (user_id, sha256) DO UPDATE SET
+                last_used_at = CURRENT_TIMESTAMP,
+                file_unique_id = COALESCE(media_files.file_unique_id, EXCLUDED.file_unique_id)
+            RETURNING *
+        ''', user_id, sha256, file_unique_id, kind, mime_type, file_name, size, path)
+    return dict(row)
+
+async def get_media(media_id: int, user_id: int = None) -> dict:
+    """Запись о файле (None, если её нет, файл удалён или принадлежит другому пользователю)"""
+    db_pool = get_db_pool()
+    if not db_pool:
+        return None
+
+    async with db_pool.acquire() as conn:
+        row = await conn.fetchrow('''
+            UPDATE media_files SET last_used_at = CURRENT_TIMESTAMP
+            WHERE id = $1 AND ($2::bigint IS NULL OR user_id = $2)
+            RETURNING *
+        ''', media_id, user_id)
+
+    if not row or not os.path.exists(row['path']):
+        return None
+    return dict(row)
+
+async def list_media(user_id: int, limit: int = 20) -> list:
+    """Последние файлы пользователя"""
+    async with get_db_pool().acquire() as conn:
+        return await conn.fetch('''
+            SELECT id, kind, file_name, size, created_at
+            FROM media_files
+            WHERE user_id = $1
+            ORDER BY created_at DESC
+            LIMIT $2
+        ''', user_id, limit)
+
+async def evict(max_bytes: int = None) -> int:
+    """
+    Удаление давно не использованных файлов сверх лимита хранилища
+
+    Файлы запланированных (ещё не опубликованных) постов не удаляются.
+
+    Returns:
+        int: Сколько файлов удалено с диска
+    """
+    max_bytes = max_bytes or MEDIA_STORE_MAX_MB * 1024 * 1024
+    db_pool = get_db_pool()
+    if not db_pool:
+        return 0
+
+    async with db_pool.acquire() as conn:
+        # Один файл на диске может принадлежать нескольким записям
+        files = await conn.fetch('''
+            SELECT m.sha256, MIN(m.path) AS path, MAX(m.size) AS size, MAX(m.last_used_at) AS last_used_at,
+                   BOOL_OR(EXISTS (
+                       SELECT 1 FROM scheduled_posts p WHERE p.media_id = m.id AND p.status = 'pending'
+                   )) AS pinned
+            FROM media_files m
+            GROUP BY m.sha256
+            ORDER BY last_used_at ASC
+        ''')
+
+        total = sum(f['size'] for f in files)
+        victims = []
+        for f in files:
+            if total <= max_bytes:
+                break
+            if f['pinned']:
+                continue
+            victims.append(f)
+            total -= f['size']
+
+        if not victims:
+            return 0
+
+        await conn.execute('DELETE FROM media_files WHERE sha256 = ANY($1::text[])', [f['sha256'] for f in victims])
+
+    for f in victims:
+        try:
+            os.remove(f['path'])
+        except OSError:
+            pass
+
+    logger.info(f"🧹 Удалено медиафайлов: {len(victims)}")
+    return len(victims)
+
+def clear_partial_downloads():
+    """Удаление недокачанных файлов (после аварийной остановки)"""
+    if not os.path.isdir(STORE_DIR):
+        return
+    for name in os.listdir(STORE_DIR):
+        if name.endswith('.part'):
+            try:
+                os.remove(os.path.join(STORE_DIR, name))
+            except OSError:
+                pass
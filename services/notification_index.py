@@ -0,0 +1,170 @@
+"""
+Индекс подписок на уведомления: по битовой маске на тип
+
+Каждый пользователь из notification_settings получает плотный номер, тип
+уведомления — целое число, в котором бит с этим номером включён, если
+уведомление включено. Аудитория рассылки — битовые операции над масками
+(например, trends & ~jobs), без запроса к таблице.
+
+Индекс загружается, когда слушатель LISTEN/NOTIFY кэша чтений подключился
+(и после каждого переподключения), и обновляется обработчиками, меняющими
+настройки. Изменения с других реплик приходят через тот же канал (область
+notifications): строка пользователя перечитывается.
+Пока индекс не загружен, get_feed_subscribers читает таблицу напрямую.
+"""
+
+import asyncio
+import logging
+from database.db import get_db_pool
+from services.response_cache import on_remote_invalidate, NOTIFICATIONS
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_TYPES = ('motivation', 'idea', 'trends', 'jobs', 'assets', 'reminders')
+
+# Значения по умолчанию для новой строки notification_settings
+DEFAULT_FLAGS = {notification_type: True for notification_type in NOTIFICATION_TYPES}
+
+class NotificationIndex:
+    """Битовые маски подписчиков по типам уведомлений"""
+
+    def __init__(self):
+        self.loaded = False
+        self._slots = {}   # user_id -> номер бита
+        self._users = []   # номер бита -> user_id
+        self._bits = dict.fromkeys(NOTIFICATION_TYPES, 0)
+
+    async def load(self):
+        """Загрузка всей таблицы (при старте)"""
+        db_pool = get_db_pool()
+        if not db_pool:
+            logger.warning("⚠️ БД не инициализирована, индекс уведомлений не загружен")
+            return
+
+        columns = ', '.join(NOTIFICATION_TYPES)
+        async with db_pool.acquire() as conn:
+            rows = await conn.fetch(f'SELECT user_id, {columns} FROM notification_settings ORDER BY user_id')
+
+        # Маски собираются в bytearray и переводятся в int один раз: линейно
+        # по числу пользователей, без пересоздания больших int на каждый бит
+        users = [row['user_id'] for row in rows]
+        size = (len(users) + 7) // 8
+        buffers = {notification_type: bytearray(size) for notification_type in NOTIFICATION_TYPES}
+
+        for slot, row in enumerate(rows):
+            byte, bit = slot >> 3, 1 << (slot & 7)
+            for notification_type, buffer in buffers.items():
+                if row[notification_type]:
+                    buffer[byte] |= bit
+
+        self._users = users
+        self._slots = {user_id: slot for slot, user_id in enumerate(users)}
+        self._bits = {notification_type: int.from_bytes(buffer, 'little') for notification_type, buffer in buffers.items()}
+        self.loaded = True
+
+        logger.info(f"✅ Индекс уведомлений: {len(users)} пользователей")
+
+    def _slot(self, user_id: int) -> int:
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._slots[user_id] = len(self._users)
+            self._users.append(user_id)
+        return slot
+
+    def set(self, user_id: int, notification_type: str, enabled: bool):
+        """Включить/выключить тип уведомления пользователю"""
+        mask = 1 << self._slot(user_id)
+        if enabled:
+            self._bits[notification_type] |= mask
+        else:
+            self._bits[notification_type] &= ~mask
+
+    def add_user(self, user_id: int, flags: dict = None):
+        """Новая строка настроек (по умолчанию всё включено)"""
+        for notification_type, enabled in (flags or DEFAULT_FLAGS).items():
+            self.set(user_id, notification_type, enabled)
+
+    def mask(self, notification_type: str) -> int:
+        """Маска подписчиков типа (для своих комбинаций через & | ~)"""
+        return self._bits[notification_type]
+
+    def users(self, mask: int) -> list:
+        """user_id по установленным битам маски"""
+        if mask < 0:
+            # ~mask — «все, кроме»: ограничиваем известными пользователями
+            mask &= (1 << len(self._users)) - 1
+        if not mask:
+            return []
+        # bin() — один проход на C; дальше поиск единиц в строке
+        bits = bin(mask)[:1:-1]
+        users = self._users
+        result = []
+        slot = bits.find('1')
+        while slot != -1:
+            result.append(users[slot])
+            slot = bits.find('1', slot + 1)
+        return result
+
+    def subscribers(self, *notification_types: str) -> list:
+        """Пользователи, у которых включены все указанные типы"""
+        mask = -1
+        for notification_type in notification_types:
+            mask &= self._bits[notification_type]
+        return self.users(mask) if notification_types else []
+
+    def count(self, notification_type: str) -> int:
+        return self._bits[notification_type].bit_count()
+
+    async def refresh_user(self, user_id: int):
+        """Перечитать строку пользователя (изменение на другой реплике)"""
+        db_pool = get_db_pool()
+        if not db_pool:
+            return
+
+        columns = ', '.join(NOTIFICATION_TYPES)
+        try:
+            async with db_pool.acquire() as conn:
+                row = await conn.fetchrow(f'SELECT {columns} FROM notification_settings WHERE user_id = $1', user_id)
+        except Exception as e:
+            logger.error("Ошибка обновления индекса уведомлений для %s: %s", user_id, e)
+            return
+
+        if row is None:
+            flags = dict.fromkeys(NOTIFICATION_TYPES, False)
+        else:
+            flags = {notification_type: row[notification_type] for notification_type in NOTIFICATION_TYPES}
+        self.add_user(user_id, flags)
+
+notification_index = NotificationIndex()
+
+# Фоновые обновления индекса (ссылки, чтобы задачи не собрал GC)
+_refresh_tasks = set()
+
+# Загрузка и обновления строк идут по очереди: изменение, пришедшее во время
+# загрузки, применяется после неё и не теряется
+_index_lock = asyncio.Lock()
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+async def _refresh_user(user_id: int):
+    async with _index_lock:
+        await notification_index.refresh_user(user_id)
+
+@on_remote_invalidate
+def _on_remote_change(user_id: int, scopes: tuple):
+    if user_id is None:
+        # Слушатель подключился — изменения до LISTEN могли потеряться
+        _spawn(load_notification_index())
+    elif NOTIFICATIONS in scopes:
+        _spawn(_refresh_user(user_id))
+
+async def load_notification_index():
+    """Загрузка индекса (при подключении слушателя инвалидаций)"""
+    async with _index_lock:
+        try:
+            await notification_index.load()
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки индекса уведомлений: {e}")
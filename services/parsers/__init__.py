@@ -2,12 +2,25 @@
 Парсеры для получения трендов
 """
 
+from .base import TrendSource, SourceError
+from .crawler import register_source, get_source, get_sources, crawl, crawl_source
 from .artstation import get_artstation_trends
 from .music_trends import get_music_trends, get_tiktok_trends, get_billboard_trends
+from .feeds import RSSFeedSource, SketchfabAssetsSource, LocalFeedSource
 
 __all__ = [
+    'TrendSource',
+    'SourceError',
+    'register_source',
+    'get_source',
+    'get_sources',
+    'crawl',
+    'crawl_source',
     'get_artstation_trends',
     'get_music_trends',
     'get_tiktok_trends',
     'get_billboard_trends',
+    'RSSFeedSource',
+    'SketchfabAssetsSource',
+    'LocalFeedSource',
 ]
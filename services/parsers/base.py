@@ -0,0 +1,39 @@
+"""
+Базовый интерфейс источника трендов
+"""
+
+import logging
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+class TrendSource:
+    """
+    Источник трендов (плагин для краулера)
+
+    Подкласс задаёт имя, тип тренда и реализует fetch().
+    Кэширование, ретраи, таймауты и fallback делает краулер.
+    """
+
+    name = None             # Уникальное имя источника
+    trend_type = None       # Тип тренда (см. database.models.TREND_TYPES)
+    default_limit = 10      # Количество элементов по умолчанию
+    cache_ttl_hours = 6     # Время жизни кэша
+    timeout = 15            # Таймаут одного запроса (сек)
+    retries = 2             # Повторы при ошибке
+    min_interval = 1.0      # Минимальный интервал между запросами к источнику (сек)
+
+    async def fetch(self, session: aiohttp.ClientSession, limit: int) -> list:
+        """Получить свежие данные (может выбросить исключение)"""
+        raise NotImplementedError
+
+    def fallback(self, limit: int) -> list:
+        """Заглушка, если нет ни свежих данных, ни кэша"""
+        return []
+
+    def __repr__(self):
+        return f"<TrendSource {self.name}>"
+
+class SourceError(Exception):
+    """Источник вернул некорректный ответ"""
+    pass
@@ -0,0 +1,197 @@
+"""
+Краулер трендов: параллельный запуск зарегистрированных источников
+"""
+
+import json
+import time
+import asyncio
+import logging
+import aiohttp
+from datetime import datetime, timedelta
+from database.db import get_db_pool
+from utils.http import get_http_session
+from utils.metrics import SCRAPE_SECONDS
+from utils.tracing import span
+from .base import TrendSource, SourceError
+
+logger = logging.getLogger(__name__)
+
+# Зарегистрированные источники: имя -> TrendSource
+_sources = {}
+
+# Состояние источников для rate limit: имя -> {'lock': Lock, 'last_request': float}
+_rate_state = {}
+
+# Текущие запросы (чтобы одновременные вызовы не дублировали парсинг)
+_inflight = {}
+
+# ========================================
+# РЕЕСТР ИСТОЧНИКОВ
+# ========================================
+
+def register_source(source: TrendSource) -> TrendSource:
+    """Регистрация источника трендов"""
+    if not source.name:
+        raise ValueError("У источника должно быть имя")
+
+    _sources[source.name] = source
+    return source
+
+def get_source(name: str) -> TrendSource:
+    """Получить источник по имени"""
+    return _sources.get(name)
+
+def get_sources(trend_type: str = None) -> list:
+    """Список источников (опционально по типу тренда)"""
+    return [s for s in _sources.values() if trend_type is None or s.trend_type == trend_type]
+
+# ========================================
+# ЗАПУСК
+# ========================================
+
+async def crawl(names: list = None, limits: dict = None, use_cache: bool = True) -> dict:
+    """
+    Параллельный запуск источников
+
+    Args:
+        names: Имена источников (по умолчанию все)
+        limits: Лимиты по источникам {имя: limit}
+        use_cache: Использовать свежий кэш
+
+    Returns:
+        dict: {имя источника: list}
+    """
+    names = names or list(_sources)
+    limits = limits or {}
+
+    results = await asyncio.gather(
+        *(crawl_source(name, limits.get(name), use_cache) for name in names)
+    )
+    return dict(zip(names, results))
+
+async def crawl_source(name: str, limit: int = None, use_cache: bool = True) -> list:
+    """Получение данных одного источника (кэш → парсинг → старый кэш → заглушка)"""
+    source = _sources.get(name)
+    if not source:
+        logger.error("Неизвестный источник трендов: %s", name)
+        return []
+
+    limit = limit or source.default_limit
+    key = (name, limit, use_cache)
+
+    # Single-flight: ждём уже идущий запрос вместо повторного парсинга
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_run_source(source, limit, use_cache))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    return await asyncio.shield(task)
+
+async def _run_source(source: TrendSource, limit: int, use_cache: bool) -> list:
+    cached, is_fresh = await _read_cache(source.name, source.cache_ttl_hours)
+
+    if use_cache and cached and is_fresh:
+        logger.info("Используем кэш источника %s", source.name)
+        return cached[:limit]
+
+    start = time.perf_counter()
+    try:
+        with span('scrape', source.name):
+            data = await _fetch_with_retries(source, limit)
+        outcome = 'ok' if data else 'empty'
+    except Exception as e:
+        logger.error("Ошибка источника %s: %s", source.name, e)
+        data = None
+        outcome = 'error'
+    SCRAPE_SECONDS.labels(source.name, outcome).observe(time.perf_counter() - start)
+
+    if data:
+        await _write_cache(source.name, data)
+        logger.info("✅ %s: получено %d элементов", source.name, len(data))
+        return data[:limit]
+
+    if cached:
+        logger.warning("Используем устаревший кэш источника %s", source.name)
+        return cached[:limit]
+
+    logger.warning("Используем fallback данные источника %s", source.name)
+    return source.fallback(limit)
+
+async def _fetch_with_retries(source: TrendSource, limit: int) -> list:
+    """Запрос с учётом rate limit, таймаута и повторов"""
+    session = get_http_session()
+    last_error = None
+
+    for attempt in range(source.retries + 1):
+        await _wait_rate_limit(source)
+
+        try:
+            return await asyncio.wait_for(source.fetch(session, limit), timeout=source.timeout)
+        except (asyncio.TimeoutError, aiohttp.ClientError, SourceError) as e:
+            last_error = e
+            logger.warning("%s: попытка %d не удалась: %r", source.name, attempt + 1, e)
+
+        if attempt < source.retries:
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+    raise last_error
+
+async def _wait_rate_limit(source: TrendSource):
+    """Соблюдение минимального интервала между запросами к источнику"""
+    state = _rate_state.setdefault(source.name, {'lock': asyncio.Lock(), 'last_request': 0.0})
+    loop = asyncio.get_running_loop()
+
+    async with state['lock']:
+        wait = state['last_request'] + source.min_interval - loop.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        state['last_request'] = loop.time()
+
+# ========================================
+# КЭШ (таблица trends_cache)
+# ========================================
+
+async def _read_cache(name: str, ttl_hours: float) -> tuple:
+    """Последняя запись кэша: (data, свежая ли)"""
+    db_pool = get_db_pool()
+    if not db_pool:
+        return None, False
+
+    try:
+        async with db_pool.acquire() as conn:
+            cached = await conn.fetchrow('''
+                SELECT data, cached_at
+                FROM trends_cache
+                WHERE trend_type = $1
+                ORDER BY cached_at DESC
+                LIMIT 1
+            ''', name)
+    except Exception as e:
+        logger.error("Ошибка чтения кэша %s: %s", name, e)
+        return None, False
+
+    if not cached:
+        return None, False
+
+    data = cached['data']
+    if isinstance(data, str):
+        data = json.loads(data)
+
+    is_fresh = cached['cached_at'] > datetime.now() - timedelta(hours=ttl_hours)
+    return data, is_fresh
+
+async def _write_cache(name: str, data: list):
+    """Сохранение данных в кэш"""
+    db_pool = get_db_pool()
+    if not db_pool:
+        return
+
+    try:
+        async with db_pool.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO trends_cache (trend_type, data)
+                VALUES ($1, $2::jsonb)
+            ''', name, json.dumps(data, ensure_ascii=False))
+    except Exception as e:
+        logger.error("Ошибка сохранения кэша %s: %s", name, e)
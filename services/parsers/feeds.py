@@ -0,0 +1,130 @@
+"""
+Источники вакансий и ассетов (RSS, JSON API, локальные фикстуры)
+"""
+
+import os
+import json
+import logging
+import aiohttp
+from bs4 import BeautifulSoup
+from config.settings import JOBS_FEED_URLS, FEED_FIXTURES_DIR
+from .base import TrendSource, SourceError
+from .crawler import register_source
+
+logger = logging.getLogger(__name__)
+
+SKETCHFAB_MODELS_API = "https://api.sketchfab.com/v3/models"
+
+class RSSFeedSource(TrendSource):
+    """Лента RSS (например, доска вакансий)"""
+
+    cache_ttl_hours = 1
+
+    def __init__(self, name: str, trend_type: str, url: str):
+        self.name = name
+        self.trend_type = trend_type
+        self.url = url
+
+    async def fetch(self, session: aiohttp.ClientSession, limit: int) -> list:
+        async with session.get(self.url) as response:
+            if response.status != 200:
+                raise SourceError(f"{self.url} вернул статус {response.status}")
+
+            xml = await response.text()
+
+        soup = BeautifulSoup(xml, 'xml')
+        items = []
+
+        for entry in soup.find_all('item')[:limit]:
+            title = entry.find('title')
+            link = entry.find('link')
+            published = entry.find('pubDate')
+
+            if not title or not link:
+                continue
+
+            items.append({
+                'title': title.get_text(strip=True),
+                'url': link.get_text(strip=True),
+                'source': self.name,
+                'published': published.get_text(strip=True) if published else None,
+            })
+
+        return items
+
+class SketchfabAssetsSource(TrendSource):
+    """Топ скачиваемых моделей Sketchfab за неделю"""
+
+    name = 'sketchfab'
+    trend_type = 'assets'
+    default_limit = 20
+    cache_ttl_hours = 6
+
+    async def fetch(self, session: aiohttp.ClientSession, limit: int) -> list:
+        params = {
+            'downloadable': 'true',
+            'sort_by': '-likeCount',
+            'date': 7,
+            'count': limit,
+        }
+
+        async with session.get(SKETCHFAB_MODELS_API, params=params) as response:
+            if response.status != 200:
+                raise SourceError(f"Sketchfab API вернул статус {response.status}")
+
+            data = await response.json()
+
+        items = []
+        for model in data.get('results', [])[:limit]:
+            items.append({
+                'title': model.get('name', 'Untitled'),
+                'url': model.get('viewerUrl', ''),
+                'source': self.name,
+                'author': model.get('user', {}).get('displayName', ''),
+                'likes': model.get('likeCount', 0),
+                'published': model.get('publishedAt'),
+            })
+
+        return items
+
+class LocalFeedSource(TrendSource):
+    """Локальная лента из JSON/JSONL файла (фикстуры для тестов и разработки)"""
+
+    cache_ttl_hours = 0
+    retries = 0
+    min_interval = 0
+
+    def __init__(self, name: str, trend_type: str, path: str):
+        self.name = name
+        self.trend_type = trend_type
+        self.path = path
+
+    async def fetch(self, session: aiohttp.ClientSession, limit: int) -> list:
+        with open(self.path, encoding='utf-8') as f:
+            if self.path.endswith('.jsonl'):
+                items = [json.loads(line) for line in f if line.strip()]
+            else:
+                items = json.load(f)
+
+        for item in items:
+            item.setdefault('source', self.name)
+
+        return items[:limit]
+
+def _register_default_sources():
+    """Регистрация источников вакансий и ассетов"""
+    for i, url in enumerate(JOBS_FEED_URLS):
+        register_source(RSSFeedSource(f'jobs_rss_{i}', 'jobs', url))
+
+    register_source(SketchfabAssetsSource())
+
+    # Фикстуры: файлы вида jobs_*.json / assets_*.jsonl
+    if FEED_FIXTURES_DIR and os.path.isdir(FEED_FIXTURES_DIR):
+        for filename in sorted(os.listdir(FEED_FIXTURES_DIR)):
+            feed_type = filename.split('_', 1)[0]
+            if feed_type in ('jobs', 'assets') and filename.endswith(('.json', '.jsonl')):
+                name = f"local_{os.path.splitext(filename)[0]}"
+                register_source(LocalFeedSource(name, feed_type, os.path.join(FEED_FIXTURES_DIR, filename)))
+                logger.info(f"Подключена локальная лента {filename}")
+
+_register_default_sources()
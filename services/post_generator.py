@@ -2,6 +2,8 @@
 Генератор контента для постов в соцсетях
 """
 
+import re
+import json
 import logging
 from services.gemini_ai import ask_gemini
 from config.platforms import get_platform_config, get_recommended_hashtags
@@ -82,6 +84,65 @@ async def generate_full_post(idea: str, platform: str = None, hashtags: bool = T
         logger.error(f"Ошибка генерации поста: {e}")
         raise
 
+async def generate_week_posts(platforms: list, per_platform: int = 7) -> list:
+    """
+    Генерация пачки постов одним запросом к AI
+    
+    Returns:
+        list: [{'platform': str, 'idea': str, 'post': str}]
+    """
+    platform_lines = []
+    for platform in platforms:
+        config = get_platform_config(platform)
+        max_length = min(config.get('max_length', 2000), 800)
+        platform_lines.append(
+            f"• {platform}: {per_platform} постов, до {max_length} символов, "
+            f"аудитория — {config.get('audience', 'общая')}, контент — {config.get('content_type', 'любой')}"
+        )
+    
+    prompt = f"""
+Составь контент-план 3D-артиста на неделю.
+
+Платформы:
+{chr(10).join(platform_lines)}
+
+Требования к каждому посту:
+• Разные идеи, без повторов
+• Текст поста на АНГЛИЙСКОМ языке, с эмодзи и призывом к действию
+• 3-8 релевантных хештегов в конце
+• Краткое описание идеи на русском (1 предложение)
+
+Ответь ТОЛЬКО JSON-массивом без пояснений:
+[{{"platform": "<платформа>", "idea": "<идея на русском>", "post": "<текст поста>"}}]
+    """
+    
+    try:
+        response = await ask_gemini(prompt)
+    except Exception as e:
+        logger.error(f"Ошибка генерации недельного плана: {e}")
+        raise
+    
+    # Gemini часто оборачивает JSON в ```json ... ```
+    match = re.search(r'\[.*\]', response, re.DOTALL)
+    if not match:
+        raise ValueError("AI вернул ответ не в формате JSON")
+    
+    items = json.loads(match.group(0))
+    
+    posts = []
+    counts = {platform: 0 for platform in platforms}
+    for item in items:
+        platform = item.get('platform')
+        if platform in counts and counts[platform] < per_platform and item.get('post'):
+            counts[platform] += 1
+            posts.append({
+                'platform': platform,
+                'idea': item.get('idea', ''),
+                'post': item['post'],
+            })
+    
+    return posts
+
 async def generate_carousel_captions(num_slides: int = 5) -> list:
     """
     Генерация подписей для карусели (Instagram/LinkedIn)
@@ -0,0 +1,352 @@
+"""
+Публикация одного поста сразу на все платформы
+
+Каждая интеграция оборачивается в Publisher с единым интерфейсом. Конвейер
+адаптирует текст под лимиты платформы, готовит общие данные (перевод, медиа)
+один раз и публикует на все платформы параллельно — общее время равно
+времени самой медленной платформы, а не сумме.
+"""
+
+import re
+import time
+import asyncio
+import logging
+from config.settings import (
+    MAX_POST_LENGTH,
+    PINTEREST_BOARD_ID,
+    TIKTOK_CLIENT_KEY,
+    YOUTUBE_CLIENT_ID
+)
+from config.platforms import get_platform_config
+from database.db import get_db_pool
+from services.response_cache import invalidate, HISTORY
+from services.tokens import token_manager
+from services.translator import translate_to_english
+from services.rate_limits import RateLimitExceeded, check_budget, record_retry_after
+from services.image_pipeline import get_rendition
+from integrations.telegram_channel import post_to_telegram_channel, is_telegram_channel_configured
+from integrations.twitter import get_twitter_publisher, is_twitter_configured
+from integrations.linkedin import post_to_linkedin
+from integrations.pinterest import post_to_pinterest
+from integrations.tiktok import post_to_tiktok
+from integrations.youtube import upload_youtube_video
+from integrations.uploads import TelegramProgress
+
+logger = logging.getLogger(__name__)
+
+class PublishContext:
+    """
+    Общие данные одной публикации
+
+    once() запускает подготовку (перевод, загрузку медиа) один раз на ключ;
+    платформы, которым она нужна, ждут один и тот же результат.
+    bot и chat_id — чат, в котором показывается прогресс загрузки видео.
+    """
+
+    def __init__(self, post: dict, bot=None, chat_id: int = None):
+        self.post = post
+        self.bot = bot
+        self.chat_id = chat_id
+        self._tasks = {}
+
+    async def once(self, key, factory):
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(factory())
+        return await asyncio.shield(task)
+
+    async def text(self, language: str) -> str:
+        """Текст поста на нужном языке (перевод выполняется один раз)"""
+        if language == 'en':
+            if self.post.get('text_en'):
+                return self.post['text_en']
+            return await self.once('text_en', lambda: translate_to_english(self.post['text']))
+        return self.post['text']
+
+    async def image(self, platform_key: str) -> str:
+        """Версия изображения поста для платформы (готовится один раз)"""
+        path = self.post.get('image_path')
+        if not path:
+            return None
+        return await self.once(('image', platform_key), lambda: get_rendition(path, platform_key))
+
+    def progress(self, title: str):
+        """Обработчик прогресса загрузки в чат (None, если чата нет)"""
+        if self.bot is None or self.chat_id is None:
+            return None
+        return TelegramProgress(self.bot, self.chat_id, title)
+
+class Publisher:
+    """
+    Базовый класс публикатора
+
+    Наследники задают платформу (имя как в PLATFORMS_CONFIG), ключ лимита длины
+    в MAX_POST_LENGTH, язык и требуемое медиа, и реализуют send().
+    Перед отправкой списывается бюджет ledger_endpoint из журнала лимитов
+    (None — интеграция сама ведёт учёт по своим эндпоинтам).
+    token_platform — платформа в менеджере токенов: публикатор настроен,
+    если у аккаунта бота есть токен (из platform_tokens или окружения).
+    """
+
+    platform = None
+    length_key = None
+    language = 'en'
+    requires = None  # None, 'image', 'image_url' или 'video'
+    ledger_endpoint = 'publish'
+    token_platform = None
+
+    async def is_configured(self) -> bool:
+        if self.token_platform is None:
+            return True
+        return await token_manager.has_token(self.token_platform)
+
+    def max_length(self, post: dict) -> int:
+        limits = [MAX_POST_LENGTH.get(self.length_key), get_platform_config(self.platform).get('max_length')]
+        return min(limit for limit in limits if limit) if any(limits) else 0
+
+    def max_hashtags(self) -> int:
+        return get_platform_config(self.platform).get('max_hashtags', 30)
+
+    def missing_media(self, post: dict) -> str:
+        """Описание недостающего медиа (None, если всего хватает)"""
+        needed = {'image': 'image_path', 'image_url': 'image_url', 'video': 'video_path'}.get(self.requires)
+        if needed and not post.get(needed):
+            return f'{self.platform} requires {self.requires}'
+        return None
+
+    async def prepare_text(self, ctx: PublishContext) -> str:
+        return adapt_text(await ctx.text(self.language), self.max_length(ctx.post), self.max_hashtags())
+
+    async def send(self, text: str, ctx: PublishContext) -> dict:
+        raise NotImplementedError
+
+    async def publish(self, ctx: PublishContext) -> dict:
+        """Публикация (ошибки возвращаются в результате, а не выбрасываются)"""
+        if not await self.is_configured():
+            return {'success': False, 'error': 'Not configured'}
+
+        missing = self.missing_media(ctx.post)
+        if missing:
+            return {'success': False, 'error': missing}
+
+        started = time.monotonic()
+        try:
+            if self.ledger_endpoint:
+                await check_budget(self.length_key, self.ledger_endpoint)
+            result = await self.send(await self.prepare_text(ctx), ctx)
+            if self.ledger_endpoint and result.get('retry_after'):
+                await record_retry_after(self.length_key, self.ledger_endpoint, result['retry_after'])
+        except RateLimitExceeded as e:
+            logger.warning(f"⏳ {e}")
+            result = {'success': False, 'error': 'rate_limited', 'retry_after': e.retry_after}
+        except Exception as e:
+            logger.error(f"❌ Ошибка публикации в {self.platform}: {e}")
+            result = {'success': False, 'error': str(e)}
+
+        result['elapsed'] = round(time.monotonic() - started, 2)
+        return result
+
+# ========================================
+# АДАПТАЦИЯ ТЕКСТА
+# ========================================
+
+HASHTAG_RE = re.compile(r'#\w+')
+
+def adapt_text(text: str, max_length: int, max_hashtags: int = None) -> str:
+    """
+    Подгонка текста под платформу
+
+    Лишние хештеги (сверх max_hashtags) убираются с конца, длинный текст
+    обрезается по границе слова с многоточием.
+    """
+    if max_hashtags is not None:
+        tags = HASHTAG_RE.findall(text)
+        for tag in tags[max_hashtags:][::-1]:
+            index = text.rfind(tag)
+            text = text[:index] + text[index + len(tag):]
+        text = re.sub(r'[ \t]{2,}', ' ', text).strip()
+
+    if max_length and len(text) > max_length:
+        cut = text[:max_length - 3]
+        space = cut.rfind(' ')
+        if space > max_length // 2:
+            cut = cut[:space]
+        text = cut.rstrip(' ,.;:-') + '...'
+
+    return text
+
+# ========================================
+# ПУБЛИКАТОРЫ ПЛАТФОРМ
+# ========================================
+
+class TelegramPublisher(Publisher):
+    platform = 'Telegram'
+    length_key = 'telegram'
+    language = 'ru'
+    ledger_endpoint = None
+
+    async def is_configured(self) -> bool:
+        return is_telegram_channel_configured()
+
+    def max_length(self, post: dict) -> int:
+        # Подпись к фото в Telegram ограничена 1024 символами
+        return 1024 if post.get('image_path') else super().max_length(post)
+
+    async def send(self, text: str, ctx: PublishContext) -> dict:
+        return await post_to_telegram_channel(text, image_path=await ctx.image(self.length_key))
+
+class XPublisher(Publisher):
+    platform = 'X (Twitter)'
+    length_key = 'twitter'
+    ledger_endpoint = None
+
+    async def is_configured(self) -> bool:
+        return is_twitter_configured()
+
+    async def send(self, text: str, ctx: PublishContext) -> dict:
+        publisher = get_twitter_publisher()
+        media_ids = None
+        image_path = await ctx.image(self.length_key)
+        if image_path:
+            media_ids = [await ctx.once(('twitter_media', image_path), lambda: publisher.upload_media(image_path))]
+        return await publisher.publish(text, media_ids=media_ids)
+
+class LinkedInPublisher(Publisher):
+    platform = 'LinkedIn'
+    length_key = 'linkedin'
+    token_platform = 'linkedin'
+
+    async def send(self, text: str, ctx: PublishContext) -> dict:
+        return await post_to_linkedin(text, image_url=ctx.post.get('image_url'))
+
+class PinterestPublisher(Publisher):
+    platform = 'Pinterest'
+    length_key = 'pinterest'
+    token_platform = 'pinterest'
+
+    async def is_configured(self) -> bool:
+        return bool(PINTEREST_BOARD_ID) and await super().is_configured()
+
+    def missing_media(self, post: dict) -> str:
+        # Подойдёт и ссылка, и сохранённый файл (загружается как image_base64)
+        if not post.get('image_url') and not post.get('image_path'):
+            return f'{self.platform} requires image'
+        return None
+
+    async def send(self, text: str, ctx: PublishContext) -> dict:
+        title = ctx.post.get('title') or text.split('\n', 1)[0][:100]
+        image_url = ctx.post.get('image_url')
+        return await post_to_pinterest(
+            title=title,
+            description=text,
+            image_url=image_url,
+            link=ctx.post.get('link'),
+            board_id=PINTEREST_BOARD_ID,
+            image_path=None if image_url else await ctx.image(self.length_key)
+        )
+
+class TikTokPublisher(Publisher):
+    platform = 'TikTok'
+    length_key = 'tiktok'
+    requires = 'video'
+    token_platform = 'tiktok'
+
+    async def is_configured(self) -> bool:
+        return bool(TIKTOK_CLIENT_KEY) and await super().is_configured()
+
+    async def send(self, text: str, ctx: PublishContext) -> dict:
+        return await post_to_tiktok(ctx.post['video_path'], text, progress=ctx.progress(self.platform))
+
+class YouTubePublisher(Publisher):
+    platform = 'YouTube'
+    length_key = 'youtube'
+    requires = 'video'
+
+    async def is_configured(self) -> bool:
+        return bool(YOUTUBE_CLIENT_ID)
+
+    async def send(self, text: str, ctx: PublishContext) -> dict:
+        title = ctx.post.get('title') or text.split('\n', 1)[0]
+        tags = [tag.lstrip('#') for tag in HASHTAG_RE.findall(text)]
+        return await upload_youtube_video(title[:100], text, ctx.post['video_path'], tags=tags,
+                                          progress=ctx.progress(self.platform))
+
+# ========================================
+# РЕЕСТР И КОНВЕЙЕР
+# ========================================
+
+_publishers = {}
+
+def register_publisher(publisher: Publisher):
+    """Регистрация публикатора платформы"""
+    _publishers[publisher.platform] = publisher
+    return publisher
+
+def get_publisher(platform: str) -> Publisher:
+    return _publishers.get(platform)
+
+async def get_publishers(configured_only: bool = True) -> list:
+    """Список публикаторов (по умолчанию — только настроенных)"""
+    publishers = list(_publishers.values())
+    if not configured_only:
+        return publishers
+    configured = await asyncio.gather(*(p.is_configured() for p in publishers))
+    return [p for p, ok in zip(publishers, configured) if ok]
+
+for _publisher in (TelegramPublisher(), XPublisher(), LinkedInPublisher(), PinterestPublisher(),
+                   TikTokPublisher(), YouTubePublisher()):
+    register_publisher(_publisher)
+
+async def publish_post(user_id: int, post: dict, platforms: list = None, bot=None, chat_id: int = None) -> dict:
+    """
+    Публикация поста на несколько платформ параллельно
+
+    Args:
+        user_id: Автор (для post_history)
+        post: {'text': str, 'text_en': str, 'title': str, 'image_path': str,
+               'image_url': str, 'video_path': str, 'link': str,
+               'media_id': int (файл media_files, из которого взят путь)}
+        platforms: Платформы (по умолчанию — все настроенные)
+        bot, chat_id: Чат для прогресса загрузки видео (TikTok, YouTube)
+
+    Returns:
+        dict: {платформа: результат публикации}
+    """
+    if platforms is None:
+        publishers = await get_publishers()
+    else:
+        publishers = []
+        for platform in platforms:
+            publisher = get_publisher(platform)
+            if publisher is None:
+                logger.warning(f"⚠️ Нет публикатора для {platform}")
+                continue
+            publishers.append(publisher)
+
+    ctx = PublishContext(post, bot=bot, chat_id=chat_id)
+    results = await asyncio.gather(*(publisher.publish(ctx) for publisher in publishers))
+    results = {publisher.platform: result for publisher, result in zip(publishers, results)}
+
+    published = sum(1 for r in results.values() if r.get('success'))
+    logger.info(f"📤 Опубликовано: {published}/{len(results)}")
+
+    await save_post_history(user_id, post['text'], results)
+    return results
+
+async def save_post_history(user_id: int, content: str, results: dict):
+    """Запись успешных публикаций в post_history одним запросом"""
+    published = [(platform, result.get('url')) for platform, result in results.items() if result.get('success')]
+    db_pool = get_db_pool()
+    if not published or not db_pool:
+        return
+
+    try:
+        async with db_pool.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO post_history (user_id, platform, content, post_url)
+                SELECT $1, platform, $2, post_url
+                FROM unnest($3::text[], $4::text[]) AS t(platform, post_url)
+            ''', user_id, content, [p for p, _ in published], [u for _, u in published])
+        await invalidate(user_id, HISTORY)
+    except Exception as e:
+        logger.error(f"Ошибка записи истории публикаций: {e}")
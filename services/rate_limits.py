@@ -0,0 +1,298 @@
+"""
+Общий журнал лимитов API платформ
+
+Запись на каждую тройку (платформа, аккаунт, эндпоинт): остаток запросов и
+время сброса окна. Журнал заполняется из заголовков ответов
+(x-rate-limit-*, retry-after) и хранится в Postgres, поэтому несколько
+процессов бота видят один и тот же бюджет. Перед запросом вызывается
+acquire(): он атомарно списывает запрос или сообщает, сколько ждать.
+
+Известные заранее лимиты (configure_limit) считаются скользящим окном:
+в sent_at хранятся времена списаний за последние window_seconds, поэтому
+на стыке окон бюджет не тратится дважды. Остаток и время сброса из
+заголовков и Retry-After проверяются поверх окна.
+
+Без БД журнал работает в памяти процесса.
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from database.db import get_db_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ACCOUNT = 'default'
+
+class RateLimitExceeded(Exception):
+    """Бюджет запросов исчерпан"""
+
+    def __init__(self, platform: str, endpoint: str, retry_after: float):
+        super().__init__(f"{platform} {endpoint}: лимит исчерпан, повтор через {int(retry_after)} сек")
+        self.platform = platform
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+# Пауза после 429, если API не сказал, сколько ждать (сек)
+DEFAULT_RETRY_AFTER = 60.0
+
+# Заголовки лимитов разных API: (лимит, остаток, сброс)
+LIMIT_HEADERS = [
+    ('x-rate-limit-limit', 'x-rate-limit-remaining', 'x-rate-limit-reset'),
+    ('x-ratelimit-limit', 'x-ratelimit-remaining', 'x-ratelimit-reset'),
+]
+
+# Атомарное списание. Остаток из заголовков действует до reset_at; для
+# лимитов с window_seconds дополнительно нужно, чтобы за последние
+# window_seconds было списано не больше quota - cost. Ждать приходится до
+# выхода из окна самого раннего списания, которое мешает.
+ACQUIRE_SQL = '''
+    WITH cur AS (
+        SELECT platform, account, endpoint, quota, window_seconds, reset_at,
+               CASE WHEN reset_at IS NULL OR reset_at <= now() THEN NULL ELSE remaining END AS remaining,
+               ARRAY(
+                   SELECT t FROM unnest(sent_at) AS t
+                   WHERE t > now() - make_interval(secs => window_seconds)
+                   ORDER BY t
+               ) AS recent
+        FROM rate_limit_ledger
+        WHERE platform = $1 AND account = $2 AND endpoint = $3
+        FOR UPDATE
+    ), d AS (
+        SELECT *,
+               (remaining IS NULL OR remaining >= $4) AS server_ok,
+               (window_seconds IS NULL OR quota IS NULL OR cardinality(recent) + $4 <= quota) AS window_ok
+        FROM cur
+    )
+    UPDATE rate_limit_ledger l
+    SET remaining = CASE WHEN d.server_ok AND d.window_ok AND d.remaining IS NOT NULL
+                         THEN d.remaining - $4 ELSE l.remaining END,
+        sent_at = CASE WHEN d.window_seconds IS NULL THEN NULL
+                       WHEN d.server_ok AND d.window_ok THEN d.recent || array_fill(now(), ARRAY[$4::int])
+                       ELSE d.recent END,
+        updated_at = now()
+    FROM d
+    WHERE l.platform = d.platform AND l.account = d.account AND l.endpoint = d.endpoint
+    RETURNING (d.server_ok AND d.window_ok) AS allowed,
+              GREATEST(
+                  CASE WHEN d.server_ok THEN 0 ELSE EXTRACT(EPOCH FROM (d.reset_at - now())) END,
+                  CASE WHEN d.window_ok THEN 0 ELSE EXTRACT(EPOCH FROM (
+                      d.recent[cardinality(d.recent) + $4 - d.quota]
+                      + make_interval(secs => d.window_seconds) - now()
+                  )) END,
+                  0
+              )::float AS wait
+'''
+
+# Запасной журнал в памяти: key -> {'quota', 'remaining', 'reset_at', 'window', 'sent'}
+_local = {}
+
+# Ключи, для которых лимит по умолчанию уже записан в этом процессе
+_configured = set()
+
+def _key(platform: str, account: str, endpoint: str) -> tuple:
+    return (platform, str(account or DEFAULT_ACCOUNT), endpoint)
+
+async def configure_limit(platform: str, endpoint: str, quota: int, window_seconds: float, account: str = DEFAULT_ACCOUNT):
+    """
+    Известный заранее лимит (например, 20 сообщений в минуту в канал Telegram)
+
+    Не перезаписывает данные, уже полученные из заголовков.
+    """
+    key = _key(platform, account, endpoint)
+    if key in _configured:
+        return
+    _configured.add(key)
+
+    db_pool = get_db_pool()
+    if not db_pool:
+        _local.setdefault(key, {'quota': quota, 'remaining': None, 'reset_at': None, 'window': window_seconds, 'sent': deque()})
+        return
+
+    try:
+        async with db_pool.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO rate_limit_ledger (platform, account, endpoint, quota, remaining, window_seconds)
+                VALUES ($1, $2, $3, $4, $4, $5)
+                ON CONFLICT (platform, account, endpoint)
+                DO UPDATE SET quota = EXCLUDED.quota, window_seconds = EXCLUDED.window_seconds
+            ''', *key, quota, float(window_seconds))
+    except Exception as e:
+        _configured.discard(key)
+        logger.error(f"Ошибка записи лимита {key}: {e}")
+
+async def record_limit(platform: str, endpoint: str, account: str = DEFAULT_ACCOUNT,
+                       quota: int = None, remaining: int = None, reset_at: float = None):
+    """Запись состояния лимита (reset_at — unix time)"""
+    key = _key(platform, account, endpoint)
+    db_pool = get_db_pool()
+
+    if not db_pool:
+        entry = _local.setdefault(key, {'quota': None, 'remaining': None, 'reset_at': None, 'window': None, 'sent': deque()})
+        if quota is not None:
+            entry['quota'] = quota
+        if remaining is not None:
+            entry['remaining'] = remaining
+        if reset_at is not None:
+            entry['reset_at'] = reset_at
+        return
+
+    reset = datetime.fromtimestamp(reset_at, timezone.utc) if reset_at is not None else None
+    try:
+        async with db_pool.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO rate_limit_ledger (platform, account, endpoint, quota, remaining, reset_at)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                ON CONFLICT (platform, account, endpoint) DO UPDATE SET
+                    quota = COALESCE(EXCLUDED.quota, rate_limit_ledger.quota),
+                    remaining = COALESCE(EXCLUDED.remaining, rate_limit_ledger.remaining),
+                    reset_at = COALESCE(EXCLUDED.reset_at, rate_limit_ledger.reset_at),
+                    updated_at = now()
+            ''', *key, quota, remaining, reset)
+    except Exception as e:
+        logger.error(f"Ошибка записи лимита {key}: {e}")
+
+def parse_retry_after(value) -> float:
+    """Retry-After: секунды или HTTP-дата"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_after_from_headers(headers) -> float:
+    """Пауза после 429: Retry-After, иначе время сброса лимита, иначе DEFAULT_RETRY_AFTER"""
+    headers = {k.lower(): v for k, v in headers.items()}
+
+    retry_after = parse_retry_after(headers.get('retry-after'))
+    if retry_after is not None:
+        return retry_after
+
+    for _, _, reset_header in LIMIT_HEADERS:
+        try:
+            reset = float(headers[reset_header])
+        except (KeyError, ValueError):
+            continue
+        return max(0.0, reset - time.time()) if reset >= 10 ** 9 else reset
+
+    return DEFAULT_RETRY_AFTER
+
+def rate_limited(headers) -> dict:
+    """Результат публикации для ответа 429 (Publisher запишет паузу в журнал)"""
+    return {'success': False, 'error': 'rate_limited', 'retry_after': retry_after_from_headers(headers)}
+
+async def record_headers(platform: str, endpoint: str, headers, account: str = DEFAULT_ACCOUNT):
+    """Заполнение журнала из заголовков ответа"""
+    headers = {k.lower(): v for k, v in headers.items()}
+
+    retry_after = parse_retry_after(headers.get('retry-after'))
+    if retry_after is not None:
+        await record_retry_after(platform, endpoint, retry_after, account)
+        return
+
+    for limit_header, remaining_header, reset_header in LIMIT_HEADERS:
+        if remaining_header not in headers:
+            continue
+        try:
+            reset = float(headers[reset_header]) if reset_header in headers else None
+            # Некоторые API отдают не время сброса, а секунды до него
+            if reset is not None and reset < 10 ** 9:
+                reset += time.time()
+            await record_limit(
+                platform, endpoint, account,
+                quota=int(headers[limit_header]) if limit_header in headers else None,
+                remaining=int(headers[remaining_header]),
+                reset_at=reset
+            )
+        except ValueError:
+            pass
+        return
+
+async def record_retry_after(platform: str, endpoint: str, retry_after: float, account: str = DEFAULT_ACCOUNT):
+    """Платформа попросила подождать: бюджет исчерпан до now + retry_after"""
+    await record_limit(platform, endpoint, account, remaining=0, reset_at=time.time() + retry_after)
+
+def _acquire_local(key: tuple, cost: int) -> float:
+    entry = _local.get(key)
+    if not entry:
+        return 0.0
+
+    now = time.time()
+    remaining = entry['remaining'] if entry['reset_at'] and entry['reset_at'] > now else None
+    allowed = remaining is None or remaining >= cost
+    wait = 0.0 if allowed else entry['reset_at'] - now
+
+    window, quota, sent = entry['window'], entry['quota'], entry['sent']
+    if window and quota:
+        while sent and now - sent[0] >= window:
+            sent.popleft()
+        if len(sent) + cost > quota:
+            allowed = False
+            # Квота меньше cost — ждать бесполезно (как и в SQL)
+            if cost <= quota:
+                wait = max(wait, sent[len(sent) + cost - quota - 1] + window - now)
+
+    if not allowed:
+        return wait
+
+    if window and quota:
+        sent.extend([now] * cost)
+    if remaining is not None:
+        entry['remaining'] = remaining - cost
+    return 0.0
+
+async def acquire(platform: str, endpoint: str, account: str = DEFAULT_ACCOUNT, cost: int = 1) -> float:
+    """
+    Списать cost запросов из бюджета
+
+    Returns:
+        float: 0 — можно выполнять запрос; иначе сколько секунд ждать
+    """
+    key = _key(platform, account, endpoint)
+    db_pool = get_db_pool()
+    if not db_pool:
+        return _acquire_local(key, cost)
+
+    try:
+        async with db_pool.acquire() as conn:
+            row = await conn.fetchrow(ACQUIRE_SQL, *key, cost)
+    except Exception as e:
+        logger.error(f"Ошибка журнала лимитов {key}: {e}")
+        return 0.0
+
+    if row is None or row['allowed']:
+        return 0.0
+    # Квота меньше cost даже в новом окне — ждать бесполезно, пропускаем
+    return row['wait'] or 0.0
+
+async def check_budget(platform: str, endpoint: str, account: str = DEFAULT_ACCOUNT, cost: int = 1):
+    """Списать бюджет или выбросить RateLimitExceeded"""
+    wait = await acquire(platform, endpoint, account, cost)
+    if wait:
+        raise RateLimitExceeded(platform, endpoint, wait)
+
+async def wait_for_budget(platform: str, endpoint: str, account: str = DEFAULT_ACCOUNT,
+                          cost: int = 1, max_wait: float = None) -> bool:
+    """
+    Дождаться бюджета и списать его
+
+    Returns:
+        bool: False, если ждать пришлось бы дольше max_wait
+    """
+    waited = 0.0
+    while True:
+        wait = await acquire(platform, endpoint, account, cost)
+        if not wait:
+            return True
+        if max_wait is not None and waited + wait > max_wait:
+            return False
+        await asyncio.sleep(wait)
+        waited += wait
@@ -0,0 +1,176 @@
+"""
+Кэш чтений для команд-списков (/notes, /tasks, /scheduled, /notifications, /stats)
+
+Результат запроса хранится в памяти под ключом (пользователь, имя, версии
+областей). Обработчики записи вызывают invalidate(user_id, область) — версия
+области растёт, старые записи становятся недостижимыми и вытесняются LRU.
+RESPONSE_CACHE_TTL — страховка для изменений в обход обработчиков.
+
+Несколько реплик бота узнают об изменениях через Postgres LISTEN/NOTIFY:
+invalidate() отправляет pg_notify, а отдельное соединение слушает канал и
+повышает версии у себя. После подключения слушателя кэш очищается
+целиком — уведомления до LISTEN и за время обрыва потеряны.
+"""
+
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+import asyncpg
+from config.settings import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+from database.db import DATABASE_URL, get_db_pool
+from utils.metrics import RESPONSE_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'response_cache'
+
+# Области данных, которые повышают обработчики записи
+NOTES = 'notes'
+TASKS = 'tasks'
+POSTS = 'posts'
+HISTORY = 'history'
+NOTIFICATIONS = 'notifications'
+
+# Пауза перед переподключением слушателя (сек)
+RECONNECT_DELAY = 5
+
+# Уведомления этого процесса слушатель пропускает
+_origin = uuid.uuid4().hex[:12]
+
+_versions = {}             # (user_id, область) -> версия
+_entries = OrderedDict()   # (user_id, имя, версии) -> (время записи, значение)
+_listener_task = None
+
+# Функции (user_id, области), вызываемые при изменениях с других реплик
+_remote_hooks = []
+
+def _version_key(user_id: int, scopes: tuple) -> tuple:
+    return tuple(_versions.get((user_id, scope), 0) for scope in scopes)
+
+async def cached(user_id: int, name: str, loader, depends: tuple = None):
+    """
+    Значение из кэша или результат await loader()
+
+    Args:
+        user_id: Пользователь
+        name: Имя запроса (метка в метриках)
+        loader: async-функция без аргументов, читающая данные из БД
+        depends: Области, от которых зависит результат (по умолчанию — (name,))
+    """
+    scopes = depends or (name,)
+    versions = _version_key(user_id, scopes)
+    key = (user_id, name, versions)
+
+    entry = _entries.get(key)
+    if entry is not None and time.monotonic() - entry[0] < RESPONSE_CACHE_TTL:
+        _entries.move_to_end(key)
+        RESPONSE_CACHE_REQUESTS.labels(name, 'hit').inc()
+        return entry[1]
+
+    RESPONSE_CACHE_REQUESTS.labels(name, 'miss').inc()
+    value = await loader()
+
+    # Если во время запроса данные изменились, результат уже устарел
+    if _version_key(user_id, scopes) == versions:
+        _entries[key] = (time.monotonic(), value)
+        _entries.move_to_end(key)
+        while len(_entries) > RESPONSE_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+    return value
+
+def _bump(user_id: int, scopes):
+    for scope in scopes:
+        _versions[(user_id, scope)] = _versions.get((user_id, scope), 0) + 1
+
+async def invalidate(user_id: int, *scopes: str):
+    """Данные пользователя изменились: сбросить кэш здесь и на других репликах"""
+    _bump(user_id, scopes)
+
+    db_pool = get_db_pool()
+    if not db_pool:
+        return
+
+    try:
+        async with db_pool.acquire() as conn:
+            await conn.execute('SELECT pg_notify($1, $2)', CHANNEL, f"{_origin}:{user_id}:{','.join(scopes)}")
+    except Exception as e:
+        logger.error("Ошибка отправки инвалидации кэша: %s", e)
+
+def clear():
+    """Очистить кэш целиком"""
+    _entries.clear()
+
+# ========================================
+# LISTEN/NOTIFY
+# ========================================
+
+def on_remote_invalidate(hook):
+    """
+    Подписка на изменения с других реплик: hook(user_id, области)
+
+    После каждого подключения слушателя (и первого тоже) hook вызывается
+    с user_id None — изменения до LISTEN не пришли уведомлениями, данные
+    надо перечитать целиком.
+    """
+    _remote_hooks.append(hook)
+    return hook
+
+def _run_hooks(user_id, scopes: tuple):
+    for hook in _remote_hooks:
+        try:
+            hook(user_id, scopes)
+        except Exception as e:
+            logger.error("Ошибка обработчика инвалидации: %s", e)
+
+def _on_notify(connection, pid, channel, payload):
+    try:
+        origin, user_id, scopes = payload.split(':', 2)
+        if origin == _origin:
+            return
+        user_id, scopes = int(user_id), tuple(scopes.split(','))
+    except ValueError:
+        logger.warning("⚠️ Неверное уведомление кэша: %s", payload)
+        return
+
+    _bump(user_id, scopes)
+    _run_hooks(user_id, scopes)
+
+async def _listen():
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(DATABASE_URL)
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _: closed.set())
+            await conn.add_listener(CHANNEL, _on_notify)
+
+            # Пока слушателя не было, уведомления могли потеряться
+            clear()
+            _run_hooks(None, ())
+            logger.info("✅ Инвалидация кэша чтений: LISTEN %s", CHANNEL)
+            await closed.wait()
+            logger.warning("⚠️ Соединение LISTEN закрыто, переподключение")
+        except asyncio.CancelledError:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+            raise
+        except Exception as e:
+            logger.error("❌ Ошибка LISTEN %s: %s", CHANNEL, e)
+
+        await asyncio.sleep(RECONNECT_DELAY)
+
+def start_cache_listener():
+    """Запуск слушателя инвалидаций (вызывается при старте после init_db)"""
+    global _listener_task
+    if _listener_task is None and DATABASE_URL:
+        _listener_task = asyncio.create_task(_listen())
+
+async def stop_cache_listener():
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        await asyncio.gather(_listener_task, return_exceptions=True)
+        _listener_task = None
@@ -1,7 +1,10 @@
 """
-Планировщики - временно отключены
+Планировщики
 """
 
-async def setup_scheduler(bot):
-    """Заглушка"""
-    pass
+from .notifications import setup_scheduler, send_feed_digest
+
+__all__ = [
+    'setup_scheduler',
+    'send_feed_digest',
+]
@@ -1,7 +1,101 @@
 """
-Уведомления - временно отключены
+Ежедневные уведомления: вакансии (11:00) и ассеты (12:00)
 """
 
-async def setup_scheduler(bot):
-    """Заглушка - будет добавлено позже"""
-    pass
+import logging
+from datetime import time
+import pytz
+from telegram.error import Forbidden, RetryAfter
+from telegram.ext import Application, ContextTypes
+from config.settings import NOTIFICATION_TIMES, TIMEZONE, BROADCAST_MESSAGES_PER_SECOND
+from services.feeds import ingest_feed, get_new_items, mark_delivered, get_feed_subscribers
+from services.rate_limits import configure_limit, wait_for_budget, record_retry_after
+from utils.message_builder import MessageBuilder, escape_markdown, escape_url
+
+logger = logging.getLogger(__name__)
+
+DIGEST_TITLES = {
+    'jobs': '💼 **Свежие вакансии и фриланс**',
+    'assets': '🎨 **Топ ассетов недели**',
+}
+
+async def setup_scheduler(app: Application):
+    """Регистрация ежедневных рассылок в JobQueue"""
+    if app.job_queue is None:
+        logger.warning("⚠️ JobQueue недоступен (нужен python-telegram-bot[job-queue])")
+        return
+
+    tz = pytz.timezone(TIMEZONE)
+
+    for feed_type in DIGEST_TITLES:
+        app.job_queue.run_daily(
+            send_feed_digest_job,
+            time=time(hour=NOTIFICATION_TIMES[feed_type], tzinfo=tz),
+            data=feed_type,
+            name=f"digest_{feed_type}"
+        )
+
+    logger.info("✅ Рассылки вакансий и ассетов запланированы")
+
+async def send_feed_digest_job(context: ContextTypes.DEFAULT_TYPE):
+    """Задача JobQueue"""
+    await send_feed_digest(context.bot, context.job.data)
+
+async def send_feed_digest(bot, feed_type: str) -> int:
+    """
+    Загрузка ленты и рассылка новых записей подписчикам
+
+    Returns:
+        int: Количество отправленных дайджестов
+    """
+    await ingest_feed(feed_type)
+
+    # Общий бюджет рассылки бота (делится между процессами)
+    await configure_limit('telegram', 'broadcast', BROADCAST_MESSAGES_PER_SECOND, 1, account=bot.id)
+
+    sent = 0
+    for user_id in await get_feed_subscribers(feed_type):
+        try:
+            items = await get_new_items(user_id, feed_type)
+            if not items:
+                continue
+
+            message = MessageBuilder().add(f"{DIGEST_TITLES[feed_type]}\n\n")
+            for i, item in enumerate(items, 1):
+                # Заголовки внешних лент — вне ссылки: внутри [...] Telegram
+                # не понимает экранирование, а _ и * ломают разметку
+                link = f" — [открыть]({escape_url(item['url'])})" if item['url'] else ''
+                message.add(f"{i}. {escape_markdown(item['title'])}{link}\n")
+
+            message.add(f"\n💡 Отключить: `/togglenotif {feed_type}`")
+
+            for chunk in message.build():
+                await _send_with_budget(bot, user_id, chunk)
+            await mark_delivered(user_id, feed_type, max(item['id'] for item in items))
+            sent += 1
+
+        except Forbidden:
+            logger.info("Пользователь %s заблокировал бота", user_id)
+        except Exception as e:
+            logger.error("Ошибка отправки дайджеста %s пользователю %s: %s", feed_type, user_id, e)
+
+    logger.info(f"✅ Дайджест {feed_type} отправлен {sent} пользователям")
+    return sent
+
+async def _send_with_budget(bot, chat_id: int, text: str, attempts: int = 3):
+    """Отправка сообщения рассылки в пределах бюджета бота (с учётом RetryAfter)"""
+    for attempt in range(attempts):
+        await wait_for_budget('telegram', 'broadcast', account=bot.id)
+        try:
+            return await bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode='Markdown',
+                disable_web_page_preview=True
+            )
+        except RetryAfter as e:
+            if attempt == attempts - 1:
+                raise
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+            logger.warning(f"⏳ Рассылка: Telegram просит подождать {retry_after} сек")
+            await record_retry_after('telegram', 'broadcast', retry_after, account=bot.id)
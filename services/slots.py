@@ -0,0 +1,179 @@
+"""
+Распределение времени публикаций по слотам платформ
+
+Для каждой платформы и дня хранится счётчик бронирований на каждую минуту
+(bytearray на 1440 байт) и отсортированный список свободных минут внутри
+рекомендованных окон BEST_POSTING_TIMES. Поиск ближайшего свободного слота —
+бинарный поиск по этому списку.
+"""
+
+import logging
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, date as date_type
+from config.platforms import get_best_times
+from config.settings import SLOT_CAPACITY_PER_MINUTE
+from database.db import get_db_pool
+from utils.helpers import is_weekend
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+
+# Насколько далеко вперёд искать свободный слот (дней)
+SEARCH_HORIZON_DAYS = 14
+
+class SlotCalendar:
+    """Календарь загрузки одной платформы"""
+
+    def __init__(self, platform: str, capacity: int = SLOT_CAPACITY_PER_MINUTE):
+        self.platform = platform
+        self.capacity = max(1, min(capacity, 255))
+        self._counts = {}   # date -> bytearray(1440), бронирования по минутам
+        self._free = {}     # date -> sorted list свободных минут в окнах
+
+    def _day(self, day: date_type):
+        if day not in self._counts:
+            hours = get_best_times(self.platform, is_weekend(datetime.combine(day, datetime.min.time())))
+            self._counts[day] = bytearray(MINUTES_PER_DAY)
+            self._free[day] = [h * 60 + m for h in sorted(set(hours)) for m in range(60)]
+        return self._counts[day], self._free[day]
+
+    def _in_window(self, day: date_type, minute: int) -> bool:
+        hours = get_best_times(self.platform, is_weekend(datetime.combine(day, datetime.min.time())))
+        return minute // 60 in hours
+
+    def load(self, dt: datetime) -> int:
+        """Количество бронирований на минуту"""
+        counts, _ = self._day(dt.date())
+        return counts[dt.hour * 60 + dt.minute]
+
+    def reserve(self, dt: datetime, force: bool = False) -> bool:
+        """Забронировать минуту (False, если она уже заполнена и не force)"""
+        counts, free = self._day(dt.date())
+        minute = dt.hour * 60 + dt.minute
+
+        if counts[minute] >= self.capacity and not force:
+            return False
+
+        counts[minute] = min(counts[minute] + 1, 255)
+        if counts[minute] >= self.capacity:
+            i = bisect_left(free, minute)
+            if i < len(free) and free[i] == minute:
+                free.pop(i)
+
+        return True
+
+    def release(self, dt: datetime):
+        """Освободить минуту"""
+        day = dt.date()
+        if day not in self._counts:
+            return
+
+        counts, free = self._counts[day], self._free[day]
+        minute = dt.hour * 60 + dt.minute
+
+        if counts[minute] == 0:
+            return
+
+        counts[minute] -= 1
+        if counts[minute] == self.capacity - 1 and self._in_window(day, minute):
+            insort(free, minute)
+
+    def next_free(self, after: datetime, until: datetime = None) -> datetime:
+        """Ближайшая свободная минута в рекомендованных окнах (или None)"""
+        until = until or after + timedelta(days=SEARCH_HORIZON_DAYS)
+        day = after.date()
+
+        while day <= until.date():
+            _, free = self._day(day)
+            start = 0
+            if day == after.date():
+                start = after.hour * 60 + after.minute + (1 if after.second or after.microsecond else 0)
+
+            i = bisect_left(free, start)
+
+            if i < len(free):
+                slot = datetime.combine(day, datetime.min.time()) + timedelta(minutes=free[i])
+                return slot if slot <= until else None
+
+            day += timedelta(days=1)
+
+        return None
+
+    def prune(self, before: date_type):
+        """Удалить прошедшие дни"""
+        for day in [d for d in self._counts if d < before]:
+            del self._counts[day]
+            del self._free[day]
+
+# Календари по платформам
+_calendars = {}
+
+def get_calendar(platform: str) -> SlotCalendar:
+    """Календарь платформы (создаётся при первом обращении)"""
+    calendar = _calendars.get(platform)
+    if calendar is None:
+        calendar = _calendars[platform] = SlotCalendar(platform)
+    return calendar
+
+async def load_reservations():
+    """Загрузка запланированных постов в календари при старте"""
+    db_pool = get_db_pool()
+    if not db_pool:
+        return
+
+    async with db_pool.acquire() as conn:
+        posts = await conn.fetch('''
+            SELECT platform, scheduled_time
+            FROM scheduled_posts
+            WHERE status = 'pending' AND scheduled_time > CURRENT_TIMESTAMP
+        ''')
+
+    for post in posts:
+        book_slot(post['platform'], post['scheduled_time'])
+
+    logger.info(f"✅ Загружено {len(posts)} слотов публикаций")
+
+def book_slot(platform: str, when: datetime):
+    """Учесть уже запланированный пост: время не сдвигается, даже сверх ёмкости"""
+    get_calendar(platform).reserve(when.replace(second=0, microsecond=0), force=True)
+
+def reserve_slot(platform: str, when: datetime) -> datetime:
+    """
+    Забронировать время публикации
+
+    Если минута заполнена, пост сдвигается на ближайшую свободную минуту
+    в рекомендованных окнах (при необходимости — в окна следующих дней).
+
+    Returns:
+        datetime: Фактически забронированное время (None, если мест нет)
+    """
+    calendar = get_calendar(platform)
+    calendar.prune(datetime.now().date())
+
+    slot = when.replace(second=0, microsecond=0)
+    if calendar.load(slot) >= calendar.capacity:
+        slot = calendar.next_free(slot)
+
+    if slot:
+        calendar.reserve(slot)
+
+    return slot
+
+def allocate_slot(platform: str, after: datetime = None, until: datetime = None) -> datetime:
+    """Забронировать ближайший свободный слот в рекомендованных окнах"""
+    calendar = get_calendar(platform)
+    slot = calendar.next_free(after or datetime.now(), until)
+
+    if slot:
+        calendar.reserve(slot)
+
+    return slot
+
+def suggest_slot(platform: str, after: datetime = None) -> datetime:
+    """Ближайший свободный слот в рекомендованных окнах (без бронирования)"""
+    return get_calendar(platform).next_free(after or datetime.now())
+
+def release_slot(platform: str, when: datetime):
+    """Освободить время публикации"""
+    get_calendar(platform).release(when.replace(second=0, microsecond=0))
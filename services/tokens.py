@@ -0,0 +1,342 @@
+"""
+OAuth-токены платформ: кэш в памяти поверх platform_tokens
+
+Токены читаются из БД один раз и хранятся в памяти. Фоновая задача обновляет
+их заранее, до истечения, поэтому публикация не ждёт OAuth-запроса.
+Обновление одного токена выполняется одним запросом (single-flight внутри
+процесса, блокировка строки FOR UPDATE между процессами).
+
+Ключ токена — (user_id, platform, account): у пользователя может быть
+несколько аккаунтов одной платформы. user_id 0 — аккаунт бота, для него
+при отсутствии записи в БД используются токены из переменных окружения.
+"""
+
+import json
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+import aiohttp
+from config.settings import (
+    YOUTUBE_CLIENT_ID,
+    YOUTUBE_CLIENT_SECRET,
+    YOUTUBE_REFRESH_TOKEN,
+    LINKEDIN_CLIENT_ID,
+    LINKEDIN_CLIENT_SECRET,
+    LINKEDIN_ACCESS_TOKEN,
+    PINTEREST_ACCESS_TOKEN,
+    TIKTOK_CLIENT_KEY,
+    TIKTOK_CLIENT_SECRET,
+    TIKTOK_ACCESS_TOKEN
+)
+from database.db import get_db_pool
+from utils.http import get_http_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ACCOUNT = 'default'
+
+# Аккаунт бота (токены из переменных окружения)
+BOT_USER_ID = 0
+
+# За сколько до истечения обновлять токен
+REFRESH_AHEAD = timedelta(minutes=10)
+
+# Как часто фоновая задача проверяет сроки
+REFRESH_CHECK_INTERVAL = 60
+
+# Токены из окружения: platform -> (access_token, refresh_token)
+ENV_TOKENS = {
+    'youtube': ('', YOUTUBE_REFRESH_TOKEN),
+    'linkedin': (LINKEDIN_ACCESS_TOKEN, ''),
+    'pinterest': (PINTEREST_ACCESS_TOKEN, ''),
+    'tiktok': (TIKTOK_ACCESS_TOKEN, ''),
+}
+
+def _utcnow() -> datetime:
+    """Текущее время UTC без tzinfo (так хранится expires_at)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+# ========================================
+# ОБНОВЛЕНИЕ ТОКЕНОВ ПЛАТФОРМ
+# ========================================
+
+class TokenRefreshError(Exception):
+    """Платформа отказала в обновлении токена"""
+    pass
+
+async def _oauth_refresh(url: str, data: dict, auth: aiohttp.BasicAuth = None) -> dict:
+    """Запрос grant_type=refresh_token к OAuth-эндпоинту"""
+    session = get_http_session()
+    async with session.post(url, data=data, auth=auth, timeout=aiohttp.ClientTimeout(total=30)) as response:
+        payload = await response.json(content_type=None)
+        if response.status != 200 or 'access_token' not in payload:
+            raise TokenRefreshError(f"HTTP {response.status}: {str(payload)[:200]}")
+        return payload
+
+async def _refresh_youtube(refresh_token: str) -> dict:
+    return await _oauth_refresh('https://oauth2.googleapis.com/token', {
+        'grant_type': 'refresh_token',
+        'refresh_token': refresh_token,
+        'client_id': YOUTUBE_CLIENT_ID,
+        'client_secret': YOUTUBE_CLIENT_SECRET,
+    })
+
+async def _refresh_linkedin(refresh_token: str) -> dict:
+    return await _oauth_refresh('https://www.linkedin.com/oauth/v2/accessToken', {
+        'grant_type': 'refresh_token',
+        'refresh_token': refresh_token,
+        'client_id': LINKEDIN_CLIENT_ID,
+        'client_secret': LINKEDIN_CLIENT_SECRET,
+    })
+
+async def _refresh_tiktok(refresh_token: str) -> dict:
+    return await _oauth_refresh('https://open.tiktokapis.com/v2/oauth/token/', {
+        'grant_type': 'refresh_token',
+        'refresh_token': refresh_token,
+        'client_key': TIKTOK_CLIENT_KEY,
+        'client_secret': TIKTOK_CLIENT_SECRET,
+    })
+
+# Платформа -> async refresher(refresh_token) -> ответ OAuth
+REFRESHERS = {
+    'youtube': _refresh_youtube,
+    'linkedin': _refresh_linkedin,
+    'tiktok': _refresh_tiktok,
+}
+
+def register_refresher(platform: str, refresher):
+    """Подключение обновления токенов для платформы"""
+    REFRESHERS[platform] = refresher
+
+# ========================================
+# МЕНЕДЖЕР ТОКЕНОВ
+# ========================================
+
+class TokenManager:
+    """Кэш токенов с фоновым обновлением"""
+
+    def __init__(self):
+        self._cache = {}     # (user_id, platform, account) -> dict токена
+        self._inflight = {}  # key -> asyncio.Task обновления
+        self._task = None
+
+    @staticmethod
+    def _key(user_id: int, platform: str, account: str) -> tuple:
+        return (user_id or BOT_USER_ID, platform, account or DEFAULT_ACCOUNT)
+
+    @staticmethod
+    def _needs_refresh(token: dict, ahead: timedelta = timedelta(0)) -> bool:
+        if not token.get('access_token'):
+            return True
+        expires_at = token.get('expires_at')
+        return expires_at is not None and expires_at - ahead <= _utcnow()
+
+    async def get(self, platform: str, user_id: int = BOT_USER_ID, account: str = DEFAULT_ACCOUNT) -> dict:
+        """
+        Токен (dict с access_token и expires_at) или None
+
+        Если токен уже истёк (например, фоновая задача не успела), он
+        обновляется сейчас, одним запросом на все одновременные вызовы.
+        """
+        key = self._key(user_id, platform, account)
+        token = self._cache.get(key)
+
+        if token is None:
+            token = await self._load(key)
+            if token is None:
+                return None
+
+        if self._needs_refresh(token) and token.get('refresh_token') and platform in REFRESHERS:
+            try:
+                token = await self._refresh(key)
+            except Exception as e:
+                logger.error(f"❌ Не удалось обновить токен {platform}: {e}")
+                return None
+
+        return token if token.get('access_token') else None
+
+    async def has_token(self, platform: str, user_id: int = BOT_USER_ID, account: str = DEFAULT_ACCOUNT) -> bool:
+        """Есть ли у аккаунта токен (действующий или обновляемый), без запроса к платформе"""
+        key = self._key(user_id, platform, account)
+        token = self._cache.get(key)
+        if token is None:
+            try:
+                token = await self._load(key)
+            except Exception as e:
+                logger.error(f"Ошибка чтения токена {platform}: {e}")
+                return False
+        if not token:
+            return False
+        return bool(token.get('access_token') or (token.get('refresh_token') and platform in REFRESHERS))
+
+    async def get_access_token(self, platform: str, user_id: int = BOT_USER_ID, account: str = DEFAULT_ACCOUNT) -> str:
+        token = await self.get(platform, user_id, account)
+        return token['access_token'] if token else None
+
+    async def _load(self, key: tuple) -> dict:
+        """Загрузка из БД (для аккаунта бота — из окружения, если записи нет)"""
+        user_id, platform, account = key
+        token = None
+
+        db_pool = get_db_pool()
+        if db_pool:
+            async with db_pool.acquire() as conn:
+                row = await conn.fetchrow('''
+                    SELECT access_token, refresh_token, expires_at
+                    FROM platform_tokens
+                    WHERE user_id = $1 AND platform = $2 AND account = $3
+                ''', *key)
+            if row:
+                token = dict(row)
+
+        if token is None and user_id == BOT_USER_ID and any(ENV_TOKENS.get(platform, ())):
+            access_token, refresh_token = ENV_TOKENS[platform]
+            token = {'access_token': access_token or None, 'refresh_token': refresh_token or None, 'expires_at': None}
+
+        if token is not None:
+            self._cache[key] = token
+        return token
+
+    def _refresh(self, key: tuple) -> asyncio.Future:
+        """Обновление токена (одновременные вызовы ждут один запрос)"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._do_refresh(key))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return asyncio.shield(task)
+
+    async def _do_refresh(self, key: tuple) -> dict:
+        user_id, platform, account = key
+        db_pool = get_db_pool()
+
+        if not db_pool:
+            token = self._cache[key]
+            token.update(_parse_oauth(await REFRESHERS[platform](token['refresh_token']), token))
+            return token
+
+        async with db_pool.acquire() as conn:
+            async with conn.transaction():
+                # Блокировка строки: другой процесс мог уже обновить токен
+                row = await conn.fetchrow('''
+                    SELECT access_token, refresh_token, expires_at
+                    FROM platform_tokens
+                    WHERE user_id = $1 AND platform = $2 AND account = $3
+                    FOR UPDATE
+                ''', *key)
+                token = dict(row) if row else dict(self._cache[key])
+
+                if not self._needs_refresh(token, REFRESH_AHEAD):
+                    self._cache[key] = token
+                    return token
+
+                token.update(_parse_oauth(await REFRESHERS[platform](token['refresh_token']), token))
+                await conn.execute('''
+                    INSERT INTO platform_tokens (user_id, platform, account, access_token, refresh_token, expires_at)
+                    VALUES ($1, $2, $3, $4, $5, $6)
+                    ON CONFLICT (user_id, platform, account) DO UPDATE SET
+                        access_token = EXCLUDED.access_token,
+                        refresh_token = EXCLUDED.refresh_token,
+                        expires_at = EXCLUDED.expires_at
+                ''', *key, token['access_token'], token['refresh_token'], token['expires_at'])
+
+        self._cache[key] = token
+        logger.info(f"🔑 Токен {platform} ({account}) обновлён до {token['expires_at']:%H:%M} UTC")
+        return token
+
+    async def save(self, platform: str, access_token: str, user_id: int = BOT_USER_ID, account: str = DEFAULT_ACCOUNT,
+                   refresh_token: str = None, expires_in: int = None, extra: dict = None):
+        """Сохранение токена после авторизации пользователя"""
+        key = self._key(user_id, platform, account)
+        expires_at = _utcnow() + timedelta(seconds=expires_in) if expires_in else None
+        token = {'access_token': access_token, 'refresh_token': refresh_token, 'expires_at': expires_at}
+
+        db_pool = get_db_pool()
+        if db_pool:
+            async with db_pool.acquire() as conn:
+                await conn.execute('''
+                    INSERT INTO platform_tokens (user_id, platform, account, access_token, refresh_token, expires_at, extra_data)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7::jsonb)
+                    ON CONFLICT (user_id, platform, account) DO UPDATE SET
+                        access_token = EXCLUDED.access_token,
+                        refresh_token = COALESCE(EXCLUDED.refresh_token, platform_tokens.refresh_token),
+                        expires_at = EXCLUDED.expires_at,
+                        extra_data = COALESCE(EXCLUDED.extra_data, platform_tokens.extra_data)
+                ''', *key, access_token, refresh_token, expires_at, json.dumps(extra) if extra else None)
+
+        self._cache[key] = token
+
+    async def accounts(self, user_id: int, platform: str) -> list:
+        """Подключённые аккаунты пользователя на платформе"""
+        db_pool = get_db_pool()
+        if not db_pool:
+            return [account for (uid, p, account) in self._cache if uid == user_id and p == platform]
+
+        async with db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                'SELECT account FROM platform_tokens WHERE user_id = $1 AND platform = $2 ORDER BY account',
+                user_id, platform
+            )
+        return [row['account'] for row in rows]
+
+    async def refresh_expiring(self):
+        """Обновление всех токенов, которые истекут в ближайшие REFRESH_AHEAD"""
+        db_pool = get_db_pool()
+        if db_pool:
+            # Токены, которые ещё не загружались в этот процесс, тоже обновляем заранее
+            async with db_pool.acquire() as conn:
+                rows = await conn.fetch('''
+                    SELECT user_id, platform, account, access_token, refresh_token, expires_at
+                    FROM platform_tokens
+                    WHERE refresh_token IS NOT NULL AND expires_at < $1
+                ''', _utcnow() + REFRESH_AHEAD)
+            for row in rows:
+                key = (row['user_id'], row['platform'], row['account'])
+                self._cache.setdefault(key, {
+                    'access_token': row['access_token'],
+                    'refresh_token': row['refresh_token'],
+                    'expires_at': row['expires_at'],
+                })
+
+        due = [
+            key for key, token in self._cache.items()
+            if key[1] in REFRESHERS and token.get('refresh_token') and self._needs_refresh(token, REFRESH_AHEAD)
+        ]
+
+        results = await asyncio.gather(*(self._refresh(key) for key in due), return_exceptions=True)
+        for key, result in zip(due, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Не удалось обновить токен {key[1]} ({key[2]}): {result}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh_expiring()
+            except Exception as e:
+                logger.error(f"Ошибка фонового обновления токенов: {e}")
+            await asyncio.sleep(REFRESH_CHECK_INTERVAL)
+
+    def start(self):
+        """Запуск фонового обновления"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("✅ Фоновое обновление токенов запущено")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+def _parse_oauth(payload: dict, token: dict) -> dict:
+    """Поля токена из ответа OAuth (refresh_token может не прийти — оставляем старый)"""
+    return {
+        'access_token': payload['access_token'],
+        'refresh_token': payload.get('refresh_token') or token.get('refresh_token'),
+        'expires_at': _utcnow() + timedelta(seconds=int(payload.get('expires_in', 3600))),
+    }
+
+token_manager = TokenManager()
+
+async def get_access_token(platform: str, user_id: int = BOT_USER_ID, account: str = DEFAULT_ACCOUNT) -> str:
+    """Актуальный access token (None, если платформа не подключена)"""
+    return await token_manager.get_access_token(platform, user_id, account)
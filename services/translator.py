@@ -2,79 +2,94 @@
 Сервис перевода текста
 """
 
+import asyncio
 import logging
 from deep_translator import GoogleTranslator
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
-# Инициализация переводчиков
-translator_to_ru = GoogleTranslator(source='en', target='ru')
-translator_to_en = GoogleTranslator(source='ru', target='en')
+# Лимит Google Translate — 5000 символов, длинный текст переводим частями
+MAX_CHUNK_LENGTH = 4500
 
+def _translate(translator: GoogleTranslator, text: str) -> str:
+    """Блокирующий перевод (длинный текст — по предложениям)"""
+    if len(text) <= MAX_CHUNK_LENGTH:
+        return translator.translate(text)
+    
+    # Разбиваем по предложениям
+    sentences = text.split('. ')
+    translated_parts = []
+    current_chunk = ""
+    
+    for sentence in sentences:
+        if len(current_chunk) + len(sentence) < MAX_CHUNK_LENGTH:
+            current_chunk += sentence + '. '
+        else:
+            if current_chunk:
+                translated_parts.append(translator.translate(current_chunk))
+            current_chunk = sentence + '. '
+    
+    if current_chunk:
+        translated_parts.append(translator.translate(current_chunk))
+    
+    return ' '.join(translated_parts)
+
+def _translate_with(source: str, target: str, text: str) -> str:
+    """
+    Перевод отдельным экземпляром переводчика
+
+    GoogleTranslator кладёт текст в self._url_params перед запросом, поэтому
+    один экземпляр в нескольких потоках может отправить чужой текст.
+    """
+    return _translate(GoogleTranslator(source=source, target=target), text)
+
+@traced('translate', 'ru')
 async def translate_to_russian(text: str) -> str:
     """
     Перевод текста на русский
     """
     try:
-        # Разбиваем длинный текст на части (лимит Google Translate - 5000 символов)
-        max_length = 4500
-        
-        if len(text) <= max_length:
-            return translator_to_ru.translate(text)
-        
-        # Разбиваем по предложениям
-        sentences = text.split('. ')
-        translated_parts = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) < max_length:
-                current_chunk += sentence + '. '
-            else:
-                if current_chunk:
-                    translated_parts.append(translator_to_ru.translate(current_chunk))
-                current_chunk = sentence + '. '
-        
-        if current_chunk:
-            translated_parts.append(translator_to_ru.translate(current_chunk))
-        
-        return ' '.join(translated_parts)
-    
+        # HTTP-запросы переводчика блокирующие — в отдельном потоке,
+        # экземпляр переводчика на каждый вызов (см. _translate_with)
+        return await asyncio.to_thread(_translate_with, 'en', 'ru', text)
     except Exception as e:
         logger.error(f"Ошибка перевода на русский: {e}")
         return text  # Возвращаем оригинал в случае ошибки
 
+@traced('translate', 'en')
 async def translate_to_english(text: str) -> str:
     """
     Перевод текста на английский
     """
     try:
-        max_length = 4500
-        
-        if len(text) <= max_length:
-            return translator_to_en.translate(text)
-        
-        sentences = text.split('. ')
-        translated_parts = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) < max_length:
-                current_chunk += sentence + '. '
-            else:
-                if current_chunk:
-                    translated_parts.append(translator_to_en.translate(current_chunk))
-                current_chunk = sentence + '. '
-        
-        if current_chunk:
-            translated_parts.append(translator_to_en.translate(current_chunk))
-        
-        return ' '.join(translated_parts)
-    
+        return await asyncio.to_thread(_translate_with, 'ru', 'en', text)
     except Exception as e:
         logger.error(f"Ошибка перевода на английский: {e}")
         return text
 
+@traced('translate', 'batch')
+async def translate_batch(texts: list, to_russian: bool = True, concurrency: int = 5) -> list:
+    """
+    Параллельный перевод списка текстов (порядок сохраняется)
+    """
+    source, target = ('en', 'ru') if to_russian else ('ru', 'en')
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def translate_one(text: str) -> str:
+        if not text:
+            return text
+
+        async with semaphore:
+            try:
+                # Блокирующий HTTP-запрос переводчика — в отдельном потоке
+                return await asyncio.to_thread(_translate_with, source, target, text)
+            except Exception as e:
+                logger.error(f"Ошибка пакетного перевода: {e}")
+                return text
+    
+    return await asyncio.gather(*(translate_one(text) for text in texts))
+
 async def detect_language(text: str) -> str:
     """
     Определение языка текста
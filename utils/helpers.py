@@ -5,6 +5,7 @@
 from datetime import datetime, timedelta
 import re
 from typing import Optional
+from utils.message_builder import split_text, MESSAGE_LIMIT
 
 def format_number(num: int) -> str:
     """
@@ -88,28 +89,23 @@ def validate_url(url: str) -> bool:
         r'(?:/?|[/?]\S+)$', re.IGNORECASE)
     return url_pattern.match(url) is not None
 
-def split_message(text: str, max_length: int = 4096) -> list:
+def split_message(text: str, max_length: int = MESSAGE_LIMIT, markdown: bool = False) -> list:
     """
-    Разбиение длинного сообщения на части
+    Разбиение длинного сообщения на части (по переносам строк, для Markdown —
+    не разрывая разметку; см. utils.message_builder)
     """
-    if len(text) <= max_length:
-        return [text]
-    
-    parts = []
-    while text:
-        if len(text) <= max_length:
-            parts.append(text)
-            break
-        
-        # Ищем ближайший перенос строки
-        split_pos = text.rfind('\n', 0, max_length)
-        if split_pos == -1:
-            split_pos = max_length
-        
-        parts.append(text[:split_pos])
-        text = text[split_pos:].lstrip()
+    return split_text(text, max_length, markdown)
+
+def parse_search_args(args: list) -> tuple:
+    """
+    Разбор аргументов поиска: ['текстуры', 'p2'] -> ('текстуры', 2)
+    """
+    page = 1
+    if len(args) > 1 and re.fullmatch(r'p\d+', args[-1]):
+        page = max(int(args[-1][1:]), 1)
+        args = args[:-1]
     
-    return parts
+    return ' '.join(args), page
 
 def sanitize_filename(filename: str) -> str:
     """
@@ -0,0 +1,43 @@
+"""
+Общая HTTP-сессия aiohttp
+"""
+
+import logging
+import aiohttp
+from utils import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Глобальная сессия (один пул соединений на весь процесс)
+_session = None
+
+def create_session(**kwargs) -> aiohttp.ClientSession:
+    """Создание новой сессии с настройками бота (с метриками и трассировкой запросов)"""
+    kwargs.setdefault('headers', DEFAULT_HEADERS)
+    kwargs.setdefault('trace_configs', [metrics.http_trace_config(), tracing.http_trace_config()])
+    return aiohttp.ClientSession(**kwargs)
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Получить общую сессию (создаётся при первом обращении)"""
+    global _session
+
+    if _session is None or _session.closed:
+        _session = create_session(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=10, ttl_dns_cache=300)
+        )
+
+    return _session
+
+async def close_http_session():
+    """Закрытие общей сессии"""
+    global _session
+
+    if _session and not _session.closed:
+        await _session.close()
+        logger.info("✅ HTTP-сессия закрыта")
+
+    _session = None
@@ -1,21 +1,48 @@
 """
 Клавиатуры для Telegram бота
+
+Объекты клавиатур python-telegram-bot неизменяемы, поэтому каждая строится
+один раз и дальше отдаётся из кэша; клавиатуры с параметром (id поста,
+действия) кэшируются по значению аргумента.
 """
 
+from functools import lru_cache
 from telegram import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from config.platforms import SUPPORTED_PLATFORMS
 
+# Кнопки главного меню (по этим же строкам handle_message выбирает обработчик)
+BTN_ASK_AI = "💬 Спросить AI"
+BTN_NOTE = "📝 Заметка"
+BTN_TASKS = "✅ Задачи"
+BTN_ART_IDEA = "🎨 Идея для арта"
+BTN_TRENDS = "🔥 Тренды"
+BTN_CONTENT_PLAN = "📅 Контент-план"
+BTN_NOTIFICATIONS = "⏰ Уведомления"
+BTN_STATS = "📊 Статистика"
+BTN_HELP = "ℹ️ Помощь"
+
+MAIN_MENU = (
+    (BTN_ASK_AI, BTN_NOTE),
+    (BTN_TASKS, BTN_ART_IDEA),
+    (BTN_TRENDS, BTN_CONTENT_PLAN),
+    (BTN_NOTIFICATIONS, BTN_STATS),
+    (BTN_HELP,),
+)
+
+# Сколько вариантов клавиатуры с параметром держать в кэше
+PARAM_KEYBOARD_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=None)
 def get_main_keyboard():
     """Главное меню бота"""
-    keyboard = [
-        [KeyboardButton("💬 Спросить AI"), KeyboardButton("📝 Заметка")],
-        [KeyboardButton("✅ Задачи"), KeyboardButton("🎨 Идея для арта")],
-        [KeyboardButton("🔥 Тренды"), KeyboardButton("📅 Контент-план")],
-        [KeyboardButton("⏰ Уведомления"), KeyboardButton("📊 Статистика")],
-        [KeyboardButton("ℹ️ Помощь")]
-    ]
+    keyboard = [[KeyboardButton(label) for label in row] for row in MAIN_MENU]
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
 
+def keyboard_labels(markup: ReplyKeyboardMarkup) -> list:
+    """Тексты всех кнопок reply-клавиатуры"""
+    return [button.text for row in markup.keyboard for button in row]
+
+@lru_cache(maxsize=None)
 def get_platform_keyboard():
     """Клавиатура выбора платформы"""
     keyboard = []
@@ -48,6 +75,7 @@ def get_platform_keyboard():
     
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_notification_keyboard():
     """Клавиатура настройки уведомлений"""
     keyboard = [
@@ -69,6 +97,7 @@ def get_notification_keyboard():
     ]
     return InlineKeyboardMarkup(keyboard)
 
+@lru_cache(maxsize=PARAM_KEYBOARD_CACHE_SIZE)
 def get_confirm_keyboard(action_id: str):
     """Клавиатура подтверждения действия"""
     keyboard = [
@@ -79,6 +108,7 @@ def get_confirm_keyboard(action_id: str):
     ]
     return InlineKeyboardMarkup(keyboard)
 
+@lru_cache(maxsize=PARAM_KEYBOARD_CACHE_SIZE)
 def get_post_actions_keyboard(post_id: int):
     """Клавиатура действий с постом"""
     keyboard = [
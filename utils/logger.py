@@ -1,29 +1,206 @@
 """
 Настройка логирования
+
+Записи из event loop только кладутся в очередь (QueueHandler); форматирование
+и запись в stdout делает отдельный поток (QueueListener). Текст сообщения
+собирается уже в этом потоке, поэтому в горячих местах стоит писать
+logger.info("... %s", value), а не f-строки.
+
+Частые сообщения ниже WARNING можно прореживать: с одного места вызова
+проходит не больше LOG_SAMPLE_PER_MINUTE записей в минуту (для модулей из
+LOG_SAMPLING — свой лимит), число пропущенных добавляется к следующей записи.
+По умолчанию лимит задан только модулям из LOG_SAMPLING; предупреждения и
+ошибки не прореживаются никогда — во время сбоя они нужны все.
 """
 
-import logging
 import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from config.settings import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_PER_MINUTE, LOG_SAMPLING
+from utils.tracing import current_trace
+
+TEXT_FORMAT = '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Стандартные атрибуты LogRecord (всё остальное — поля из extra)
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'suppressed', 'trace', 'user_id'}
+
+# ========================================
+# ФОРМАТЫ
+# ========================================
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+
+        for key in ('trace', 'user_id', 'suppressed'):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Привычный текстовый формат (+ число пропущенных похожих записей)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" [+{suppressed} похожих пропущено]"
+        return text
+
+# ========================================
+# ФИЛЬТРЫ
+# ========================================
+
+class SamplingFilter(logging.Filter):
+    """
+    Прореживание частых записей
+
+    Ключ — место вызова (модуль, файл, строка), поэтому f-строки с разными
+    значениями считаются одним сообщением. WARNING и выше не прореживаются.
+    """
+
+    def __init__(self, per_minute: int = LOG_SAMPLE_PER_MINUTE, modules: dict = None, window: float = 60.0):
+        super().__init__()
+        self.per_minute = per_minute
+        # Самый длинный префикс проверяется первым
+        self.modules = sorted((modules or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.window = window
+        self._limits = {}    # имя логгера -> лимит
+        self._counters = {}  # место вызова -> [начало окна, прошло, пропущено]
+
+    def _limit(self, name: str) -> int:
+        limit = self._limits.get(name)
+        if limit is None:
+            limit = self.per_minute
+            for prefix, module_limit in self.modules:
+                if name == prefix or name.startswith(prefix + '.'):
+                    limit = module_limit
+                    break
+            self._limits[name] = limit
+        return limit
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        limit = self._limit(record.name)
+        if limit <= 0:
+            return True
+
+        key = (record.name, record.pathname, record.lineno)
+        now = record.created
+        counter = self._counters.get(key)
+
+        if counter is None or now - counter[0] >= self.window:
+            suppressed = counter[2] if counter else 0
+            self._counters[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+
+        if counter[1] < limit:
+            counter[1] += 1
+            return True
+
+        counter[2] += 1
+        return False
+
+class ContextFilter(logging.Filter):
+    """Обновление и пользователь из текущей трассы (до передачи в другой поток)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace = current_trace()
+        if trace is not None:
+            record.trace = trace.name
+            record.user_id = trace.user_id
+        return True
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке
+
+    Стандартный prepare() собирает сообщение до постановки в очередь —
+    для очереди внутри процесса это не нужно, запись передаётся как есть.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+# ========================================
+# НАСТРОЙКА
+# ========================================
+
+_listener = None
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None,
+                  sample_per_minute: int = LOG_SAMPLE_PER_MINUTE) -> logging.handlers.QueueListener:
+    """
+    Логирование через очередь для всего процесса (вызывается один раз при старте)
+
+    Args:
+        level: Уровень корневого логгера
+        fmt: 'json' или 'text'
+        stream: Куда писать (по умолчанию stdout)
+        sample_per_minute: Лимит записей с одного места вызова (0 — без прореживания)
+    """
+    global _listener
+
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter(TEXT_FORMAT, DATE_FORMAT))
+
+    handler = _LocalQueueHandler(queue.SimpleQueue())
+    handler.addFilter(SamplingFilter(sample_per_minute, LOG_SAMPLING))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    # Подробные логи HTTP-клиентов не нужны даже в DEBUG
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+def stop_logging():
+    """Дописать очередь и остановить поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 def setup_logger(name: str = None, level: int = logging.INFO) -> logging.Logger:
-    """Настройка логгера"""
+    """Логгер модуля (записи идут через общую очередь корневого логгера)"""
     logger = logging.getLogger(name or __name__)
-    
-    if logger.handlers:
-        return logger
-    
     logger.setLevel(level)
-    
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(level)
-    
-    formatter = logging.Formatter(
-        fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    
     return logger
 
 # Создаем глобальный логгер
@@ -0,0 +1,140 @@
+"""
+Контроль задержек event loop
+
+Фоновая задача каждые LOOP_LAG_INTERVAL_MS засыпает и замеряет, насколько
+позже срока она проснулась, — это задержка планирования, которую видят все
+обработчики. Сторожевой поток следит за отметкой этой задачи: если loop не
+отвечает дольше LOOP_BLOCK_THRESHOLD_MS, он снимает стек потока loop, то есть
+место блокирующего вызова, и пишет его в лог.
+
+В строгом режиме (нагрузочный тест) блокировки накапливаются в blocks, чтобы
+прогон можно было завершить ошибкой.
+"""
+
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from config.settings import LOOP_LAG_INTERVAL_MS, LOOP_BLOCK_THRESHOLD_MS
+from utils.metrics import LOOP_LAG_SECONDS, LOOP_LAG_QUANTILE, LOOP_BLOCKS, on_collect
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних замеров учитывать в перцентилях
+LAG_WINDOW = 600
+
+# Сколько кадров стека сохранять для блокировки
+STACK_LIMIT = 25
+
+class LoopMonitor:
+    """Замер задержки event loop и поиск блокирующих вызовов"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_MS / 1000,
+                 block_threshold: float = LOOP_BLOCK_THRESHOLD_MS / 1000, strict: bool = False):
+        self.interval = interval
+        self.block_threshold = max(block_threshold, interval * 2)
+        self.strict = strict
+        self.lags = deque(maxlen=LAG_WINDOW)
+        self.blocks = []        # строгий режим: [{'duration', 'stack'}]
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat = 0.0
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Запуск (вызывается из работающего event loop)"""
+        if self._task is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watchdog.start()
+        logger.info(f"✅ Контроль event loop: замер раз в {int(self.interval * 1000)} мс, "
+                    f"блокировка от {int(self.block_threshold * 1000)} мс")
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _sample(self):
+        loop = self._loop
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._heartbeat = time.monotonic()
+            self.lags.append(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def _watch(self):
+        """Сторожевой поток: стек loop, если тот не отвечает дольше порога"""
+        reported = 0.0  # отметка, для которой блокировка уже записана
+
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            # Следующая отметка ожидается через interval после предыдущей:
+            # как и в замере задержки, плановый сон задержкой не считается
+            stalled = time.monotonic() - heartbeat - self.interval
+
+            if stalled < self.block_threshold or heartbeat == reported:
+                continue
+
+            reported = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame, limit=STACK_LIMIT)) if frame else ''
+            self._record_block(stalled, stack)
+
+    def _record_block(self, duration: float, stack: str):
+        LOOP_BLOCKS.inc()
+        logger.warning(f"🧱 Event loop заблокирован {duration * 1000:.0f}+ мс:\n{stack}")
+        if self.strict:
+            self.blocks.append({'duration': duration, 'stack': stack})
+
+    def percentiles(self) -> dict:
+        """Перцентили задержки за последние замеры: {0.5: сек, 0.95: ..., 0.99: ...}"""
+        values = sorted(self.lags)
+        if not values:
+            return {}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in (0.5, 0.95, 0.99)}
+
+_monitor = None
+
+@on_collect
+def _collect_lag_quantiles():
+    if _monitor is None:
+        return
+    for quantile, value in _monitor.percentiles().items():
+        LOOP_LAG_QUANTILE.labels(str(quantile)).set(value)
+
+def start_loop_monitor(strict: bool = False) -> LoopMonitor:
+    """Запуск контроля event loop (вызывается при старте приложения)"""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopMonitor(strict=strict)
+        _monitor.start()
+    return _monitor
+
+def get_loop_monitor() -> LoopMonitor:
+    return _monitor
+
+async def stop_loop_monitor():
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
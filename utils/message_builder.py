@@ -0,0 +1,196 @@
+"""
+Сборка длинных ответов с Markdown
+
+Сообщение копится списком фрагментов (без квадратичного +=) и режется на
+части не длиннее лимита Telegram. Границы частей — между фрагментами,
+иначе по переносу строки или пробелу вне разметки; разметку (Markdown v1:
+*жирный*, _курсив_, `код`, ```блок```, [ссылка](url)) разрез не ломает.
+Если безопасного места нет (длинный блок кода), сущность закрывается в
+конце части и открывается заново в начале следующей.
+
+Пользовательский текст (заметки, названия трендов, запросы) вставляется
+через escape_markdown, чтобы случайные _ и * не ломали отправку.
+"""
+
+MESSAGE_LIMIT = 4096
+
+# Markdown v1: вне сущностей экранируются только эти символы
+_MARKDOWN_ESCAPES = str.maketrans({char: '\\' + char for char in '_*`['})
+
+# Самый длинный разделитель сущности (```)
+_MAX_DELIMITER = 3
+
+def escape_markdown(text) -> str:
+    """Экранировать текст для вставки в Markdown вне сущностей"""
+    return str(text).translate(_MARKDOWN_ESCAPES)
+
+def escape_url(url: str) -> str:
+    """URL для [текст](url): закрывающая скобка ломает ссылку"""
+    return str(url).replace(')', '%29')
+
+# ========================================
+# РАЗБИЕНИЕ
+# ========================================
+
+def _link_end(text: str, start: int, end: int) -> int:
+    """Конец ссылки [текст](url), начинающейся в start, или -1"""
+    close = text.find('](', start + 1, end)
+    if close == -1 or '\n' in text[start:close]:
+        return -1
+    paren = text.find(')', close + 2, end)
+    return -1 if paren == -1 else paren + 1
+
+def _scan(text: str, start: int, end: int, entity: str):
+    """
+    Проход по text[start:end] с учётом разметки
+
+    Returns:
+        (последний перенос строки вне сущности, последний пробел вне
+        сущности, открытая сущность в end, позиция, до которой разметка
+        разобрана) — позиции -1, если их нет
+    """
+    newline = space = -1
+    i = start
+
+    while i < end:
+        char = text[i]
+
+        if entity is not None:
+            if text.startswith(entity, i):
+                i += len(entity)
+                entity = None
+                continue
+            if char == '\\' and entity != '`' and entity != '```':
+                i += 2
+                continue
+            i += 1
+            continue
+
+        if char == '\n':
+            newline = i
+        elif char == ' ':
+            space = i
+        elif char == '\\':
+            i += 2
+            continue
+        elif char == '`':
+            entity = '```' if text.startswith('```', i) else '`'
+            i += len(entity)
+            continue
+        elif char == '*' or char == '_':
+            entity = char
+        elif char == '[':
+            link_end = _link_end(text, i, len(text))
+            if link_end != -1:
+                if link_end > end:
+                    # Ссылка не влезает — резать можно только перед ней
+                    return newline, space, None, i
+                i = link_end
+                continue
+        i += 1
+
+    return newline, space, entity, i
+
+def split_text(text: str, limit: int = MESSAGE_LIMIT, markdown: bool = True) -> list:
+    """
+    Разбить текст на части не длиннее limit
+
+    Режет по последнему переносу строки, затем пробелу, затем жёстко.
+    С markdown=True учитывает разметку (см. описание модуля); для простого
+    текста разметка не разбирается.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    parts = []
+    start, reopen = 0, ''
+
+    while len(text) - start + len(reopen) > limit:
+        budget = limit - len(reopen)
+        end = start + budget
+
+        if markdown:
+            newline, space, entity, parsed = _scan(text, start, end - _MAX_DELIMITER, reopen or None)
+        else:
+            newline, space, entity, parsed = text.rfind('\n', start, end), text.rfind(' ', start, end), None, end
+
+        if newline > start:
+            cut, next_start, entity = newline, newline + 1, None
+        elif space > start:
+            cut, next_start, entity = space, space + 1, None
+        else:
+            cut = next_start = parsed if parsed > start else end
+
+        parts.append(reopen + text[start:cut] + (entity or ''))
+        start, reopen = next_start, entity or ''
+
+    parts.append(reopen + text[start:])
+    return [part for part in parts if part.strip()]
+
+# ========================================
+# СБОРКА
+# ========================================
+
+class MessageBuilder:
+    """
+    Ответ из фрагментов
+
+    Каждый add() — целая запись (тренд, заметка, пост) со сбалансированной
+    разметкой: части собираются из записей целиком, а запись длиннее лимита
+    режется через split_text.
+    """
+
+    def __init__(self, limit: int = MESSAGE_LIMIT, markdown: bool = True):
+        self.limit = limit
+        self.markdown = markdown
+        self._parts = []
+        self._length = 0
+
+    def add(self, fragment: str) -> 'MessageBuilder':
+        """Добавить фрагмент (разметка как есть, значения — через escape_markdown)"""
+        if fragment:
+            self._parts.append(fragment)
+            self._length += len(fragment)
+        return self
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return bool(self._parts)
+
+    def text(self) -> str:
+        """Всё сообщение одной строкой"""
+        return ''.join(self._parts)
+
+    def build(self) -> list:
+        """Части сообщения не длиннее limit"""
+        if self._length <= self.limit:
+            return [self.text()] if self._parts else []
+
+        chunks = []
+        current, size = [], 0
+
+        for fragment in self._parts:
+            if size + len(fragment) > self.limit and current:
+                chunks.append(''.join(current))
+                current, size = [], 0
+
+            if len(fragment) > self.limit:
+                pieces = split_text(fragment, self.limit, self.markdown)
+                chunks.extend(pieces[:-1])
+                fragment = pieces[-1]
+
+            current.append(fragment)
+            size += len(fragment)
+
+        if current:
+            chunks.append(''.join(current))
+        return chunks
+
+    async def reply(self, message, **kwargs):
+        """Отправить ответом на message (по сообщению на часть)"""
+        if self.markdown:
+            kwargs.setdefault('parse_mode', 'Markdown')
+        for chunk in self.build():
+            await message.reply_text(chunk, **kwargs)
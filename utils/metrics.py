@@ -0,0 +1,299 @@
+"""
+Метрики в формате Prometheus
+
+Счётчики и гистограммы хранятся в памяти процесса и отдаются текстом на
+/metrics. Наблюдение — поиск корзины через bisect и пара сложений, без
+блокировок (всё вызывается из event loop). Серия для набора меток создаётся
+один раз, поэтому в горячем коде стоит сохранять результат labels().
+"""
+
+import time
+import logging
+from bisect import bisect_left
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Корзины по умолчанию (секунды): от быстрых запросов к БД до долгих вызовов AI
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Все созданные метрики в порядке объявления
+_registry = []
+
+# Функции, обновляющие показатели перед выгрузкой (например, размер пула БД)
+_collect_hooks = []
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# ========================================
+# ТИПЫ МЕТРИК
+# ========================================
+
+class _Metric:
+    """Метрика с набором серий по значениям меток"""
+
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        _registry.append(self)
+
+    def labels(self, *values):
+        """Серия для значений меток (создаётся при первом обращении)"""
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}")
+            series = self._series[values] = self._new_series()
+        return series
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return lines
+
+class _CounterSeries:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик"""
+
+    type = 'counter'
+
+    def _new_series(self):
+        return _CounterSeries()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(series.value)}"
+            for values, series in self._series.items()
+        ]
+
+class _GaugeSeries:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+class Gauge(_Metric):
+    """Текущее значение (размер очереди, число соединений)"""
+
+    type = 'gauge'
+
+    def _new_series(self):
+        return _GaugeSeries()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def _samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(series.value)}"
+            for values, series in self._series.items()
+        ]
+
+class _Timer:
+    """Контекстный менеджер: время выполнения блока в гистограмму"""
+
+    __slots__ = ('_series', '_start')
+
+    def __init__(self, series):
+        self._series = series
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._series.observe(time.perf_counter() - self._start)
+        return False
+
+class _HistogramSeries:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последняя корзина — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+class Histogram(_Metric):
+    """Распределение значений (обычно длительностей в секундах) по корзинам"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self):
+        return _HistogramSeries(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def _samples(self):
+        lines = []
+        bounds = self.buckets + (float('inf'),)
+
+        for values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, series.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{labels} {series.count}")
+
+        return lines
+
+# ========================================
+# МЕТРИКИ БОТА
+# ========================================
+
+HANDLER_SECONDS = Histogram('bot_handler_duration_seconds', 'Время обработки обновления обработчиком', ('handler',))
+HANDLER_ERRORS = Counter('bot_handler_errors_total', 'Исключения в обработчиках', ('handler', 'error'))
+
+DB_QUERY_SECONDS = Histogram('bot_db_query_duration_seconds', 'Время выполнения запроса к БД', ('operation',))
+DB_QUERY_ERRORS = Counter('bot_db_query_errors_total', 'Ошибки запросов к БД', ('operation',))
+DB_ACQUIRE_SECONDS = Histogram('bot_db_pool_acquire_seconds', 'Ожидание соединения из пула БД')
+DB_POOL_SIZE = Gauge('bot_db_pool_connections', 'Соединения пула БД', ('state',))
+
+HTTP_SECONDS = Histogram('bot_http_request_duration_seconds', 'Время исходящего HTTP-запроса', ('host', 'method', 'status'))
+
+GEMINI_SECONDS = Histogram('bot_gemini_request_duration_seconds', 'Время запроса к Gemini', ('operation',))
+GEMINI_ERRORS = Counter('bot_gemini_errors_total', 'Ошибки запросов к Gemini', ('operation',))
+
+SCRAPE_SECONDS = Histogram('bot_scrape_duration_seconds', 'Время парсинга источника трендов', ('source', 'outcome'))
+
+RESPONSE_CACHE_REQUESTS = Counter('bot_response_cache_requests_total', 'Обращения к кэшу чтений', ('name', 'result'))
+
+LOOP_LAG_SECONDS = Histogram('bot_event_loop_lag_seconds', 'Задержка планирования event loop',
+                             buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+LOOP_LAG_QUANTILE = Gauge('bot_event_loop_lag_quantile_seconds', 'Перцентили задержки event loop за последние замеры', ('quantile',))
+LOOP_BLOCKS = Counter('bot_event_loop_blocks_total', 'Блокировки event loop дольше порога')
+
+# ========================================
+# ИНСТРУМЕНТАЦИЯ
+# ========================================
+
+def _handler_name(handler) -> str:
+    """Имя обработчика для меток: команда или имя функции"""
+    commands = getattr(handler, 'commands', None)
+    if commands:
+        return '/' + sorted(commands)[0]
+    return getattr(handler.callback, '__name__', type(handler).__name__)
+
+def _timed_callback(callback, name: str):
+    series = HANDLER_SECONDS.labels(name)
+
+    async def wrapper(update, context):
+        start = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception as e:
+            HANDLER_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            series.observe(time.perf_counter() - start)
+
+    wrapper.__name__ = getattr(callback, '__name__', name)
+    wrapper.__wrapped__ = callback
+    return wrapper
+
+def instrument_handlers(application):
+    """Замер времени всех зарегистрированных обработчиков (вызывать после add_handler)"""
+    count = 0
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if getattr(handler.callback, '__wrapped__', None) is None:
+                handler.callback = _timed_callback(handler.callback, _handler_name(handler))
+                count += 1
+    logger.info(f"📊 Метрики обработчиков: {count}")
+
+async def _on_request_start(session, ctx, params):
+    ctx.start = time.perf_counter()
+
+async def _on_request_end(session, ctx, params):
+    HTTP_SECONDS.labels(params.url.host, params.method, str(params.response.status)).observe(time.perf_counter() - ctx.start)
+
+async def _on_request_exception(session, ctx, params):
+    HTTP_SECONDS.labels(params.url.host, params.method, 'error').observe(time.perf_counter() - ctx.start)
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """TraceConfig aiohttp с замером времени исходящих запросов"""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_request_exception.append(_on_request_exception)
+    return trace_config
+
+def on_collect(hook):
+    """Функция, вызываемая перед каждой выгрузкой метрик"""
+    _collect_hooks.append(hook)
+    return hook
+
+def render() -> str:
+    """Все метрики в текстовом формате Prometheus"""
+    for hook in _collect_hooks:
+        try:
+            hook()
+        except Exception as e:
+            logger.error(f"Ошибка сбора метрик: {e}")
+
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
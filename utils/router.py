@@ -0,0 +1,100 @@
+"""
+Маршрутизация текстовых сообщений по кнопкам меню
+
+Нажатие кнопки reply-клавиатуры приходит обычным текстом с подписью кнопки,
+поэтому обработчик ищется одним обращением к словарю. Таблица сверяется
+с клавиатурой при создании: кнопка без обработчика (или обработчик для
+кнопки, которой нет в меню) — ошибка при импорте, а не молчаливый уход
+нажатия в AI.
+
+Для текстовых команд вида «заметка: купить кисти» есть префиксное дерево:
+побеждает самый длинный префикс, регистр не учитывается, остаток текста
+передаётся обработчику как аргументы.
+"""
+
+from telegram import ReplyKeyboardMarkup
+from utils.keyboards import keyboard_labels
+
+class PrefixTrie:
+    """Префиксное дерево: поиск самого длинного совпавшего префикса"""
+
+    __slots__ = ('_root', '_max_depth', 'first_chars')
+
+    def __init__(self):
+        self._root = {}
+        self._max_depth = 0
+        self.first_chars = frozenset()  # первые буквы префиксов в обоих регистрах
+
+    def insert(self, prefix: str, value):
+        if not prefix:
+            raise ValueError("Пустой префикс")
+        node = self._root
+        for char in prefix.lower():
+            node = node.setdefault(char, {})
+        node[None] = value  # ключ None — конец префикса
+        self._max_depth = max(self._max_depth, len(prefix))
+        self.first_chars |= {prefix[0].lower(), prefix[0].upper()}
+
+    def longest_prefix(self, text: str) -> tuple:
+        """(значение, остаток текста) или (None, text)"""
+        node = self._root.get(text[:1].lower())
+        if node is None:
+            return None, text
+        found, length = None, 0
+
+        # Глубже самого длинного префикса идти незачем
+        for depth, char in enumerate(text[1:self._max_depth].lower(), 2):
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                found, length = node[None], depth
+
+        if found is None:
+            return None, text
+        return found, text[length:]
+
+class ButtonRouter:
+    """Таблица «подпись кнопки → обработчик» с проверкой по клавиатуре"""
+
+    def __init__(self, buttons: dict, keyboard: ReplyKeyboardMarkup = None, prefixes: dict = None):
+        """
+        Args:
+            buttons: {подпись кнопки: обработчик}
+            keyboard: Клавиатура, с которой сверяются подписи
+            prefixes: {префикс текстовой команды: обработчик}
+        """
+        if keyboard is not None:
+            labels = set(keyboard_labels(keyboard))
+            missing = labels - buttons.keys()
+            unknown = buttons.keys() - labels
+            if missing or unknown:
+                raise ValueError(
+                    f"Кнопки меню и обработчики не совпадают: "
+                    f"без обработчика {sorted(missing)}, нет в меню {sorted(unknown)}"
+                )
+
+        self.buttons = dict(buttons)
+        self.prefixes = PrefixTrie()
+        for prefix, handler in (prefixes or {}).items():
+            self.prefixes.insert(prefix, handler)
+
+    def resolve(self, text: str) -> tuple:
+        """
+        Обработчик для текста
+
+        Returns:
+            (обработчик, аргументы) — аргументы есть только у префиксных команд;
+            (None, None), если текст не кнопка и не команда
+        """
+        handler = self.buttons.get(text)
+        if handler is not None:
+            return handler, None
+
+        # Обычный текст отсекается по первой букве, без обхода дерева
+        if text[:1] in self.prefixes.first_chars:
+            handler, rest = self.prefixes.longest_prefix(text)
+            if handler is not None:
+                return handler, rest.split()
+
+        return None, None
@@ -0,0 +1,212 @@
+"""
+Трассировка обработки обновлений
+
+На каждое обновление открывается трасса; текущая трасса хранится в
+contextvars, поэтому доходит до запросов к БД, HTTP, Gemini и переводчика,
+в том числе в задачах asyncio и asyncio.to_thread. Этапы записываются
+плоским списком (этап, имя, смещение, длительность). Вне трассы span()
+возвращает пустой контекстный менеджер.
+
+Трассы дольше TRACE_SLOW_MS попадают в кольцевой буфер (/traces) и в лог
+или JSONL-файл TRACE_LOG_FILE.
+"""
+
+import json
+import time
+import logging
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+import aiohttp
+from config.settings import TRACE_SLOW_MS, TRACE_BUFFER_SIZE, TRACE_LOG_FILE
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('trace', default=None)
+
+# Последние медленные трассы
+_slow_traces = deque(maxlen=TRACE_BUFFER_SIZE)
+
+class Trace:
+    """Трасса одного обновления"""
+
+    __slots__ = ('name', 'user_id', 'started_at', 'start', 'duration', 'spans', 'error')
+
+    def __init__(self, name: str, user_id: int = None):
+        self.name = name
+        self.user_id = user_id
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.spans = []
+        self.error = None
+
+    def breakdown(self) -> dict:
+        """Суммарное время по этапам: {этап: (секунды, количество)}"""
+        stages = {}
+        for stage, _, _, duration, _ in self.spans:
+            total, count = stages.get(stage, (0.0, 0))
+            stages[stage] = (total + duration, count + 1)
+        return dict(sorted(stages.items(), key=lambda item: item[1][0], reverse=True))
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'user_id': self.user_id,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 1),
+            'error': self.error,
+            'stages': {stage: {'ms': round(total * 1000, 1), 'count': count} for stage, (total, count) in self.breakdown().items()},
+            'spans': [
+                {'stage': stage, 'name': name, 'offset_ms': round(offset * 1000, 1), 'ms': round(duration * 1000, 1), 'error': failed}
+                for stage, name, offset, duration, failed in self.spans
+            ],
+        }
+
+class _Span:
+    __slots__ = ('trace', 'stage', 'name', 'start')
+
+    def __init__(self, trace: Trace, stage: str, name: str):
+        self.trace = trace
+        self.stage = stage
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.trace.spans.append((self.stage, self.name, self.start - self.trace.start, end - self.start, exc_type is not None))
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def current_trace() -> Trace:
+    """Трасса текущего обновления (None вне обработчика)"""
+    return _current.get()
+
+def span(stage: str, name: str = ''):
+    """Этап текущей трассы: with span('db', 'fetch'): ..."""
+    trace = _current.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, stage, name)
+
+def traced(stage: str, name: str = None):
+    """Декоратор async-функции: её вызов — этап трассы"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(stage, span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+# ========================================
+# ТРАССЫ
+# ========================================
+
+def start_trace(name: str, user_id: int = None) -> tuple:
+    """Открыть трассу в текущем контексте; возвращает (трасса, токен для finish_trace)"""
+    trace = Trace(name, user_id)
+    return trace, _current.set(trace)
+
+def finish_trace(trace: Trace, token, error: BaseException = None):
+    """Закрыть трассу; медленная сохраняется в буфер и лог"""
+    _current.reset(token)
+    trace.duration = time.perf_counter() - trace.start
+    if error is not None:
+        trace.error = type(error).__name__
+
+    if trace.duration * 1000 >= TRACE_SLOW_MS:
+        _slow_traces.append(trace)
+        _export(trace)
+
+def _export(trace: Trace):
+    if TRACE_LOG_FILE:
+        try:
+            with open(TRACE_LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(trace.to_dict(), ensure_ascii=False) + '\n')
+        except OSError as e:
+            logger.error(f"Ошибка записи трассы: {e}")
+        return
+
+    logger.warning("🐢 Медленное обновление %s: %.2f сек (%s)", trace.name, trace.duration, format_breakdown(trace))
+
+def format_breakdown(trace: Trace) -> str:
+    """'gemini 18.10 сек ×1, db 0.21 сек ×6'"""
+    parts = [f"{stage} {total:.2f} сек ×{count}" for stage, (total, count) in trace.breakdown().items()]
+    return ', '.join(parts) or 'без этапов'
+
+def get_slow_traces(limit: int = 10) -> list:
+    """Самые медленные из недавних трасс"""
+    return sorted(_slow_traces, key=lambda trace: trace.duration, reverse=True)[:limit]
+
+# ========================================
+# ИНСТРУМЕНТАЦИЯ
+# ========================================
+
+def _handler_name(handler) -> str:
+    commands = getattr(handler, 'commands', None)
+    if commands:
+        return '/' + sorted(commands)[0]
+    return getattr(handler.callback, '__name__', type(handler).__name__)
+
+def _traced_callback(callback, name: str):
+    async def wrapper(update, context):
+        user = getattr(update, 'effective_user', None)
+        trace, token = start_trace(name, user.id if user else None)
+        error = None
+        try:
+            return await callback(update, context)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            finish_trace(trace, token, error)
+
+    wrapper.__name__ = getattr(callback, '__name__', name)
+    wrapper._traced = True
+    return wrapper
+
+def trace_handlers(application):
+    """Трасса на каждый вызов зарегистрированных обработчиков"""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if not getattr(handler.callback, '_traced', False):
+                handler.callback = _traced_callback(handler.callback, _handler_name(handler))
+
+async def _on_request_start(session, ctx, params):
+    trace = _current.get()
+    ctx.trace_span = None
+    if trace is not None:
+        ctx.trace_span = _Span(trace, 'http', f"{params.method} {params.url.host}").__enter__()
+
+async def _on_request_end(session, ctx, params):
+    if ctx.trace_span is not None:
+        ctx.trace_span.__exit__(None, None, None)
+
+async def _on_request_exception(session, ctx, params):
+    if ctx.trace_span is not None:
+        ctx.trace_span.__exit__(type(params.exception), params.exception, None)
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """TraceConfig aiohttp: исходящие запросы — этапы текущей трассы"""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_request_exception.append(_on_request_exception)
+    return trace_config